@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Time per polling commit and number of runtime data writes, with every
+`scorm_enforce_commit` written to the block fields or held in the write
+buffer and flushed once per `--interval` seconds of commits.
+
+The player polls every 2 seconds, the buffered run commits `--commits`
+polls whose buffer is due every `--interval // 2` polls, then flushes the
+rest as `student_view` does. The commits go through the handler in an
+in-memory runtime with the default local memory cache as buffer backend.
+
+    python benchmarks/commit_buffer.py --commits 300 --interval 30
+"""
+from __future__ import print_function
+import argparse
+import time
+
+from common import report, setup, us
+
+setup()
+
+from xblock.field_data import DictFieldData  # noqa: E402
+
+from scormxblock.cache import runtime_buffer  # noqa: E402
+from tests.tools import BlockRuntime  # noqa: E402
+
+
+class CountingFieldData(DictFieldData):
+
+    writes = 0
+
+    def set_many(self, block, update_dict):
+        if any('runtime_data' in name for name in update_dict):
+            self.writes += 1
+        super(CountingFieldData, self).set_many(block, update_dict)
+
+
+def run(commits, interval, poll_every=2):
+    """Seconds per commit and runtime data writes of `commits` polls."""
+    runtime = BlockRuntime()
+    runtime.field_data = CountingFieldData({})
+    runtime_buffer.interval = interval
+    clock = [0]
+    started = time.time()
+    real_time = time.time
+    # the buffer is due after `interval` seconds of player time
+    time.time = lambda: real_time() + clock[0]
+    try:
+        for seq in range(1, commits + 1):
+            clock[0] += poll_every
+            runtime.commit({'cmi.core.lesson_location': 'page-{}'.format(seq), 'cmi.core.session_time': '00:01:00'},
+                           'a', seq, handler_name='scorm_enforce_commit')
+        block = runtime.block()
+        if block.flush_runtime_buffer():
+            block.save()
+    finally:
+        time.time = real_time
+        runtime_buffer.interval = 0
+    elapsed = time.time() - started
+    return elapsed / commits, runtime.field_data.writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commits', type=int, default=300, help='number of polling commits')
+    parser.add_argument('--interval', type=int, default=30, help='SCORM_COMMIT_FLUSH_INTERVAL, in seconds')
+    args = parser.parse_args()
+
+    rows = []
+    for mode, interval in (('flushed', 0), ('buffered', args.interval)):
+        results = [run(args.commits, interval) for _ in range(5)]
+        rows.append((mode, interval, results[0][1], us(min(per_commit for per_commit, _ in results))))
+    report('{} polling commits'.format(args.commits), rows, ('mode', 'interval', 'writes', 'time'))
+
+
+if __name__ == '__main__':
+    main()
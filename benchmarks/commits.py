@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Bytes and server time per commit, with the whole runtime data sent on
+every commit or only the changed values (deltas), for several sizes of
+`cmi.suspend_data`.
+
+A typical periodic commit changes the session time, the location and the
+suspend data. The commits go through `scorm_commit` in an in-memory
+runtime, so the server time covers decoding the request, ordering,
+validating and storing the values, and the score and time updates.
+
+    python benchmarks/commits.py --interactions 200
+"""
+from __future__ import print_function
+import argparse
+import itertools
+import json
+
+from common import measure, report, setup, us
+
+setup()
+
+from scormxblock.scorm_default import SCORM_VERSION  # noqa: E402
+from tests.tools import BlockRuntime  # noqa: E402
+
+
+def make_runtime_data(suspend_size, interactions):
+    data = {
+        'cmi.completion_status': 'incomplete',
+        'cmi.location': 'page-1',
+        'cmi.session_time': 'PT1M',
+        'cmi.suspend_data': 'x' * suspend_size,
+    }
+    for i in range(interactions):
+        data['cmi.interactions.{}.id'.format(i)] = 'question-{}'.format(i)
+        data['cmi.interactions.{}.type'.format(i)] = 'choice'
+        data['cmi.interactions.{}.learner_response'.format(i)] = 'b'
+        data['cmi.interactions.{}.result'.format(i)] = 'correct'
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interactions', type=int, default=50, help='number of stored interactions')
+    parser.add_argument('--sizes', default='1024,4096,16384,65536', help='suspend data sizes, comma separated')
+    args = parser.parse_args()
+
+    rows = []
+    for size in [int(size) for size in args.sizes.split(',')]:
+        runtime_data = make_runtime_data(size, args.interactions)
+        runtime = BlockRuntime()
+        runtime.commit(runtime_data, version=SCORM_VERSION.V2004)
+        seqs = itertools.count(1)
+        delta = {
+            'cmi.session_time': 'PT2M',
+            'cmi.location': 'page-2',
+            'cmi.suspend_data': 'y' * size,
+        }
+        full = dict(runtime_data, **delta)
+
+        def commit_full():
+            runtime.commit(full, version=SCORM_VERSION.V2004)
+
+        def commit_delta():
+            runtime.commit(delta, 'f3b2', next(seqs), version=SCORM_VERSION.V2004)
+
+        full_bytes = len(json.dumps(dict(full, package_version=SCORM_VERSION.V2004, package_date='')))
+        delta_bytes = len(json.dumps(dict(delta, package_version=SCORM_VERSION.V2004, package_date='',
+                                          commit_session='f3b2', commit_seq=1)))
+        rows.append((size, full_bytes, delta_bytes, us(measure(commit_full, number=20)),
+                     us(measure(commit_delta, number=20))))
+    report('commit of {} interactions'.format(args.interactions), rows,
+           ('suspend_data', 'full bytes', 'delta bytes', 'full time', 'delta time'))
+
+
+if __name__ == '__main__':
+    main()
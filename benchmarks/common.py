@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Setup and timing helpers of the benchmarks.
+
+The benchmarks run in the python environment of the block. Django is set
+up from `DJANGO_SETTINGS_MODULE` when it is defined (an LMS or Studio
+environment), with minimal settings otherwise.
+"""
+from __future__ import print_function
+import os
+import sys
+import time
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup(**overrides):
+    """Set up django, `overrides` apply to the minimal settings only."""
+    if not os.environ.get('DJANGO_SETTINGS_MODULE') and not settings.configured:
+        options = {
+            'INSTALLED_APPS': ['django.contrib.auth', 'django.contrib.contenttypes', 'scormxblock'],
+            'DATABASES': {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+            'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            'TEMPLATES': [{'BACKEND': 'django.template.backends.django.DjangoTemplates'}],
+            'USE_I18N': True,
+        }
+        options.update(overrides)
+        settings.configure(**options)
+    django.setup()
+
+
+def measure(func, repeat=5, number=1):
+    """Best time in seconds of `number` calls of `func`, over `repeat` runs."""
+    best = None
+    for _ in range(repeat):
+        started = time.time()
+        for _ in range(number):
+            func()
+        elapsed = (time.time() - started) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(title, rows, columns):
+    """Print `rows` of values under `columns`, with `title` above."""
+    print(title)
+    widths = [max(len(str(column)), max(len(str(row[i])) for row in rows) if rows else 0)
+              for i, column in enumerate(columns)]
+    print('  '.join(str(column).rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(str(value).rjust(width) for value, width in zip(row, widths)))
+    print()
+
+
+def us(seconds):
+    return '{:.1f}us'.format(seconds * 1e6)
+
+
+def ms(seconds):
+    return '{:.2f}ms'.format(seconds * 1e3)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of resolving the default and checking the value of data model
+elements with the compiled data model, against the previous lookup in the
+defaults dict, which needs the indexes replaced by `n` to find list
+elements.
+
+    python benchmarks/data_model.py
+"""
+from __future__ import print_function
+import re
+
+from common import measure, report, setup, us
+
+setup()
+
+from scormxblock.data_model import SCORM_2004_DATA_MODEL, count_list_entries  # noqa: E402
+from scormxblock.scorm_default import SCORM_2004_RUNTIME_DEFAULT  # noqa: E402
+
+INDEX_RE = re.compile(r'\.\d+(?=\.)')
+
+NAMES = {
+    'plain': 'cmi.completion_status',
+    'indexed': 'cmi.interactions.12.id',
+    'nested': 'cmi.interactions.12.correct_responses.3.pattern',
+    'unknown': 'cmi.unknown.element',
+}
+
+
+def dict_default(name):
+    return SCORM_2004_RUNTIME_DEFAULT.get(INDEX_RE.sub('.n', name), '')
+
+
+def main():
+    rows = []
+    number = 100000
+    for label, name in sorted(NAMES.items()):
+        rows.append((
+            label,
+            us(measure(lambda: SCORM_2004_RUNTIME_DEFAULT.get(name, ''), number=number)),
+            us(measure(lambda: dict_default(name), number=number)),
+            us(measure(lambda: SCORM_2004_DATA_MODEL.get_default(name), number=number)),
+            us(measure(lambda: SCORM_2004_DATA_MODEL.validate(name, 'value'), number=number)),
+        ))
+    report('per element', rows, ('element', 'dict', 'dict normalized', 'default', 'validate'))
+
+    names = ['cmi.interactions.{}.{}'.format(i, field) for i in range(500) for field in ('id', 'type', 'result')]
+    print('_count of 500 interactions from {} keys: {}'.format(
+        len(names), us(measure(lambda: count_list_entries(names), number=10))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of `parse_duration` over `--count` SCORM 1.2 timespans and SCORM
+2004 durations, as the time accumulation and the reports parse them.
+
+    python benchmarks/durations.py --count 2000000
+"""
+from __future__ import print_function
+import argparse
+import random
+import time
+
+from common import setup
+
+setup()
+
+from scormxblock.runtime_data import format_duration, format_timespan, parse_duration  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000000, help='number of durations')
+    args = parser.parse_args()
+
+    seconds = [random.uniform(0, 5 * 60 * 60) for _ in range(1000)]
+    samples = {
+        'timespan': [format_timespan(s) for s in seconds],
+        'duration': [format_duration(s) for s in seconds],
+        'invalid': ['{} minutes'.format(int(s)) for s in seconds],
+    }
+    for label, values in sorted(samples.items()):
+        values = (values * (args.count // len(values) + 1))[:args.count]
+        started = time.time()
+        total = sum(parse_duration(value) or 0 for value in values)
+        elapsed = time.time() - started
+        print('{:>8}: {} in {:.2f}s, {:.0f}/s, {:.0f} hours'.format(
+            label, args.count, elapsed, args.count / elapsed, total / 3600))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Request count and time of a typical SCORM 1.2 launch sequence, with one
+`scorm_get_value` request per element, one batched `scorm_get_values`
+request, the whole runtime snapshot prefetched at Initialize, or that
+snapshot embedded in the page by `student_view`.
+
+The handlers run through an in-memory runtime, from the request body to
+the json response. The server time is measured, the wall time adds `--rtt`
+per request, as the player calls are synchronous.
+
+    python benchmarks/get_values.py --rtt 80
+"""
+from __future__ import print_function
+import argparse
+
+from common import measure, ms, report, setup
+
+setup()
+
+from scormxblock.scorm_default import SCORM_VERSION  # noqa: E402
+from tests.tools import BlockRuntime  # noqa: E402
+
+LAUNCH_NAMES = [
+    'cmi.core._children', 'cmi.core.student_id', 'cmi.core.student_name', 'cmi.core.lesson_location',
+    'cmi.core.credit', 'cmi.core.lesson_status', 'cmi.core.entry', 'cmi.core.score._children',
+    'cmi.core.score.raw', 'cmi.core.score.max', 'cmi.core.score.min', 'cmi.core.total_time',
+    'cmi.core.lesson_mode', 'cmi.suspend_data', 'cmi.launch_data', 'cmi.comments',
+    'cmi.student_data.mastery_score', 'cmi.student_data.max_time_allowed',
+    'cmi.student_data.time_limit_action', 'cmi.interactions._count', 'cmi.objectives._count',
+    'cmi.student_preference.audio', 'cmi.student_preference.language', 'cmi.student_preference.speed',
+    'cmi.student_preference.text',
+]
+
+
+class CountingRuntime(BlockRuntime):
+
+    requests = 0
+
+    def call(self, handler_name, data):
+        self.requests += 1
+        return super(CountingRuntime, self).call(handler_name, data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rtt', type=float, default=50, help='round trip time of a request, in ms')
+    parser.add_argument('--suspend-data', type=int, default=4096, help='size of cmi.suspend_data')
+    parser.add_argument('--interactions', type=int, default=50, help='number of stored interactions')
+    args = parser.parse_args()
+
+    values = {
+        'cmi.core.lesson_status': 'incomplete',
+        'cmi.core.lesson_location': 'page-12',
+        'cmi.core.exit': 'suspend',
+        'cmi.suspend_data': 'x' * args.suspend_data,
+    }
+    for i in range(args.interactions):
+        values['cmi.interactions.{}.id'.format(i)] = 'question-{}'.format(i)
+        values['cmi.interactions.{}.result'.format(i)] = 'correct'
+    runtime = CountingRuntime()
+    runtime.commit(values)
+    request = {'package_version': SCORM_VERSION.V12, 'package_date': ''}
+
+    def single():
+        for name in LAUNCH_NAMES:
+            runtime.call('scorm_get_value', dict(request, name=name))
+
+    def batched():
+        runtime.call('scorm_get_values', dict(request, names=LAUNCH_NAMES))
+
+    def prefetch():
+        runtime.call('scorm_get_values', request)
+
+    def embedded():
+        runtime.block().student_view()
+
+    rtt = args.rtt / 1e3
+    rows = []
+    for mode, func in (('get_value', single), ('get_values', batched), ('prefetch', prefetch),
+                       ('embedded', embedded)):
+        runtime.requests = 0
+        func()
+        requests = runtime.requests
+        server = measure(func, number=20)
+        rows.append((mode, requests, ms(server), ms(server + requests * rtt)))
+    report('{} values at launch, {}ms round trip'.format(len(LAUNCH_NAMES), args.rtt),
+           rows, ('mode', 'requests', 'server', 'wall'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Time of a commit answering one more question, for several numbers of
+interactions already answered, with the lists kept in the block user state
+or in the `ModelInteractionStore`.
+
+In the user state every commit loads and writes back all the interactions,
+its time grows with their number. With the store a commit writes the
+entries it changes and its time stays flat. The store runs on an in-memory
+sqlite database, a database server adds its round trips.
+
+    python benchmarks/interaction_store.py --sizes 10,100,1000
+"""
+from __future__ import print_function
+import argparse
+import itertools
+
+from common import measure, report, setup, us
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from scormxblock import interactions  # noqa: E402
+from scormxblock.interactions import ModelInteractionStore  # noqa: E402
+from scormxblock.scorm_default import SCORM_VERSION  # noqa: E402
+from tests.tools import BlockRuntime  # noqa: E402
+
+
+def answer(index):
+    return {
+        'cmi.interactions.{}.id'.format(index): 'question-{}'.format(index),
+        'cmi.interactions.{}.type'.format(index): 'choice',
+        'cmi.interactions.{}.learner_response'.format(index): 'b',
+        'cmi.interactions.{}.result'.format(index): 'correct',
+    }
+
+
+def time_commits(size, store):
+    interactions._store = store
+    user = User.objects.create(username='learner-{}-{}'.format(size, store is not None))
+    runtime = BlockRuntime(user_id=user.id)
+    answered = {}
+    for i in range(size):
+        answered.update(answer(i))
+    runtime.commit(answered, version=SCORM_VERSION.V2004)
+    indexes = itertools.count(size)
+
+    def commit():
+        runtime.commit(answer(next(indexes)), version=SCORM_VERSION.V2004)
+
+    try:
+        return measure(commit, number=20)
+    finally:
+        interactions._store = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,100,1000', help='numbers of answered interactions, comma separated')
+    args = parser.parse_args()
+    call_command('migrate', verbosity=0)
+
+    rows = []
+    for size in [int(size) for size in args.sizes.split(',')]:
+        rows.append((size, us(time_commits(size, None)), us(time_commits(size, ModelInteractionStore()))))
+    report('commit of one more answer', rows, ('answered', 'user state', 'store'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Time of reading `_count` elements and of a commit starting a new nested
+list, for several numbers of stored interactions.
+
+The counts are stored on commit, reading them is a lookup and stays flat as
+the interactions grow. The legacy column reads the count of runtime data
+stored before the counts were maintained, counted from all its entries
+until the next commit stores them. The reads are timed on a block with its
+runtime data loaded, the commits go through `scorm_commit`, loading and
+saving the runtime data is linear in its size unless the interactions are
+kept in `SCORM_INTERACTION_STORE`.
+
+    python benchmarks/list_counts.py --sizes 100,1000,5000
+"""
+from __future__ import print_function
+import argparse
+import itertools
+
+from common import measure, report, setup, us
+
+setup()
+
+from scormxblock.scorm_default import SCORM_VERSION  # noqa: E402
+from tests.tools import BlockRuntime  # noqa: E402
+
+def make_interactions(count):
+    data = {}
+    for i in range(count):
+        data['cmi.interactions.{}.id'.format(i)] = 'question-{}'.format(i)
+        data['cmi.interactions.{}.result'.format(i)] = 'correct'
+        data['cmi.interactions.{}.objectives.0.id'.format(i)] = 'objective-{}'.format(i)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,1000,5000', help='numbers of interactions, comma separated')
+    args = parser.parse_args()
+
+    rows = []
+    for size in [int(size) for size in args.sizes.split(',')]:
+        interactions = make_interactions(size)
+        legacy = BlockRuntime().block()
+        legacy.scorm_runtime_data = interactions
+        runtime = BlockRuntime()
+        runtime.commit(interactions, version=SCORM_VERSION.V2004)
+        block = runtime.block()
+        seqs = itertools.count(1)
+
+        def read(block, name):
+            return lambda: block.get_runtime_value(name, SCORM_VERSION.V2004)
+
+        def commit_nested():
+            # a new objective list on an existing interaction
+            runtime.commit({'cmi.interactions.{}.objectives.0.id'.format(next(seqs) % size): 'x'},
+                           version=SCORM_VERSION.V2004)
+
+        rows.append((
+            size,
+            us(measure(read(legacy, 'cmi.interactions._count'), number=20)),
+            us(measure(read(block, 'cmi.interactions._count'), number=20)),
+            us(measure(read(block, 'cmi.interactions.{}.objectives._count'.format(size + 1)), number=20)),
+            us(measure(commit_nested, number=20)),
+        ))
+    report('_count reads and nested list commits', rows,
+           ('interactions', 'legacy read', 'stored read', 'unwritten read', 'nested commit'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of reading the structure of a large multi-SCO package: parsing its
+`imsmanifest.xml`, loading its stored index, or reading the cached index,
+as the runtime does.
+
+    python benchmarks/manifest_index.py --scos 1000
+"""
+from __future__ import print_function
+import argparse
+import io
+import json
+
+from common import measure, report, setup, us
+
+setup()
+
+from fs.memoryfs import MemoryFS  # noqa: E402
+
+from scormxblock.manifest import (  # noqa: E402
+    build_navigation, get_organization, load_manifest_index, manifest_cache, parse_manifest, save_manifest_index
+)
+
+MANIFEST = u'''<?xml version="1.0" encoding="UTF-8"?>
+<manifest identifier="course" xmlns="http://www.imsglobal.org/xsd/imscp_v1p1"
+          xmlns:adlcp="http://www.adlnet.org/xsd/adlcp_v1p3">
+  <metadata><schema>ADL SCORM</schema><schemaversion>2004 4th Edition</schemaversion></metadata>
+  <organizations default="org"><organization identifier="org"><title>Course</title>{items}</organization>
+  </organizations>
+  <resources>{resources}</resources>
+</manifest>
+'''
+
+
+def make_manifest(modules, scos):
+    items = []
+    resources = []
+    for m in range(modules):
+        children = []
+        for s in range(scos // modules):
+            identifier = 'sco-{}-{}'.format(m, s)
+            children.append(u'<item identifier="{0}" identifierref="r-{0}"><title>Part {1}</title></item>'.format(
+                identifier, s))
+            resources.append(
+                u'<resource identifier="r-{0}" type="webcontent" adlcp:scormType="sco" href="{0}/index.html">'
+                u'<file href="{0}/index.html"/><file href="{0}/media.mp4"/><dependency identifierref="common"/>'
+                u'</resource>'.format(identifier))
+        items.append(u'<item identifier="module-{}"><title>Module</title>{}</item>'.format(m, u''.join(children)))
+    resources.append(u'<resource identifier="common" type="webcontent" adlcp:scormType="asset"/>')
+    return MANIFEST.format(items=u''.join(items), resources=u''.join(resources)).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scos', type=int, default=500, help='number of SCOs of the package')
+    parser.add_argument('--modules', type=int, default=20, help='number of modules the SCOs are grouped in')
+    args = parser.parse_args()
+
+    manifest = make_manifest(args.modules, args.scos)
+    index = parse_manifest(io.BytesIO(manifest))
+    pkg_fs = MemoryFS()
+    save_manifest_index(pkg_fs, u'pkg', index)
+    stored = json.dumps(index)
+
+    def load_stored():
+        manifest_cache.clear()
+        load_manifest_index(pkg_fs, u'pkg')
+
+    rows = [
+        ('parse xml', us(measure(lambda: parse_manifest(io.BytesIO(manifest))))),
+        ('json index', us(measure(lambda: json.loads(stored), number=10))),
+        ('stored index', us(measure(load_stored, number=10))),
+        ('cached index', us(measure(lambda: load_manifest_index(pkg_fs, u'pkg'), number=1000))),
+        ('navigation', us(measure(lambda: build_navigation(get_organization(index)), number=10))),
+    ]
+    report('{} SCOs, manifest of {} bytes, index of {} bytes'.format(args.scos, len(manifest), len(stored)),
+           rows, ('read', 'time'))
+
+
+if __name__ == '__main__':
+    main()
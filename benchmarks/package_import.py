@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Time and peak memory of the streaming import of a synthetic package.
+
+The zip is written to a temporary file with `--files` entries of random
+(incompressible) content totalling `--size-mb` MB, then imported to a
+temporary directory. The peak RSS of the process stays around the chunk
+size times the upload concurrency, whatever the package size.
+
+    python benchmarks/package_import.py --size-mb 2048 --files 400
+"""
+from __future__ import print_function
+import argparse
+import os
+import resource
+import shutil
+import tempfile
+import time
+import zipfile
+
+from common import setup
+
+setup()
+
+from fs.osfs import OSFS  # noqa: E402
+
+from scormxblock.scorm_package import MANIFEST_NAME, open_package, store_package  # noqa: E402
+
+CHUNK = 1024 * 1024
+
+
+def peak_rss_mb():
+    # kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def write_package(path, size, files):
+    file_size = size // files
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+        zf.writestr(MANIFEST_NAME, '<manifest/>')
+        chunk = os.urandom(CHUNK)
+        for i in range(files):
+            name = 'media/video-{}.mp4'.format(i)
+            # ZipFile.write streams from a file, writestr would need the whole entry in memory
+            with tempfile.NamedTemporaryFile() as entry:
+                remaining = file_size
+                while remaining > 0:
+                    entry.write(chunk[:min(CHUNK, remaining)])
+                    remaining -= CHUNK
+                entry.flush()
+                zf.write(entry.name, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=512, help='total size of the files of the package')
+    parser.add_argument('--files', type=int, default=100, help='number of files of the package')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='scorm-import-')
+    try:
+        zip_path = os.path.join(workdir, 'package.zip')
+        write_package(zip_path, args.size_mb * 1024 * 1024, args.files)
+        target = os.path.join(workdir, 'storage')
+        os.mkdir(target)
+        before = peak_rss_mb()
+        started = time.time()
+        with open(zip_path, 'rb') as f:
+            pkg_id, _ = store_package(open_package(f), f, OSFS(target), progress=None)
+        elapsed = time.time() - started
+        print('imported {} MB in {} files to {} in {:.1f}s, {:.1f} MB/s'.format(
+            args.size_mb, args.files, pkg_id, elapsed, args.size_mb / elapsed))
+        print('peak RSS {:.0f} MB before the import, {:.0f} MB after'.format(before, peak_rss_mb()))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
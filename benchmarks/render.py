@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Time to render the `student_view` resources of a page of `--blocks`
+blocks, with the resources and compiled templates cached per process or
+loaded and compiled for each block.
+
+    python benchmarks/render.py --blocks 30
+"""
+from __future__ import print_function
+import argparse
+
+from common import measure, ms, report, setup
+
+setup()
+
+from scormxblock import resources  # noqa: E402
+
+CONTEXT = {
+    'display_name': 'Safety training', 'has_score_value': True, 'scorm_score_value': 0.8, 'weight_value': 1,
+    'graded_status': 'graded', 'scorm_status_value': 'SUCCEED', 'open_new_tab_value': False,
+    'scorm_pkg_value': '/scorm/3f2c/index.html',
+}
+
+
+def render_page(blocks):
+    for _ in range(blocks):
+        resources.render_template('static/html/scormxblock.html', CONTEXT)
+        resources.resource_string('static/css/scormxblock.css')
+        resources.resource_string('static/js/src/scormxblock.js')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, default=30, help='number of blocks of the page')
+    args = parser.parse_args()
+
+    rows = []
+    for cached in (False, True):
+        resources.SCORM_RESOURCE_CACHE = cached
+        rows.append(('cached' if cached else 'uncached', ms(measure(lambda: render_page(args.blocks), number=5))))
+    report('page of {} blocks'.format(args.blocks), rows, ('resources', 'time'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of the score computation of `scorm_rescore`, with NumPy when it
+is installed and in plain python, over `--learners` learners.
+
+    python benchmarks/rescore.py --learners 50000
+"""
+from __future__ import print_function
+import argparse
+import random
+
+from common import measure, report, setup
+
+setup()
+
+from scormxblock import scores  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--learners', type=int, default=50000, help='number of learners')
+    args = parser.parse_args()
+
+    nan = float('nan')
+    raw = [random.choice((nan, random.uniform(0, 100))) for _ in range(args.learners)]
+    maxi = [100.0] * args.learners
+    mini = [0.0] * args.learners
+    old = [random.random() for _ in range(args.learners)]
+
+    numpy = scores.np
+    rows = []
+    for label, np in (('python', None), ('numpy', numpy)):
+        if label == 'numpy' and numpy is None:
+            continue
+        scores.np = np
+        seconds = measure(lambda: scores.compute_scores(raw, maxi, mini, old))
+        rows.append((label, '{:.1f}ms'.format(seconds * 1e3), '{:.0f}'.format(args.learners / seconds)))
+    scores.np = numpy
+    report('{} learners'.format(args.learners), rows, ('scores', 'time', 'learners/s'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Size and encoding time of the runtime data of a learner with `--interactions`
+interactions, stored as is or in the compact format, compressed or not.
+
+    python benchmarks/runtime_data.py --interactions 500
+"""
+from __future__ import print_function
+import argparse
+import json
+
+from common import measure, report, setup, us
+
+setup()
+
+from scormxblock.runtime_data import decode_runtime_data, encode_runtime_data  # noqa: E402
+
+
+def make_runtime_data(interactions, objectives):
+    data = {
+        'cmi.core.lesson_status': 'incomplete',
+        'cmi.core.lesson_location': 'page-12',
+        'cmi.suspend_data': 'A1B2C3' * 300,
+        'cmi.interactions._count': interactions,
+        'cmi.objectives._count': objectives,
+    }
+    for i in range(interactions):
+        prefix = 'cmi.interactions.{}.'.format(i)
+        data[prefix + 'id'] = 'urn:course:question-{}'.format(i)
+        data[prefix + 'type'] = 'choice'
+        data[prefix + 'time'] = '10:{:02d}:00'.format(i % 60)
+        data[prefix + 'student_response'] = 'b'
+        data[prefix + 'result'] = 'correct' if i % 3 else 'wrong'
+        data[prefix + 'latency'] = '0000:00:{:02d}'.format(i % 60)
+        data[prefix + 'correct_responses.0.pattern'] = 'b'
+        data[prefix + 'objectives.0.id'] = 'objective-{}'.format(i % objectives)
+    for i in range(objectives):
+        data['cmi.objectives.{}.id'.format(i)] = 'objective-{}'.format(i)
+        data['cmi.objectives.{}.status'.format(i)] = 'passed'
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interactions', type=int, default=200, help='number of interactions')
+    parser.add_argument('--objectives', type=int, default=20, help='number of objectives')
+    args = parser.parse_args()
+
+    data = make_runtime_data(args.interactions, args.objectives)
+    payload = json.dumps(data)
+    rows = [('plain', len(payload), us(measure(lambda: json.dumps(data), number=10)),
+             us(measure(lambda: json.loads(payload), number=10)))]
+    for label, compress_min_size in (('compact', None), ('compressed', 0)):
+        payload = json.dumps(encode_runtime_data(data, compress_min_size))
+        rows.append((label, len(payload),
+                     us(measure(lambda: json.dumps(encode_runtime_data(data, compress_min_size)), number=10)),
+                     us(measure(lambda: decode_runtime_data(json.loads(payload)), number=10))))
+    report('{} keys'.format(len(data)), rows, ('format', 'bytes', 'serialize', 'deserialize'))
+
+
+if __name__ == '__main__':
+    main()
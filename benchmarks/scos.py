@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Time of a `scorm_get_value` request on one SCO of a multi-SCO package, for
+several numbers of other SCOs with stored runtime data.
+
+The runtime data of each SCO is stored as a json string decoded only when
+its SCO is active, so the request decodes one SCO whatever their number.
+The request goes through the handler in an in-memory runtime.
+
+    python benchmarks/scos.py --scos 1,10,50 --interactions 100
+"""
+from __future__ import print_function
+import argparse
+import json
+
+from common import measure, report, setup, us
+
+setup()
+
+
+from scormxblock.scorm_default import SCORM_VERSION  # noqa: E402
+from tests.test_manifest import SCORM_2004_MANIFEST  # noqa: E402
+from tests.tools import BlockRuntime  # noqa: E402
+
+REQUEST = {'package_version': SCORM_VERSION.V2004, 'package_date': '', 'sco': 'sco2'}
+
+
+def make_runtime_data(interactions):
+    data = {'cmi.location': 'page-1', 'cmi.suspend_data': 'x' * 1024}
+    for i in range(interactions):
+        data['cmi.interactions.{}.id'.format(i)] = 'question-{}'.format(i)
+        data['cmi.interactions.{}.result'.format(i)] = 'correct'
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scos', default='1,10,50', help='numbers of other SCOs, comma separated')
+    parser.add_argument('--interactions', type=int, default=100, help='number of interactions of each SCO')
+    args = parser.parse_args()
+
+    stored = json.dumps(make_runtime_data(args.interactions))
+    rows = []
+    for count in [int(count) for count in args.scos.split(',')]:
+        runtime = BlockRuntime()
+        runtime.install_package(SCORM_2004_MANIFEST)
+        runtime.commit(make_runtime_data(args.interactions), version=SCORM_VERSION.V2004, sco='sco2')
+        block = runtime.block()
+        for i in range(count):
+            block.scorm_sco_runtime_data['sco-{}'.format(i)] = stored
+        block.save()
+
+        def get_value():
+            runtime.call('scorm_get_value', dict(REQUEST, name='cmi.location'))
+
+        rows.append((count, us(measure(get_value, number=20))))
+    report('scorm_get_value of a SCO of {} interactions'.format(args.interactions), rows, ('other scos', 'time'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Aggregated results of the learners of each block, for the dashboards.
+
+Each learner that attended a block contributes its status, score and time
+to the counters of the block, kept by the store `SCORM_AGGREGATES_STORE`
+names. The `scorm_status_changed` signal carries the previous and new
+contribution of a learner, so counters are updated incrementally and the
+aggregate of a block is read at once whatever its number of learners.
+`scorm_rebuild_aggregates` recomputes the counters from the learner states.
+"""
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.dispatch import Signal, receiver
+from django.utils.module_loading import import_string
+
+from .runtime_data import decode_runtime_data, parse_duration
+from .scorm_default import SCORM_STATUS
+
+# dotted path of the `AggregateStore` class
+SCORM_AGGREGATES_STORE = getattr(settings, 'SCORM_AGGREGATES_STORE', 'scormxblock.aggregates.CacheAggregateStore')
+SCORM_AGGREGATES_CACHE = getattr(settings, 'SCORM_AGGREGATES_CACHE', 'default')
+# counters never expire by default
+SCORM_AGGREGATES_TIMEOUT = getattr(settings, 'SCORM_AGGREGATES_TIMEOUT', None)
+
+HISTOGRAM_BUCKETS = 10
+STATUSES = (SCORM_STATUS.SUCCEED, SCORM_STATUS.FAILED, SCORM_STATUS.IN_PROGRESS)
+
+# sent with the `previous` and `current` contribution of a learner to block
+# `block_key`, None when the learner does not contribute
+scorm_status_changed = Signal(providing_args=['block_key', 'previous', 'current'])
+
+
+def get_contribution(status, score, time=None):
+    """Contribution of a learner to the aggregate of a block."""
+    if status == SCORM_STATUS.UNATTENDED:
+        return None
+    return {'status': status, 'score': score, 'time': time}
+
+
+def get_runtime_total_time(runtime_data):
+    """Total time in seconds `runtime_data` holds, for learners whose time was not accumulated yet."""
+    return parse_duration(runtime_data.get('cmi.core.total_time', runtime_data.get('cmi.total_time')))
+
+
+def get_state_contribution(state):
+    """
+    Contribution of learner state `state` to the aggregate of its block, as
+    `ScormXBlock.get_aggregated` reads it.
+    """
+    if state.get('scorm_aggregated'):
+        return state['scorm_aggregated']
+    total_time = state.get('scorm_total_time')
+    if not total_time:
+        total_time = get_runtime_total_time(decode_runtime_data(state.get('_scorm_runtime_data') or {}))
+    return get_contribution(state.get('scorm_status', SCORM_STATUS.UNATTENDED),
+                            state.get('scorm_score', 0.0), total_time)
+
+
+def status_counter(status):
+    # memcached keys have no spaces
+    return 'status.{}'.format(status.replace(' ', '_'))
+
+
+def score_bucket(score):
+    return max(0, min(int(score * HISTOGRAM_BUCKETS), HISTOGRAM_BUCKETS - 1))
+
+
+def get_counters(contribution):
+    """Counters a contribution adds to, with their increments."""
+    if not contribution:
+        return Counter()
+    counters = Counter({
+        'learners': 1,
+        status_counter(contribution['status']): 1,
+        'histogram.{}'.format(score_bucket(contribution['score'])): 1,
+    })
+    if contribution.get('time'):
+        counters['time.total'] = int(round(contribution['time']))
+        counters['time.count'] = 1
+    return counters
+
+
+def counter_names():
+    return (['learners', 'time.total', 'time.count'] +
+            [status_counter(status) for status in STATUSES] +
+            ['histogram.{}'.format(i) for i in range(HISTOGRAM_BUCKETS)])
+
+
+_store = None
+
+
+def get_aggregate_store():
+    """The configured store of the counters."""
+    global _store
+    if _store is None:
+        _store = import_string(SCORM_AGGREGATES_STORE)()
+    return _store
+
+
+class AggregateStore(object):
+    """Counters of the blocks, by block key and counter name."""
+
+    def update(self, block_key, deltas):
+        """Add `deltas`, `{name: delta}`, to the counters of `block_key`."""
+        raise NotImplementedError
+
+    def set(self, block_key, totals):
+        """Replace all the counters of `block_key` with `totals`, missing ones are 0."""
+        raise NotImplementedError
+
+    def get(self, block_key):
+        """
+        `(counters, complete)` of `block_key`, `complete` is False when
+        counters may have been lost since the last rebuild.
+        """
+        raise NotImplementedError
+
+
+class CacheAggregateStore(AggregateStore):
+    """
+    Counters kept in the django cache `SCORM_AGGREGATES_CACHE`. The cache is
+    not durable: a rebuild stores every counter of a block along with a
+    marker, a counter found missing afterwards was evicted and the marker is
+    dropped, the counters are incomplete until the next rebuild.
+    """
+
+    @staticmethod
+    def _cache_key(block_key, name):
+        block_hash = hashlib.sha1(block_key.encode('utf-8')).hexdigest()
+        return 'scormxblock.aggregates.{}.{}'.format(block_hash, name)
+
+    def update(self, block_key, deltas):
+        cache = caches[SCORM_AGGREGATES_CACHE]
+        evicted = False
+        for name, delta in deltas.iteritems():
+            key = self._cache_key(block_key, name)
+            if cache.add(key, delta, SCORM_AGGREGATES_TIMEOUT):
+                evicted = True
+                continue
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                # evicted in between
+                cache.add(key, delta, SCORM_AGGREGATES_TIMEOUT)
+                evicted = True
+        if evicted:
+            cache.delete(self._cache_key(block_key, 'complete'))
+
+    def set(self, block_key, totals):
+        values = {self._cache_key(block_key, name): totals.get(name, 0) for name in counter_names()}
+        values[self._cache_key(block_key, 'complete')] = True
+        caches[SCORM_AGGREGATES_CACHE].set_many(values, SCORM_AGGREGATES_TIMEOUT)
+
+    def get(self, block_key):
+        names = counter_names() + ['complete']
+        values = caches[SCORM_AGGREGATES_CACHE].get_many([self._cache_key(block_key, name) for name in names])
+        counters = {name: values.get(self._cache_key(block_key, name), 0) for name in names}
+        return counters, bool(counters.pop('complete'))
+
+
+class ModelAggregateStore(AggregateStore):
+    """
+    Counters stored as `ScormAggregateCounter` rows, incremented in the
+    database so concurrent updates add up. `scormxblock` has to be an
+    installed app.
+    """
+
+    @staticmethod
+    def _model():
+        from .models import ScormAggregateCounter
+        return ScormAggregateCounter
+
+    def update(self, block_key, deltas):
+        counters = self._model().objects.filter(block_key=block_key)
+        for name, delta in deltas.iteritems():
+            if counters.filter(name=name).update(value=F('value') + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    counters.create(block_key=block_key, name=name, value=delta)
+            except IntegrityError:
+                # created by a concurrent update since
+                counters.filter(name=name).update(value=F('value') + delta)
+
+    def set(self, block_key, totals):
+        model = self._model()
+        with transaction.atomic():
+            model.objects.filter(block_key=block_key).delete()
+            model.objects.bulk_create([model(block_key=block_key, name=name, value=totals.get(name, 0))
+                                       for name in counter_names()])
+
+    def get(self, block_key):
+        counters = dict.fromkeys(counter_names(), 0)
+        counters.update(self._model().objects.filter(block_key=block_key).values_list('name', 'value'))
+        return counters, True
+
+
+def update_aggregates(block_key, previous, current):
+    deltas = get_counters(current)
+    deltas.subtract(get_counters(previous))
+    deltas = {name: delta for name, delta in deltas.iteritems() if delta}
+    if deltas:
+        get_aggregate_store().update(block_key, deltas)
+
+
+@receiver(scorm_status_changed)
+def on_scorm_status_changed(sender, block_key, previous, current, **kwargs):
+    update_aggregates(block_key, previous, current)
+
+
+def set_counters(block_key, totals):
+    """Replace the counters of `block_key`, with the sums of `get_counters`."""
+    get_aggregate_store().set(block_key, totals)
+
+
+def get_aggregates(block_key):
+    """
+    Aggregated results of `block_key`. `complete` is False when counters
+    were lost since the last `scorm_rebuild_aggregates`.
+    """
+    counters, complete = get_aggregate_store().get(block_key)
+    return {
+        'learners': counters['learners'],
+        'statuses': {status: counters[status_counter(status)] for status in STATUSES},
+        'histogram': [counters['histogram.{}'.format(i)] for i in range(HISTOGRAM_BUCKETS)],
+        'mean_time': counters['time.total'] / float(counters['time.count']) if counters['time.count'] else None,
+        'complete': complete,
+    }
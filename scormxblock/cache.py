@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import log_stats, register
+
+
+_MISSING = object()
+
+
+@contextmanager
+def cache_lock(key, timeout, wait, backend='default', poll=0.01):
+    """
+    Lock `key` between processes with a key added to django cache `backend`
+    for at most `timeout` seconds. Yield whether it was taken within `wait`
+    seconds, polling every `poll` seconds.
+    """
+    cache = caches[backend]
+    lock_key = 'scormxblock.lock.{}'.format(key)
+    deadline = time.time() + wait
+    while not cache.add(lock_key, 1, timeout):
+        if time.time() >= deadline:
+            yield False
+            return
+        time.sleep(poll)
+    try:
+        yield True
+    finally:
+        cache.delete(lock_key)
+
+
+class TTLCache(object):
+    """
+    Small per-process LRU cache whose entries expire after `ttl` seconds.
+
+    When `backend` names a django cache alias, local misses fall back to it,
+    so the entries are shared between processes.
+    `hits` and `misses` count local and backend lookups, for monitoring,
+    see `metrics.register`.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=300, backend=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _backend_key(self, key):
+        return 'scormxblock.{}.{}'.format(self.name, key)
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            value, expire_at = self._data.pop(key, (_MISSING, 0))
+            if value is not _MISSING and expire_at > now:
+                self._data[key] = (value, expire_at)
+                self.hits += 1
+            else:
+                value = _MISSING
+        if value is not _MISSING:
+            log_stats()
+            return value
+
+        if self.backend:
+            value = caches[self.backend].get(self._backend_key(key), _MISSING)
+            if value is not _MISSING:
+                self._set_local(key, value)
+                with self._lock:
+                    self.hits += 1
+                log_stats()
+                return value
+
+        with self._lock:
+            self.misses += 1
+        log_stats()
+        return default
+
+    def set(self, key, value, ttl=None):
+        """Cache `value` for `ttl` seconds, the ttl of the cache by default."""
+        ttl = self.ttl if ttl is None else ttl
+        self._set_local(key, value, ttl)
+        if self.backend:
+            caches[self.backend].set(self._backend_key(key), value, ttl)
+
+    def _set_local(self, key, value, ttl=None):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, time.time() + (self.ttl if ttl is None else ttl))
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        if self.backend:
+            caches[self.backend].delete(self._backend_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / float(lookups) if lookups else 0.0,
+            }
+
+
+learner_cache = register(TTLCache(
+    'learner',
+    maxsize=getattr(settings, 'SCORM_LEARNER_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'SCORM_LEARNER_CACHE_TTL', 600),
+    backend=getattr(settings, 'SCORM_LEARNER_CACHE_BACKEND', None),
+))
+
+# resolved urls of package files, by storage and path. Package paths change
+# on every upload, so entries only have to expire before the urls do: keep
+# the ttl below the lifetime of signed urls when the storage signs them
+# (s3fs urls are reduced to their path, which does not expire).
+url_cache = register(TTLCache(
+    'url',
+    maxsize=getattr(settings, 'SCORM_URL_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'SCORM_URL_CACHE_TTL', 3600),
+    backend=getattr(settings, 'SCORM_URL_CACHE_BACKEND', None),
+))
+
+
+class RuntimeWriteBuffer(object):
+    """
+    Holds runtime commits of a learner in a django cache, so the periodic
+    commits of the player are merged and written to the block fields once per
+    `interval` seconds instead of on every request.
+
+    Buffering is disabled when `interval` is 0. The cache is not durable,
+    only commits that can be lost without harm (the player polling) should be
+    buffered. A buffer is merged into under its lock, a cache key added for
+    at most `lock_timeout` seconds, so concurrent commits do not overwrite
+    each other's values.
+    `buffered` counts the commits kept in the buffer, `flushed` the buffers
+    written back, for monitoring.
+    """
+
+    def __init__(self, interval=0, backend='default', timeout=24 * 60 * 60, lock_timeout=10, lock_wait=1,
+                 name='buffer'):
+        self.name = name
+        self.interval = interval
+        self.backend = backend
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.buffered = 0
+        self.flushed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def _cache_key(self, key):
+        return 'scormxblock.buffer.{}'.format(key)
+
+    def get(self, key):
+        return caches[self.backend].get(self._cache_key(key))
+
+    def locked(self, key):
+        """
+        Hold the lock of the buffer of `key` around reading, merging and
+        writing it back. Yield whether it was taken within `lock_wait`
+        seconds, the caller has to write its commit through otherwise.
+        """
+        return cache_lock(self._cache_key(key), self.lock_timeout, self.lock_wait, self.backend)
+
+    def peek(self, key):
+        """Buffered runtime data of `key`, empty when nothing is buffered."""
+        if not self.enabled:
+            return {}
+        entry = self.get(key)
+        return entry['data'] if entry else {}
+
+    def create(self):
+        return {'data': {}, 'created': time.time()}
+
+    def is_due(self, entry):
+        return time.time() - entry['created'] >= self.interval
+
+    def set(self, key, entry):
+        caches[self.backend].set(self._cache_key(key), entry, self.timeout)
+        with self._lock:
+            self.buffered += 1
+
+    def delete(self, key):
+        caches[self.backend].delete(self._cache_key(key))
+        with self._lock:
+            self.flushed += 1
+
+    def pop(self, key):
+        """Remove the buffer of `key` and return its entry, None when nothing is buffered."""
+        entry = self.get(key)
+        if entry is not None:
+            self.delete(key)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return {'buffered': self.buffered, 'flushed': self.flushed}
+
+
+runtime_buffer = register(RuntimeWriteBuffer(
+    interval=getattr(settings, 'SCORM_COMMIT_FLUSH_INTERVAL', 0),
+    backend=getattr(settings, 'SCORM_COMMIT_BUFFER_BACKEND', 'default'),
+))
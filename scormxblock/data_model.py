@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled SCORM data models.
+
+The runtime defaults of `scorm_default` are keyed by element patterns where
+`n` stands for a list index (`cmi.interactions.n.id`). They are compiled once
+into a trie of path segments where any index follows the `n` edge, so the
+default, access and value type of an element such as `cmi.interactions.3.id`
+are resolved by walking its segments, whatever the size of the model.
+"""
+import re
+
+from django.conf import settings
+
+from .runtime_data import parse_duration
+from .scorm_default import SCORM_12_RUNTIME_DEFAULT, SCORM_2004_RUNTIME_DEFAULT, SCORM_VERSION
+
+# drop the committed values of read only elements, and the invalid values of
+# the elements of the data model, elements out of the data model are kept
+SCORM_VALIDATE_RUNTIME_DATA = getattr(settings, 'SCORM_VALIDATE_RUNTIME_DATA', True)
+
+INDEX = 'n'
+
+_LIST_INDEX_RE = re.compile(r'\.(\d+)(?=\.)')
+
+
+def vocabulary(*values):
+    return lambda value: value in values
+
+
+def real(low=None, high=None, blank=False):
+    def check(value):
+        if blank and value == '':
+            return True
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return False
+        return number == number and (low is None or number >= low) and (high is None or number <= high)
+    return check
+
+
+def integer(low, high):
+    def check(value):
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return False
+        return low <= number <= high
+    return check
+
+
+def any_of(*checks):
+    return lambda value: any(check(value) for check in checks)
+
+
+def duration(value):
+    return parse_duration(value) is not None
+
+
+def count_list_entries(names):
+    """
+    `_count` elements of the lists element `names` are entries of, from
+    their highest index: `cmi.interactions.3.id` makes 4 interactions.
+    """
+    counts = {}
+    for name in names:
+        if not name.startswith('cmi.'):
+            continue
+        for match in _LIST_INDEX_RE.finditer(name):
+            count_name = name[:match.start()] + '._count'
+            counts[count_name] = max(counts.get(count_name, 0), int(match.group(1)) + 1)
+    return counts
+
+
+class Element(object):
+    """Node of the data model trie, `defined` when it is an element itself."""
+    __slots__ = ('children', 'defined', 'default', 'readable', 'writable', 'check')
+
+    def __init__(self):
+        self.children = {}
+        self.defined = False
+        self.default = ''
+        self.readable = True
+        self.writable = True
+        self.check = None
+
+
+class DataModel(object):
+    """
+    Data model of a SCORM version compiled from its `defaults` table, with
+    the patterns of its `read_only` and `write_only` elements and the value
+    `checks` of its writable ones. `_children`, `_count` and `_version` are
+    always read only.
+    """
+
+    def __init__(self, defaults, read_only=(), write_only=(), checks=None):
+        self.defaults = defaults
+        self.root = Element()
+        # elements by pattern, most names are not indexed and skip the walk
+        self.elements = {}
+        for pattern, default in defaults.iteritems():
+            self._add(pattern).default = default
+        for pattern in read_only:
+            self._add(pattern).writable = False
+        for pattern in write_only:
+            self._add(pattern).readable = False
+        for pattern, check in (checks or {}).iteritems():
+            self._add(pattern).check = check
+
+    def _add(self, pattern):
+        node = self.root
+        for segment in pattern.split('.'):
+            node = node.children.setdefault(segment, Element())
+        node.defined = True
+        self.elements[pattern] = node
+        if segment.startswith('_'):
+            node.writable = False
+        return node
+
+    def lookup(self, name):
+        """Element of `name`, None when it is not in the data model."""
+        element = self.elements.get(name)
+        if element is not None:
+            return element
+        node = self.root
+        for segment in name.split('.'):
+            child = node.children.get(segment)
+            if child is None:
+                if not segment.isdigit():
+                    return None
+                child = node.children.get(INDEX)
+                if child is None:
+                    return None
+            node = child
+        return node if node.defined else None
+
+    def get_default(self, name, default=''):
+        element = self.lookup(name)
+        return element.default if element is not None else default
+
+    def is_readable(self, name):
+        """Whether `name` can be read back, elements out of the data model can."""
+        element = self.lookup(name)
+        return element is None or element.readable
+
+    def validate(self, name, value):
+        """
+        Why committing `value` to `name` is refused, None when it is
+        accepted. Elements out of the data model are accepted.
+        """
+        element = self.lookup(name)
+        if element is None:
+            return None
+        if not element.writable:
+            return 'read only'
+        if element.check is not None and not element.check(value):
+            return 'invalid value'
+        return None
+
+
+_SCORM_12_STATUS = vocabulary('passed', 'completed', 'failed', 'incomplete', 'browsed', 'not attempted')
+
+SCORM_12_DATA_MODEL = DataModel(
+    SCORM_12_RUNTIME_DEFAULT,
+    read_only=(
+        'cmi.core.student_id', 'cmi.core.student_name', 'cmi.core.credit', 'cmi.core.entry',
+        'cmi.core.total_time', 'cmi.core.lesson_mode', 'cmi.core.score_children', 'cmi.launch_data',
+        'cmi.comments_from_lms', 'cmi.student_data.mastery_score', 'cmi.student_data.max_time_allowed',
+        'cmi.student_data.time_limit_action',
+    ),
+    write_only=(
+        'cmi.core.exit', 'cmi.core.session_time',
+        'cmi.interactions.n.id', 'cmi.interactions.n.objectives.n.id', 'cmi.interactions.n.time',
+        'cmi.interactions.n.type', 'cmi.interactions.n.correct_responses.n.pattern',
+        'cmi.interactions.n.weighting', 'cmi.interactions.n.student_response', 'cmi.interactions.n.result',
+        'cmi.interactions.n.latency',
+    ),
+    checks={
+        'cmi.core.lesson_status': _SCORM_12_STATUS,
+        'cmi.core.exit': vocabulary('time-out', 'suspend', 'logout', ''),
+        'cmi.core.score.raw': real(blank=True),
+        'cmi.core.score.max': real(blank=True),
+        'cmi.core.score.min': real(blank=True),
+        'cmi.core.session_time': duration,
+        'cmi.objectives.n.status': _SCORM_12_STATUS,
+        'cmi.objectives.n.score.raw': real(blank=True),
+        'cmi.objectives.n.score.max': real(blank=True),
+        'cmi.objectives.n.score.min': real(blank=True),
+        'cmi.interactions.n.type': vocabulary(
+            'true-false', 'choice', 'fill-in', 'matching', 'performance', 'sequencing', 'likert', 'numeric'),
+        'cmi.interactions.n.result': any_of(vocabulary('correct', 'wrong', 'unanticipated', 'neutral'), real()),
+        'cmi.interactions.n.weighting': real(),
+        'cmi.interactions.n.latency': duration,
+        'cmi.student_preference.audio': integer(-1, 100),
+        'cmi.student_preference.speed': integer(-100, 100),
+        'cmi.student_preference.text': integer(-1, 1),
+    },
+)
+
+_SCORM_2004_SUCCESS = vocabulary('passed', 'failed', 'unknown')
+_SCORM_2004_COMPLETION = vocabulary('completed', 'incomplete', 'not attempted', 'unknown')
+
+SCORM_2004_DATA_MODEL = DataModel(
+    SCORM_2004_RUNTIME_DEFAULT,
+    read_only=(
+        'cmi.completion_threshold', 'cmi.credit', 'cmi.entry', 'cmi.launch_data', 'cmi.learner_id',
+        'cmi.learner_name', 'cmi.max_time_allowed', 'cmi.mode', 'cmi.scaled_passing_score',
+        'cmi.time_limit_action', 'cmi.total_time',
+        'cmi.comments_from_lms.n.comment', 'cmi.comments_from_lms.n.location', 'cmi.comments_from_lms.n.timestamp',
+    ),
+    write_only=('cmi.exit', 'cmi.session_time'),
+    checks={
+        'cmi.completion_status': _SCORM_2004_COMPLETION,
+        'cmi.success_status': _SCORM_2004_SUCCESS,
+        'cmi.exit': vocabulary('time-out', 'suspend', 'logout', 'normal', ''),
+        'cmi.score.scaled': real(-1, 1),
+        'cmi.score.raw': real(),
+        'cmi.score.max': real(),
+        'cmi.score.min': real(),
+        'cmi.progress_measure': real(0, 1),
+        'cmi.session_time': duration,
+        'cmi.objectives.n.success_status': _SCORM_2004_SUCCESS,
+        'cmi.objectives.n.completion_status': _SCORM_2004_COMPLETION,
+        'cmi.objectives.n.score.scaled': real(-1, 1),
+        'cmi.objectives.n.score.raw': real(),
+        'cmi.objectives.n.score.max': real(),
+        'cmi.objectives.n.score.min': real(),
+        'cmi.objectives.n.progress_measure': real(0, 1),
+        'cmi.interactions.n.type': vocabulary(
+            'true-false', 'choice', 'fill-in', 'long-fill-in', 'matching', 'performance', 'sequencing',
+            'likert', 'numeric', 'other'),
+        'cmi.interactions.n.result': any_of(vocabulary('correct', 'incorrect', 'unanticipated', 'neutral'), real()),
+        'cmi.interactions.n.weighting': real(),
+        'cmi.interactions.n.latency': duration,
+        'cmi.learner_preference.audio_level': real(0),
+        'cmi.learner_preference.delivery_speed': real(0),
+        'cmi.learner_preference.audio_captioning': vocabulary('-1', '0', '1', -1, 0, 1),
+    },
+)
+
+DATA_MODELS = {
+    SCORM_VERSION.V12: SCORM_12_DATA_MODEL,
+    SCORM_VERSION.V2004: SCORM_2004_DATA_MODEL,
+}
+
+
+def get_data_model(package_version):
+    """Data model of `package_version`, None for unknown versions."""
+    return DATA_MODELS.get(package_version)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Stores of the interactions and objectives of the learners.
+
+The `cmi.interactions.n.*` and `cmi.objectives.n.*` elements grow with
+every question answered. With a store configured by
+`SCORM_INTERACTION_STORE` they are kept out of the block user state, entry
+by entry, so a commit only writes the entries it changes and the user state
+holds the scalar elements only.
+"""
+import json
+import re
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils.module_loading import import_string
+
+# dotted path of the `InteractionStore` class, lists stay in the user state when empty
+SCORM_INTERACTION_STORE = getattr(settings, 'SCORM_INTERACTION_STORE', None)
+
+LIST_ELEMENTS = ('cmi.interactions', 'cmi.objectives')
+
+_LIST_KEY_RE = re.compile(r'^(cmi\.(?:interactions|objectives))\.(\d+)\.(.+)$')
+
+_store = None
+
+
+def split_list_key(name):
+    """
+    `(element, index, field)` of list element `name`:
+    `cmi.interactions.3.result` is `('cmi.interactions', 3, 'result')`.
+    None for other elements.
+    """
+    match = _LIST_KEY_RE.match(name)
+    if match is None:
+        return None
+    return match.group(1), int(match.group(2)), match.group(3)
+
+
+def get_interaction_store():
+    """The configured store, None when the lists stay in the user state."""
+    global _store
+    if _store is None and SCORM_INTERACTION_STORE:
+        _store = import_string(SCORM_INTERACTION_STORE)()
+    return _store
+
+
+class InteractionStore(object):
+    """
+    Entries of the interactions and objectives lists, identified by user,
+    block, SCO, list element and index. An entry is the dict of its fields.
+    """
+
+    def save(self, user_id, block_key, sco, entries):
+        """
+        Merge `entries`, `{(element, index): fields}`, into the stored ones.
+        """
+        raise NotImplementedError
+
+    def get(self, user_id, block_key, sco, element, index):
+        """Fields of an entry, None when not stored."""
+        raise NotImplementedError
+
+    def counts(self, user_id, block_key, sco):
+        """Number of entries of each list element."""
+        raise NotImplementedError
+
+    def clear(self, user_id, block_key):
+        """Drop the entries of all the SCOs of a block."""
+        raise NotImplementedError
+
+
+class ModelInteractionStore(InteractionStore):
+    """Entries stored as `ScormListEntry` rows, `scormxblock` has to be an installed app."""
+
+    @staticmethod
+    def _model():
+        from .models import ScormListEntry
+        return ScormListEntry
+
+    def _entries(self, user_id, block_key, sco):
+        return self._model().objects.filter(user_id=user_id, block_key=block_key, sco=sco)
+
+    def save(self, user_id, block_key, sco, entries):
+        try:
+            self._save(user_id, block_key, sco, entries)
+        except IntegrityError:
+            # entries created by a concurrent commit since they were read,
+            # they are locked and updated this time
+            self._save(user_id, block_key, sco, entries)
+
+    def _save(self, user_id, block_key, sco, entries):
+        model = self._model()
+        with transaction.atomic():
+            stored = {
+                (row.element, row.index): row for row in self._entries(user_id, block_key, sco).select_for_update().filter(
+                    element__in=set(element for element, _ in entries),
+                    index__in=set(index for _, index in entries),
+                )
+            }
+            created = []
+            for key, fields in entries.iteritems():
+                row = stored.get(key)
+                if row is None:
+                    created.append(model(user_id=user_id, block_key=block_key, sco=sco,
+                                         element=key[0], index=key[1], data=json.dumps(fields)))
+                    continue
+                data = json.loads(row.data)
+                data.update(fields)
+                row.data = json.dumps(data)
+                row.save(update_fields=['data', 'modified'])
+            if created:
+                model.objects.bulk_create(created)
+
+    def get(self, user_id, block_key, sco, element, index):
+        data = self._entries(user_id, block_key, sco).filter(
+            element=element, index=index).values_list('data', flat=True).first()
+        return json.loads(data) if data is not None else None
+
+    def counts(self, user_id, block_key, sco):
+        rows = self._entries(user_id, block_key, sco).values('element').annotate(last=Max('index'))
+        return {row['element']: row['last'] + 1 for row in rows}
+
+    def clear(self, user_id, block_key):
+        self._model().objects.filter(user_id=user_id, block_key=block_key).delete()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Background import of SCORM packages.
+
+The Studio handler stores the uploaded zip next to the packages and submits
+an import job to an executor, the job state (progress, result or error) is
+kept in a django cache so any Studio process can report it. The `on_done`
+callback of a job switches the block to the imported package once it is
+stored.
+
+The arguments of the jobs are picklable: the packages are found by the
+django-pyfs namespace of their storage, and `on_done` is a dotted path.
+The filesystems of the blocks have no namespace, without
+`SCORM_SHARED_STORAGE` the jobs only run in the Studio process.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from .manifest import parse_manifest, save_manifest_index
+from .scorm_package import MANIFEST_NAME, get_shared_fs, open_package, store_package
+
+logger = logging.getLogger(__name__)
+
+SCORM_IMPORT_ASYNC = getattr(settings, 'SCORM_IMPORT_ASYNC', False)
+# 'sync', 'thread' or the dotted path of a `executor(func, *args)` callable
+SCORM_IMPORT_EXECUTOR = getattr(settings, 'SCORM_IMPORT_EXECUTOR', 'thread')
+SCORM_IMPORT_WORKERS = getattr(settings, 'SCORM_IMPORT_WORKERS', 2)
+SCORM_IMPORT_CACHE = getattr(settings, 'SCORM_IMPORT_CACHE', 'default')
+SCORM_IMPORT_JOB_TIMEOUT = 24 * 60 * 60
+
+JOB_STATE_PENDING = 'pending'
+JOB_STATE_RUNNING = 'running'
+JOB_STATE_DONE = 'done'
+JOB_STATE_FAILED = 'failed'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# filesystems of the blocks without shared storage, by job id, for the jobs
+# run in the Studio process
+_block_filesystems = {}
+
+
+def _job_key(job_id):
+    return 'scormxblock.import.{}'.format(job_id)
+
+
+def get_job(job_id):
+    return caches[SCORM_IMPORT_CACHE].get(_job_key(job_id))
+
+
+def save_job(job_id, **state):
+    job = get_job(job_id) or {'job_id': job_id}
+    job.update(state)
+    caches[SCORM_IMPORT_CACHE].set(_job_key(job_id), job, SCORM_IMPORT_JOB_TIMEOUT)
+    return job
+
+
+def create_job():
+    job_id = uuid.uuid4().hex
+    save_job(job_id, state=JOB_STATE_PENDING)
+    return job_id
+
+
+def run_sync(func, *args):
+    func(*args)
+
+
+def run_in_thread(func, *args):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from multiprocessing.pool import ThreadPool
+            _pool = ThreadPool(SCORM_IMPORT_WORKERS)
+    _pool.apply_async(func, args)
+
+
+def runs_in_background():
+    """Whether the import jobs outlive the Studio request submitting them."""
+    return SCORM_IMPORT_EXECUTOR != 'sync'
+
+
+def runs_in_process():
+    """Whether the import jobs run in the Studio process submitting them."""
+    return SCORM_IMPORT_EXECUTOR in ('sync', 'thread')
+
+
+def get_executor():
+    if SCORM_IMPORT_EXECUTOR == 'sync':
+        return run_sync
+    if SCORM_IMPORT_EXECUTOR == 'thread':
+        return run_in_thread
+    return import_string(SCORM_IMPORT_EXECUTOR)
+
+
+class JobProgress(object):
+    """Progress callback saving the job state at most once per `interval`."""
+
+    def __init__(self, job_id, interval=1.0):
+        self.job_id = job_id
+        self.interval = interval
+        self.saved_at = 0
+
+    def __call__(self, entries, total_entries, size, total_size):
+        now = time.time()
+        if now - self.saved_at >= self.interval or entries == total_entries:
+            self.saved_at = now
+            save_job(self.job_id, entries=entries, total_entries=total_entries,
+                     size=size, total_size=total_size)
+
+
+def run_import_job(job_id, storage, source_path, previous_pkg_id=None, content_compatible=False,
+                   on_done=None, on_done_args=()):
+    """
+    Import the package zip stored at `source_path` to a new directory of the
+    package storage, along with its manifest index. `storage` is the shared
+    storage namespace, the filesystem of the block is used when empty.
+    Files unchanged since `previous_pkg_id` are not uploaded again, see
+    `store_package`. The function `on_done` names is called with
+    `(job_id, result) + on_done_args` once the package is imported.
+    """
+    save_job(job_id, state=JOB_STATE_RUNNING)
+    try:
+        target_fs = get_shared_fs(storage) if storage else _block_filesystems.pop(job_id)
+    except Exception as e:
+        logger.exception('scorm package import job %s failed', job_id)
+        save_job(job_id, state=JOB_STATE_FAILED, error=unicode(e))
+        return
+    try:
+        with target_fs.open(source_path, 'rb') as f:
+            zf = open_package(f)
+            with zf.open(MANIFEST_NAME) as mf:
+                index = parse_manifest(mf, zf)
+            pkg_id, diff = store_package(zf, f, target_fs, bool(storage), progress=JobProgress(job_id),
+                                         previous_pkg_id=previous_pkg_id)
+            if diff is not None:
+                save_manifest_index(target_fs, pkg_id, index)
+    except Exception as e:
+        logger.exception('scorm package import job %s failed', job_id)
+        save_job(job_id, state=JOB_STATE_FAILED, error=unicode(e))
+    else:
+        result = {
+            'scorm_pkg': os.path.join(pkg_id, index['index_page']),
+            'scorm_pkg_version': index['scorm_version'],
+            'scorm_launch_data': index['launch_data'],
+            'scorm_pkg_storage': storage,
+            'content_compatible': content_compatible,
+            'diff': diff,
+        }
+        save_job(job_id, state=JOB_STATE_DONE, result=result, done_at=time.time())
+        if on_done is not None:
+            try:
+                import_string(on_done)(job_id, result, *on_done_args)
+            except Exception:
+                logger.exception('could not apply scorm package import job %s', job_id)
+    finally:
+        try:
+            target_fs.remove(source_path)
+        except Exception:
+            logger.warning('could not remove uploaded package %s', source_path, exc_info=True)
+
+
+def submit_import_job(target_fs, storage, source_path, previous_pkg_id=None, content_compatible=False,
+                      on_done=None, on_done_args=()):
+    """
+    Submit the import of the package zip stored at `source_path` of
+    `target_fs`, the package storage of namespace `storage`, and return
+    the job id. See `run_import_job`.
+    """
+    if not storage and not runs_in_process():
+        raise ImproperlyConfigured('SCORM_IMPORT_EXECUTOR {} needs SCORM_SHARED_STORAGE'.format(
+            SCORM_IMPORT_EXECUTOR))
+    job_id = create_job()
+    if not storage:
+        _block_filesystems[job_id] = target_fs
+    get_executor()(run_import_job, job_id, storage, source_path, previous_pkg_id, content_compatible,
+                   on_done, on_done_args)
+    return job_id
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Export the SCORM progress of the learners of a course or a block, one row
+per SCO the learner launched. The block columns are repeated on the rows of
+the SCOs of multi-SCO packages, the runtime columns are those of the SCO.
+"""
+import csv
+import json
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+
+from scormxblock.management.states import get_learner_states, iter_chunks
+from scormxblock.runtime_data import decode_runtime_data
+from scormxblock.scorm_default import SCORM_STATUS
+
+COLUMNS = (
+    'user_id', 'username', 'block_key', 'sco', 'modified',
+    'status', 'score', 'scorm_status', 'scorm_score', 'success_status', 'lesson_score',
+    'lesson_status', 'completion_status', 'total_time', 'total_seconds', 'progress_measure', 'runtime_modified',
+)
+
+
+def decode_row(row):
+    """
+    Export rows of StudentModule row `(id, user_id, username, block_key, modified, state)`,
+    the default SCO first.
+    """
+    _, user_id, username, block_key, modified, state = row
+    try:
+        state = json.loads(state or '{}')
+    except ValueError:
+        state = {}
+
+    # reconciled with the old block fields as `ScormXBlock.get_fields_data` does
+    scorm_status = state.get('scorm_status', SCORM_STATUS.UNATTENDED)
+    success_status = state.get('success_status', 'unknown')
+    scorm_score = state.get('scorm_score', 0.0)
+    lesson_score = state.get('lesson_score', 0.0)
+    status = scorm_status
+    if scorm_status == SCORM_STATUS.UNATTENDED and success_status != 'unknown':
+        status = success_status
+    score = scorm_score
+    if scorm_score == 0.0 and lesson_score != 0.0:
+        score = lesson_score
+
+    scos = [('', state.get('_scorm_runtime_data'))]
+    scos.extend(sorted((state.get('scorm_sco_runtime_data') or {}).items()))
+    rows = []
+    for sco, stored in scos:
+        runtime_data = decode_runtime_data(stored or {})
+        rows.append((
+            user_id, username, block_key, sco, modified.isoformat() if modified else '',
+            status, score, scorm_status, scorm_score, success_status, lesson_score,
+            runtime_data.get('cmi.core.lesson_status', runtime_data.get('cmi.success_status', '')),
+            runtime_data.get('cmi.completion_status', ''),
+            runtime_data.get('cmi.core.total_time', runtime_data.get('cmi.total_time', '')),
+            state.get('scorm_total_time', ''),
+            runtime_data.get('cmi.progress_measure', ''),
+            state.get('scorm_runtime_modified', ''),
+        ))
+    return rows
+
+
+def decode_chunk(rows):
+    return [decoded for row in rows for decoded in decode_row(row)]
+
+
+def encode(value):
+    return value.encode('utf-8') if isinstance(value, unicode) else value
+
+
+class Command(BaseCommand):
+    help = 'Export the SCORM progress of the learners of a course or a block as csv.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('key', help='course key, or usage key of a block')
+        parser.add_argument('--output', default='-', help='csv file to write, stdout by default')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='number of learner states read per query and decoded per task')
+        parser.add_argument('--workers', type=int, default=2,
+                            help='number of processes decoding the states, 1 decodes inline')
+
+    def iter_decoded(self, chunks, workers):
+        """
+        Decoded chunks, in order. At most `2 * workers` chunks are held at
+        once, so memory does not grow with the number of rows.
+        """
+        if workers <= 1:
+            for rows in chunks:
+                yield decode_chunk(rows)
+            return
+        pool = Pool(workers)
+        pending = deque()
+        try:
+            for rows in chunks:
+                pending.append(pool.apply_async(decode_chunk, (rows,)))
+                while len(pending) >= 2 * workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def handle(self, *args, **options):
+        queryset = get_learner_states(options['key'])
+        output = sys.stdout if options['output'] == '-' else open(options['output'], 'wb')
+        started = time.time()
+        total = 0
+        try:
+            writer = csv.writer(output)
+            writer.writerow(COLUMNS)
+            chunks = iter_chunks(queryset, options['chunk_size'])
+            for decoded in self.iter_decoded(chunks, options['workers']):
+                writer.writerows([encode(v) for v in row] for row in decoded)
+                total += len(decoded)
+                elapsed = time.time() - started
+                self.stderr.write('{} rows, {:.0f} rows/s'.format(total, total / elapsed if elapsed else 0))
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        elapsed = time.time() - started
+        self.stderr.write('exported {} rows in {:.1f}s, {:.0f} rows/s'.format(
+            total, elapsed, total / elapsed if elapsed else 0))
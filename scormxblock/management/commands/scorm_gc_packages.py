@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Remove packages of the shared storage no block refers to anymore.
+"""
+import calendar
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+
+from scormxblock.manifest import index_path
+from scormxblock.scorm_package import (
+    SCORM_SHARED_STORAGE, files_manifest_path, get_shared_fs, variants_manifest_path
+)
+
+
+class Command(BaseCommand):
+    help = 'Remove the packages of the shared SCORM storage no block refers to.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--storage', default=SCORM_SHARED_STORAGE,
+                            help='django-pyfs namespace of the shared storage')
+        parser.add_argument('--min-age', type=float, default=24,
+                            help='only remove packages stored more than this many hours ago')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='list the packages to remove without removing them')
+
+    def get_referenced_packages(self, storage):
+        store = modulestore()
+        referenced = set()
+        for course in store.get_courses():
+            for branch in (ModuleStoreEnum.Branch.draft_preferred, ModuleStoreEnum.Branch.published_only):
+                with store.branch_setting(branch, course.id):
+                    for block in store.get_items(course.id, qualifiers={'category': 'scormxblock'}):
+                        if getattr(block, 'scorm_pkg_storage', '') == storage and block.scorm_pkg:
+                            referenced.add(block.scorm_pkg.split('/', 1)[0])
+        return referenced
+
+    def handle(self, *args, **options):
+        storage = options['storage']
+        if not storage:
+            self.stderr.write('No shared storage configured, set SCORM_SHARED_STORAGE or --storage.')
+            return
+
+        pkg_fs = get_shared_fs(storage)
+        referenced = self.get_referenced_packages(storage)
+        min_created = time.time() - options['min_age'] * 60 * 60
+
+        removed = 0
+        for pkg_id in pkg_fs.listdir(u'/'):
+            if pkg_id in referenced or not pkg_fs.isdir(pkg_id):
+                continue
+            manifest_path = files_manifest_path(pkg_id)
+            if pkg_fs.exists(manifest_path):
+                with pkg_fs.open(manifest_path, 'rb') as f:
+                    created = json.load(f).get('created', 0)
+            else:
+                # import in progress, or failed
+                modified = pkg_fs.getinfo(pkg_id, namespaces=['details']).modified
+                created = calendar.timegm(modified.utctimetuple()) if modified else None
+            if created is None or created > min_created:
+                continue
+            self.stdout.write(u'{} {}'.format('would remove' if options['dry_run'] else 'removing', pkg_id))
+            if not options['dry_run']:
+                pkg_fs.removetree(pkg_id)
+                for path in (manifest_path, index_path(pkg_id), variants_manifest_path(pkg_id)):
+                    if pkg_fs.exists(path):
+                        pkg_fs.remove(path)
+            removed += 1
+        self.stdout.write(u'{} unreferenced packages, {} referenced'.format(removed, len(referenced)))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Recompute the aggregated results of the blocks from the learner states.
+"""
+import json
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+
+from scormxblock.aggregates import get_aggregates, get_counters, get_state_contribution, set_counters
+from scormxblock.management.states import get_learner_states, iter_chunks
+
+
+class Command(BaseCommand):
+    help = 'Recompute the aggregated SCORM results of the blocks of a course, or of a block.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('key', help='course key, or usage key of a block')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='number of learner states read per query')
+
+    def handle(self, *args, **options):
+        totals = defaultdict(Counter)
+        for rows in iter_chunks(get_learner_states(options['key']), options['chunk_size']):
+            for _, _, _, block_key, _, state in rows:
+                try:
+                    state = json.loads(state or '{}')
+                except ValueError:
+                    continue
+                totals[block_key].update(get_counters(get_state_contribution(state)))
+
+        for block_key, counters in totals.iteritems():
+            set_counters(block_key, counters)
+            aggregates = get_aggregates(block_key)
+            self.stdout.write(u'{}: {} learners, {}'.format(
+                block_key, aggregates['learners'],
+                ', '.join(u'{} {}'.format(k, v) for k, v in sorted(aggregates['statuses'].items()))))
+        self.stdout.write(u'{} blocks rebuilt'.format(len(totals)))
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Rescore all the learners of a block from their runtime data, in bulk.
+
+The platform rescores one learner at a time through the `ScorableXBlockMixin`
+hooks, loading the block for each of them. This command reads the learner
+states by chunks, recomputes the scores of a whole chunk at once, with NumPy
+when it is installed, and writes the changed states of a chunk in a single
+transaction, rescored again once locked, before publishing them to the
+grades app.
+"""
+import json
+import time
+from datetime import datetime
+
+import pytz
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import UsageKey
+from xmodule.modulestore.django import modulestore
+
+from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
+from lms.djangoapps.grades.signals.signals import PROBLEM_RAW_SCORE_CHANGED
+
+from scormxblock.aggregates import get_state_contribution, scorm_status_changed
+from scormxblock.management.states import StudentModule, get_learner_states, iter_chunks
+from scormxblock.scorm_default import SCORM_STATUS, SCORM_VERSION
+from scormxblock.scores import np, score_states
+from scormxblock.scromxblockng import ScormXBlock
+
+class Command(BaseCommand):
+    help = ('Rescore all the learners of a SCORM block from their runtime data and publish '
+            'the changed scores, after a weight change or a package fix.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('usage_key', help='usage key of the block')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='number of learner states rescored and written at once')
+        parser.add_argument('--score-min', type=float,
+                            help='min score replacing the one of the runtime data')
+        parser.add_argument('--score-max', type=float,
+                            help='max score replacing the one of the runtime data')
+        parser.add_argument('--republish', action='store_true',
+                            help='publish the unchanged scores too, to apply a weight change')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='report the changes without writing or publishing them')
+
+    def handle(self, *args, **options):
+        try:
+            usage_key = UsageKey.from_string(options['usage_key'])
+        except InvalidKeyError:
+            raise CommandError(u'{} is not a usage key'.format(options['usage_key']))
+        block = modulestore().get_item(usage_key)
+        if not block.scorm_allow_rescore:
+            raise CommandError(u'{} does not allow rescoring'.format(usage_key))
+
+        # version reconciled with the old block fields as `ScormXBlock.get_fields_data` does
+        if block.scorm_pkg_version == SCORM_VERSION.V2004 or block.version_scorm == 'SCORM_2004':
+            self.extract = ScormXBlock.extract_runtime_info_2004
+        else:
+            self.extract = ScormXBlock.extract_runtime_info_12
+        self.block = block
+        self.options = options
+        self.totals = dict.fromkeys(('learners', 'attempted', 'scored', 'changed', 'published'), 0)
+        self.old_sum = self.new_sum = 0.0
+
+        started = time.time()
+        for rows in iter_chunks(get_learner_states(unicode(usage_key)), options['chunk_size']):
+            self.rescore_chunk(rows)
+            elapsed = time.time() - started
+            self.stderr.write('{} rows, {:.0f} rows/s'.format(
+                self.totals['learners'], self.totals['learners'] / elapsed if elapsed else 0))
+        elapsed = time.time() - started
+
+        totals = self.totals
+        self.stdout.write(
+            u'{}{learners} learners, {attempted} attempted, {scored} scored, {changed} changed, '
+            u'{published} published'.format('[dry run] ' if options['dry_run'] else '', **totals))
+        if totals['scored']:
+            self.stdout.write(u'mean score {:.4f} -> {:.4f}'.format(
+                self.old_sum / totals['scored'], self.new_sum / totals['scored']))
+        self.stderr.write('rescored {} rows in {:.1f}s, {:.0f} rows/s ({})'.format(
+            totals['learners'], elapsed, totals['learners'] / elapsed if elapsed else 0,
+            'numpy' if np is not None else 'python'))
+
+    def score_states(self, states):
+        """New scores of learner states `states`, see `scores.score_states`."""
+        options = self.options
+        return score_states(states, self.extract, options['score_min'], options['score_max'],
+                            only_if_higher=self.block.scorm_publish_on_improvement)
+
+    def get_published(self, scored, changed):
+        """Indexes of the learners whose score is published."""
+        return [i for i, value in enumerate(scored if self.options['republish'] else changed) if value]
+
+    def rescore_chunk(self, rows):
+        options = self.options
+        self.totals['learners'] += len(rows)
+        attempts = []
+        for row in rows:
+            try:
+                state = json.loads(row[5] or '{}')
+            except ValueError:
+                continue
+            if state.get('scorm_status', SCORM_STATUS.UNATTENDED) == SCORM_STATUS.UNATTENDED:
+                continue
+            attempts.append((row, state))
+        if not attempts:
+            return
+
+        old, (new, scored, changed) = self.score_states([state for _, state in attempts])
+        indexes = self.get_published(scored, changed)
+        self.totals['attempted'] += len(attempts)
+        self.totals['scored'] += sum(scored)
+        self.totals['changed'] += sum(changed)
+        self.old_sum += sum(score for score, is_scored in zip(old, scored) if is_scored)
+        self.new_sum += sum(score for score, is_scored in zip(new, scored) if is_scored)
+
+        if options['verbosity'] > 1:
+            for i in indexes:
+                self.stdout.write(u'{} {:.4f} -> {:.4f}'.format(attempts[i][0][2], old[i], new[i]))
+        if options['dry_run']:
+            self.totals['published'] += len(indexes)
+            return
+        if indexes:
+            self.write_scores({attempts[i][0][0]: attempts[i][0] for i in indexes})
+
+    def write_scores(self, rows):
+        """
+        Rescore the learner states of `rows`, by id, again once locked, so
+        the commits made since they were read are neither lost nor ignored,
+        and write their new score.
+        """
+        published = []
+        with transaction.atomic():
+            locked = list(StudentModule.objects.select_for_update().filter(id__in=rows).values_list('id', 'state'))
+            states = [json.loads(state or '{}') for _, state in locked]
+            _, (new, scored, changed) = self.score_states(states)
+            for i in self.get_published(scored, changed):
+                state = states[i]
+                previous = get_state_contribution(state)
+                state['scorm_score'] = new[i]
+                if previous:
+                    state['scorm_aggregated'] = dict(previous, score=new[i])
+                # graded as the grade events of the block, out of `ScormXBlock.max_score`
+                StudentModule.objects.filter(id=locked[i][0]).update(
+                    state=json.dumps(state), grade=new[i], max_grade=1.0)
+                published.append((rows[locked[i][0]], new[i], previous, state.get('scorm_aggregated') or None))
+        self.totals['published'] += len(published)
+        for row, score, previous, current in published:
+            self.publish_score(row, score)
+            if current != previous:
+                scorm_status_changed.send(sender=ScormXBlock, block_key=row[3], previous=previous, current=current)
+
+    def publish_score(self, row, score):
+        """Tell the grades app about the new score, as the LMS does for the grade events of the blocks."""
+        PROBLEM_RAW_SCORE_CHANGED.send(
+            sender=None,
+            raw_earned=score,
+            raw_possible=1.0,
+            weight=self.block.weight,
+            user_id=row[1],
+            course_id=unicode(self.block.location.course_key),
+            usage_id=row[3],
+            only_if_higher=False,
+            modified=datetime.now().replace(tzinfo=pytz.UTC),
+            score_db_table=ScoreDatabaseTableEnum.courseware_student_module,
+        )
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Chunked reads of the learner states of the blocks, for the commands.
+"""
+from django.core.management.base import CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
+
+try:
+    from lms.djangoapps.courseware.models import StudentModule
+except ImportError:
+    from courseware.models import StudentModule
+
+
+def get_learner_states(key):
+    """StudentModule rows of the blocks of course `key`, or of block `key`."""
+    queryset = StudentModule.objects.filter(module_type='scormxblock')
+    try:
+        return queryset.filter(course_id=CourseKey.from_string(key))
+    except InvalidKeyError:
+        pass
+    try:
+        return queryset.filter(module_state_key=UsageKey.from_string(key))
+    except InvalidKeyError:
+        raise CommandError(u'{} is neither a course key nor a usage key'.format(key))
+
+
+def iter_chunks(queryset, chunk_size):
+    """
+    `(id, user_id, username, block_key, modified, state)` rows of `queryset`
+    by chunks of `chunk_size`, paginated on the primary key so each query
+    only holds one chunk.
+    """
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by('id').values_list(
+            'id', 'student_id', 'student__username', 'module_state_key', 'modified', 'state',
+        )[:chunk_size].iterator())
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        for i, row in enumerate(rows):
+            # keys are not picklable by every opaque_keys version
+            rows[i] = row[:3] + (unicode(row[3]),) + row[4:]
+        yield rows
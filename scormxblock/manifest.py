@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Index of the `imsmanifest.xml` of a package.
+
+The manifest is parsed once at import time into a plain dict (organizations,
+item tree, resources, files...) stored as json next to the package, so the
+runtime never has to read the XML again.
+"""
+import json
+import re
+
+from lxml import etree
+
+from .cache import TTLCache
+from .metrics import register
+from .scorm_default import SCORM_VERSION
+from .scorm_package import entry_path
+
+# indexes of stored packages never change, a missing index may be written
+# after the package files, so its absence is only cached for a short time
+manifest_cache = register(TTLCache('manifest', maxsize=256, ttl=24 * 60 * 60))
+MANIFEST_MISSING_TTL = 60
+
+
+def _localname(el):
+    return etree.QName(el).localname.lower()
+
+
+def _children(el, name):
+    """Child elements of `el` named `name`, whatever their namespace."""
+    if el is None:
+        return []
+    return [child for child in el if isinstance(child.tag, basestring) and _localname(child) == name]
+
+
+def _child(el, name):
+    children = _children(el, name)
+    return children[0] if children else None
+
+
+def _text(el, name):
+    child = _child(el, name)
+    if child is None or child.text is None:
+        return None
+    return child.text.strip()
+
+
+def _attr(el, name):
+    """Attribute `name` of `el`, whatever its namespace and case."""
+    for key, value in el.attrib.items():
+        if etree.QName(key).localname.lower() == name:
+            return value
+    return None
+
+
+def _parse_item(el, resources):
+    item = {
+        'identifier': _attr(el, 'identifier'),
+        'identifierref': _attr(el, 'identifierref'),
+        'parameters': _attr(el, 'parameters'),
+        'title': _text(el, 'title'),
+        'launch_data': _text(el, 'datafromlms'),
+        'mastery_score': _text(el, 'masteryscore'),
+        'max_time_allowed': _text(el, 'maxtimeallowed'),
+        'time_limit_action': _text(el, 'timelimitaction'),
+        'completion_threshold': _text(el, 'completionthreshold'),
+        'items': [_parse_item(child, resources) for child in _children(el, 'item')],
+    }
+    sequencing = _child(el, 'sequencing')
+    if sequencing is not None:
+        limits = _child(sequencing, 'limitconditions')
+        if limits is not None and item['max_time_allowed'] is None:
+            item['max_time_allowed'] = _attr(limits, 'attemptabsolutedurationlimit')
+        primary = _child(_child(sequencing, 'objectives'), 'primaryobjective')
+        if primary is not None and item['mastery_score'] is None:
+            item['mastery_score'] = _text(primary, 'minnormalizedmeasure')
+    resource = resources.get(item['identifierref'])
+    item['href'] = resource['href'] if resource else None
+    return item
+
+
+def _parse_resource(el):
+    return {
+        'identifier': _attr(el, 'identifier'),
+        'type': _attr(el, 'type'),
+        'scorm_type': _attr(el, 'scormtype'),
+        'href': _attr(el, 'href'),
+        'base': _attr(el, 'base'),
+        'files': [_attr(f, 'href') for f in _children(el, 'file')],
+        'dependencies': [_attr(d, 'identifierref') for d in _children(el, 'dependency')],
+    }
+
+
+def iter_items(items):
+    """All items of an item tree, depth first."""
+    for item in items:
+        yield item
+        for child in iter_items(item['items']):
+            yield child
+
+
+def _navigation_node(item):
+    return {
+        'identifier': item['identifier'],
+        'title': item['title'],
+        'sco': bool(item['href']),
+        'items': [_navigation_node(child) for child in item['items']],
+    }
+
+
+def build_navigation(organization):
+    """
+    Navigation tree of `organization` for the player, and its launchable
+    items (SCOs) by identifier.
+    """
+    if organization is None:
+        return [], {}
+    scos = {}
+    for item in iter_items(organization['items']):
+        if item['href']:
+            scos[item['identifier']] = {
+                'title': item['title'],
+                'href': item['href'],
+                'parameters': item['parameters'],
+                'launch_data': item['launch_data'],
+            }
+    return [_navigation_node(item) for item in organization['items']], scos
+
+
+def parse_manifest(manifest, zf=None):
+    """
+    Build the index of file `manifest`, with the size of all the files of
+    package zip `zf` when given.
+    """
+    root = etree.parse(manifest).getroot()
+
+    resources = {}
+    resource_list = [_parse_resource(el) for el in _children(_child(root, 'resources'), 'resource')]
+    for resource in resource_list:
+        resources[resource['identifier']] = resource
+
+    organizations_el = _child(root, 'organizations')
+    organizations = []
+    for el in _children(organizations_el, 'organization'):
+        organizations.append({
+            'identifier': _attr(el, 'identifier'),
+            'title': _text(el, 'title'),
+            'items': [_parse_item(child, resources) for child in _children(el, 'item')],
+        })
+    default_organization = _attr(organizations_el, 'default') if organizations_el is not None else None
+
+    schemaversion = _text(_child(root, 'metadata'), 'schemaversion')
+    scorm_version = SCORM_VERSION.V12
+    if schemaversion is not None and re.match('^1.2$', schemaversion) is None:
+        scorm_version = SCORM_VERSION.V2004
+
+    index = {
+        'scorm_version': scorm_version,
+        'schemaversion': schemaversion,
+        'default_organization': default_organization,
+        'organizations': organizations,
+        'resources': resources,
+        'files': {entry_path(info): info.file_size for info in zf.infolist()} if zf is not None else {},
+        'index_page': 'index.html',
+        'launch_data': None,
+        'navigation': [],
+        'scos': {},
+        'default_sco': None,
+    }
+
+    # the package is launched from the first item with a resource
+    organization = get_organization(index)
+    first = None
+    if organization is not None:
+        first = next((item for item in iter_items(organization['items']) if item['href']), None)
+    if first is not None:
+        index['index_page'] = first['href']
+        index['launch_data'] = first['launch_data']
+        index['default_sco'] = first['identifier']
+        index['navigation'], index['scos'] = build_navigation(organization)
+    elif len(resource_list) == 1 and resource_list[0]['href']:
+        index['index_page'] = resource_list[0]['href']
+    return index
+
+
+def get_organization(index):
+    """The default organization of the package, or its first one."""
+    organizations = index['organizations']
+    for organization in organizations:
+        if organization['identifier'] == index['default_organization']:
+            return organization
+    return organizations[0] if organizations else None
+
+
+def add_launch_parameters(url, parameters):
+    """Append the `parameters` of an item to the launch `url` of its resource."""
+    parameters = (parameters or '').lstrip('?&')
+    if not parameters:
+        return url
+    if parameters.startswith('#'):
+        return url + parameters
+    return url + ('&' if '?' in url else '?') + parameters
+
+
+def index_path(pkg_id):
+    """Path of the manifest index of package `pkg_id`, next to its directory."""
+    return u'{}.index.json'.format(pkg_id)
+
+
+def save_manifest_index(target_fs, pkg_id, index):
+    with target_fs.open(index_path(pkg_id), 'wb') as f:
+        f.write(json.dumps(index))
+
+
+def load_manifest_index(pkg_fs, pkg_id, cache_key=None):
+    """
+    Index of stored package `pkg_id`, None for packages imported before
+    indexes were stored. Indexes are cached by `cache_key`, which has to
+    identify the storage along with the package (package ids of the block
+    storages are only unique within a block), missing indexes are cached
+    for `MANIFEST_MISSING_TTL` seconds.
+    """
+    cache_key = cache_key or pkg_id
+    index = manifest_cache.get(cache_key)
+    if index is None:
+        path = index_path(pkg_id)
+        if pkg_fs.exists(path):
+            with pkg_fs.open(path, 'rb') as f:
+                index = json.load(f)
+            manifest_cache.set(cache_key, index)
+        else:
+            index = {}
+            manifest_cache.set(cache_key, index, MANIFEST_MISSING_TTL)
+    return index or None
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# the stats of the registered counters and caches are logged at most once
+# per this many seconds by each process, 0 disables
+SCORM_METRICS_LOG_INTERVAL = getattr(settings, 'SCORM_METRICS_LOG_INTERVAL', 300)
+
+_sources = OrderedDict()
+_logged_at = [time.time()]
+_log_lock = threading.Lock()
+
+
+def register(source):
+    """Add `source`, with a `name` and a `stats()` dict, to the stats of `get_stats`."""
+    _sources[source.name] = source
+    return source
+
+
+def get_stats():
+    """Stats of the registered counters and caches of the current process, by name."""
+    return {name: source.stats() for name, source in _sources.items()}
+
+
+def format_stats(stats):
+    return ', '.join(
+        u'{} {}'.format(name, ' '.join(
+            '{}={:.3f}'.format(key, value) if isinstance(value, float) else '{}={}'.format(key, value)
+            for key, value in sorted(values.items())))
+        for name, values in sorted(stats.items()))
+
+
+def log_stats(interval=None):
+    """
+    Log the stats of the registered sources when the last log is older than
+    `interval` seconds (`SCORM_METRICS_LOG_INTERVAL` by default). Called on
+    the counted operations, so a process logs while it serves requests.
+    """
+    interval = SCORM_METRICS_LOG_INTERVAL if interval is None else interval
+    if not interval or time.time() - _logged_at[0] < interval:
+        return False
+    with _log_lock:
+        now = time.time()
+        if now - _logged_at[0] < interval:
+            return False
+        _logged_at[0] = now
+    logger.info('scorm metrics: %s', format_stats(get_stats()))
+    return True
+
+
+class Counters(object):
+    """
+    Named counters of the current process, for monitoring.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            self._counts[key] += amount
+        log_stats()
+
+    def get(self, key):
+        with self._lock:
+            return self._counts[key]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+# `published` and `suppressed` grade publishes
+grade_counters = register(Counters('grade'))
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from django.db import models
+
+
+class ScormListEntry(models.Model):
+    """
+    One entry of the `cmi.interactions` or `cmi.objectives` list of a
+    learner, stored out of the block user state by `ModelInteractionStore`.
+    `data` holds the json of the fields of the entry
+    (`{"id": ..., "result": ..., "correct_responses.0.pattern": ...}`).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
+    block_key = models.CharField(max_length=255)
+    sco = models.CharField(max_length=255, blank=True, default='')
+    element = models.CharField(max_length=32)
+    index = models.PositiveIntegerField()
+    data = models.TextField(default='{}')
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta(object):
+        app_label = 'scormxblock'
+        unique_together = ('user', 'block_key', 'sco', 'element', 'index')
+
+
+class ScormAggregateCounter(models.Model):
+    """
+    One counter of the aggregated results of a block, for
+    `ModelAggregateStore`.
+    """
+    block_key = models.CharField(max_length=255)
+    name = models.CharField(max_length=32)
+    value = models.BigIntegerField(default=0)
+
+    class Meta(object):
+        app_label = 'scormxblock'
+        unique_together = ('block_key', 'name')
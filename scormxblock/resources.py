@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Static resources and templates of the blocks, loaded once per process.
+
+Caching is disabled in DEBUG by default so edits show up without a restart,
+`SCORM_RESOURCE_CACHE` overrides it.
+"""
+import threading
+
+import pkg_resources
+from django.conf import settings
+from django.template import Context, Template
+
+SCORM_RESOURCE_CACHE = getattr(settings, 'SCORM_RESOURCE_CACHE', not settings.DEBUG)
+
+_resources = {}
+_templates = {}
+_lock = threading.Lock()
+
+
+def resource_string(path):
+    """Decoded content of resource `path` of the package."""
+    if not SCORM_RESOURCE_CACHE:
+        return pkg_resources.resource_string(__name__, path).decode("utf8")
+    data = _resources.get(path)
+    if data is None:
+        data = pkg_resources.resource_string(__name__, path).decode("utf8")
+        with _lock:
+            _resources[path] = data
+    return data
+
+
+def get_template(path):
+    """Compiled django template of resource `path`."""
+    if not SCORM_RESOURCE_CACHE:
+        return Template(resource_string(path))
+    template = _templates.get(path)
+    if template is None:
+        template = Template(resource_string(path))
+        with _lock:
+            _templates[path] = template
+    return template
+
+
+def render_template(path, context):
+    return get_template(path).render(Context(context))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Scores of learner states computed in bulk, from their runtime data, for
+`scorm_rescore`. Kept apart from the command, which needs the LMS.
+"""
+from .runtime_data import decode_runtime_data
+from .scromxblockng import SCORM_SCORE_EPSILON
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NAN = float('nan')
+
+
+def compute_scores(raw, maxi, mini, old, only_if_higher=False):
+    """
+    New scores of the learners with score bounds `raw`, `maxi`, `mini` (NaN
+    when unknown) and stored scores `old`, as `ScormXBlock.set_score` does.
+    With `only_if_higher` lower scores keep the stored one. Returns the
+    lists of new scores, and of whether each learner is scored and whether
+    its score changed.
+    """
+    if np is None:
+        new, scored, changed = [], [], []
+        for r, high, low, score in zip(raw, maxi, mini, old):
+            possible = float(high) - low
+            is_scored = r == r and possible == possible and possible != 0
+            value = (r - low) / possible if is_scored else score
+            if only_if_higher and value < score:
+                value = score
+            new.append(value)
+            scored.append(is_scored)
+            changed.append(is_scored and abs(value - score) > SCORM_SCORE_EPSILON)
+        return new, scored, changed
+
+    raw, maxi, mini, old = (np.array(values, dtype=float) for values in (raw, maxi, mini, old))
+    possible = maxi - mini
+    scored = ~np.isnan(raw) & ~np.isnan(possible) & (possible != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        new = np.where(scored, (raw - mini) / possible, old)
+    if only_if_higher:
+        new = np.maximum(new, old)
+    changed = scored & (np.abs(new - old) > SCORM_SCORE_EPSILON)
+    return new.tolist(), scored.tolist(), changed.tolist()
+
+
+def score_states(states, extract, score_min=None, score_max=None, only_if_higher=False):
+    """
+    New scores of learner states `states`, with the score bounds read from
+    their runtime data by `extract` (`ScormXBlock.extract_runtime_info_12`
+    or `_2004`) unless `score_min` and `score_max` replace them. Returns the
+    stored scores and the result of `compute_scores`.
+    """
+    raw, maxi, mini, old = [], [], [], []
+    for state in states:
+        try:
+            info = extract(decode_runtime_data(state.get('_scorm_runtime_data') or {}))
+        except ValueError:
+            # score elements that are not numbers
+            info = {}
+        raw.append(info.get('raw', NAN))
+        maxi.append(info.get('maxi', NAN) if score_max is None else score_max)
+        mini.append(info.get('mini', NAN) if score_min is None else score_min)
+        old.append(state.get('scorm_score', 0.0))
+    return old, compute_scores(raw, maxi, mini, old, only_if_higher=only_if_higher)
@@ -1,4 +1,11 @@
 # -*- coding: utf-8 -*-
+from collections import namedtuple
+
+SCORM_VERSION = namedtuple('ScormVersion', ['V12', 'V2004'])('SCORM12', 'SCORM2004')
+
+SCORM_STATUS = namedtuple('ScormStatus', [
+    'SUCCEED', 'FAILED', 'IN_PROGRESS', 'UNATTENDED'])(
+    'SUCCEED', 'FAILED', 'IN PROGRESS', 'UNATTENDED')
 
 SCORM_12_RUNTIME_DEFAULT = {'cmi.comments': '',
  'cmi.comments_from_lms': '',
@@ -22,6 +29,7 @@ SCORM_12_RUNTIME_DEFAULT = {'cmi.comments': '',
  'cmi.core.score.max': 0.0,
  'cmi.core.score.min': 0.0,
  'cmi.core.score.raw': 0.0,
+ 'cmi.core.score._children': ['raw', 'min', 'max'],
  'cmi.core.score_children': ['raw', 'min', 'max'],
  'cmi.core.session_time': 0,
  'cmi.core.student_id': '',
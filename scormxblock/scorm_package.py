@@ -0,0 +1,591 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming import of SCORM packages.
+
+Zip entries are read one at a time and written in fixed size chunks to the
+target filesystem, so memory usage does not depend on the package size.
+Writes to the target filesystem can run in parallel. Text files get
+pre-compressed siblings, compressed in a process pool.
+"""
+from __future__ import division
+import gzip
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+import threading
+import time
+import uuid
+import zipfile
+from collections import deque, namedtuple
+from multiprocessing.pool import ThreadPool
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from fs.errors import FSError, IllegalBackReference
+from fs.path import dirname, join, normpath, relpath
+
+from .cache import TTLCache, cache_lock
+from .metrics import register
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SCORM_PKG_CHUNK_SIZE = getattr(settings, 'SCORM_PKG_CHUNK_SIZE', 1024 * 1024)
+# limits on the uncompressed size and the number of entries of a package
+SCORM_PKG_MAX_SIZE = getattr(settings, 'SCORM_PKG_MAX_SIZE', 4 * 1024 * 1024 * 1024)
+SCORM_PKG_MAX_ENTRIES = getattr(settings, 'SCORM_PKG_MAX_ENTRIES', 20000)
+# number of files written to the storage at the same time, with retries
+SCORM_PKG_UPLOAD_CONCURRENCY = getattr(settings, 'SCORM_PKG_UPLOAD_CONCURRENCY', 8)
+SCORM_PKG_UPLOAD_RETRIES = getattr(settings, 'SCORM_PKG_UPLOAD_RETRIES', 3)
+SCORM_PKG_UPLOAD_BACKOFF = getattr(settings, 'SCORM_PKG_UPLOAD_BACKOFF', 0.5)
+# imports of the same package to a content addressed storage run one at a
+# time, under a lock of the django cache `SCORM_PKG_LOCK_BACKEND` held for
+# at most the timeout. The others wait for it, then reuse the package.
+SCORM_PKG_LOCK_BACKEND = getattr(settings, 'SCORM_PKG_LOCK_BACKEND', 'default')
+SCORM_PKG_LOCK_TIMEOUT = getattr(settings, 'SCORM_PKG_LOCK_TIMEOUT', 60 * 60)
+SCORM_PKG_LOCK_WAIT = getattr(settings, 'SCORM_PKG_LOCK_WAIT', 30 * 60)
+# django-pyfs namespace shared by all blocks where packages are stored once,
+# by content hash. Packages go to the filesystem of each block when empty.
+SCORM_SHARED_STORAGE = getattr(settings, 'SCORM_SHARED_STORAGE', '')
+# files of these types and sizes get `.gz` (and `.br` with the brotli module)
+# siblings at import, compressed by a pool of threads. 0 min size disables.
+SCORM_PKG_PRECOMPRESS_MIN_SIZE = getattr(settings, 'SCORM_PKG_PRECOMPRESS_MIN_SIZE', 1024)
+SCORM_PKG_PRECOMPRESS_MAX_SIZE = getattr(settings, 'SCORM_PKG_PRECOMPRESS_MAX_SIZE', 32 * 1024 * 1024)
+SCORM_PKG_PRECOMPRESS_WORKERS = getattr(settings, 'SCORM_PKG_PRECOMPRESS_WORKERS', 2)
+SCORM_PKG_PRECOMPRESS_TYPES = tuple(getattr(settings, 'SCORM_PKG_PRECOMPRESS_TYPES', (
+    'text/', 'application/javascript', 'application/x-javascript', 'application/json',
+    'application/xml', 'image/svg+xml',
+)))
+
+# content encodings of the pre-compressed siblings, by file extension
+VARIANT_EXTENSIONS = (('br', '.br'), ('gzip', '.gz'))
+
+MANIFEST_NAME = u'imsmanifest.xml'
+
+
+class PackageError(Exception):
+    pass
+
+
+def entry_path(info):
+    """Normalized relative path of zip entry `info`."""
+    name = info.filename
+    if not isinstance(name, unicode):
+        # zip names are utf-8 only when flagged, cp437 otherwise
+        name = name.decode('utf-8' if info.flag_bits & 0x800 else 'cp437')
+    try:
+        return relpath(normpath(name.replace(u'\\', u'/')))
+    except IllegalBackReference:
+        raise PackageError(u'invalid entry name {}'.format(name))
+
+
+def open_package(fileobj, max_size=SCORM_PKG_MAX_SIZE, max_entries=SCORM_PKG_MAX_ENTRIES, require_manifest=True):
+    """
+    Open the zip of a package and check it against the size and entry count
+    limits, from the central directory only.
+    """
+    try:
+        zf = zipfile.ZipFile(fileobj)
+    except (zipfile.BadZipfile, zipfile.LargeZipFile) as e:
+        raise PackageError(str(e))
+
+    infolist = zf.infolist()
+    if max_entries and len(infolist) > max_entries:
+        raise PackageError(u'package has more than {} entries'.format(max_entries))
+    if max_size and sum(info.file_size for info in infolist) > max_size:
+        raise PackageError(u'package is bigger than {} bytes'.format(max_size))
+    if require_manifest and MANIFEST_NAME not in zf.namelist():
+        raise PackageError(u'{} not found'.format(MANIFEST_NAME))
+    return zf
+
+
+def copy_stream(src, dst, chunk_size=SCORM_PKG_CHUNK_SIZE, max_size=None, digest=None):
+    """
+    Copy file `src` to `dst` chunk by chunk, return the number of bytes
+    written. More than `max_size` bytes raise a PackageError, `digest` is
+    updated with the content when given.
+    """
+    written = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        written += len(chunk)
+        if max_size is not None and written > max_size:
+            raise PackageError(u'entry is bigger than declared')
+        if digest is not None:
+            digest.update(chunk)
+        dst.write(chunk)
+    return written
+
+
+def iter_file(source_fs, path, start=0, stop=None, chunk_size=SCORM_PKG_CHUNK_SIZE):
+    """
+    Content of file `path` of `source_fs` from byte `start` to `stop`, chunk
+    by chunk.
+    """
+    with source_fs.open(path, 'rb') as f:
+        if start:
+            f.seek(start)
+        remaining = stop - start if stop is not None else None
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def copy_entry(zf, info, target_fs, path, chunk_size=SCORM_PKG_CHUNK_SIZE, digest=None):
+    """
+    Copy zip entry `info` to `path` of `target_fs`, return the number of
+    bytes written.
+    """
+    with zf.open(info) as src, target_fs.open(path, 'wb') as dst:
+        return copy_stream(src, dst, chunk_size, info.file_size, digest)
+
+
+def with_retries(func, retries=SCORM_PKG_UPLOAD_RETRIES, backoff=SCORM_PKG_UPLOAD_BACKOFF):
+    """
+    Call `func` until it succeeds, retrying storage errors with an
+    exponential backoff.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except (IOError, FSError):
+            if attempt == retries:
+                raise
+            logger.warning('scorm package import: retrying', exc_info=True)
+            time.sleep(backoff * 2 ** attempt)
+
+
+def upload_file(src, target_fs, path, chunk_size=SCORM_PKG_CHUNK_SIZE):
+    """
+    Write seekable file `src` to `path` of `target_fs`, with retries.
+    """
+    def upload():
+        src.seek(0)
+        with target_fs.open(path, 'wb') as dst:
+            return copy_stream(src, dst, chunk_size)
+    return with_retries(upload)
+
+
+def hash_entry(zf, info, chunk_size=SCORM_PKG_CHUNK_SIZE):
+    digest = hashlib.sha1()
+    with zf.open(info) as src:
+        for chunk in iter(lambda: src.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def log_progress(entries, total_entries, size, total_size):
+    if entries == total_entries or entries % 500 == 0:
+        logger.info('scorm package import: %d/%d entries, %d/%d bytes',
+                    entries, total_entries, size, total_size)
+
+
+class ImportReport(namedtuple('ImportReport', ['entries', 'size', 'seconds', 'files', 'diff'])):
+
+    @property
+    def throughput(self):
+        """Bytes written per second."""
+        return self.size / self.seconds if self.seconds else 0.0
+
+
+class PackageExtractor(object):
+    """
+    Extract all entries of a package zip to `target_dir` of `target_fs`.
+
+    Zip entries are read in order, with `concurrency` above 1 each one is
+    spooled to a temporary file (in memory below `chunk_size`) and written to
+    the target filesystem by a thread pool, which hides the latency of remote
+    storages such as S3. At most `2 * concurrency` entries are spooled at
+    once.
+
+    With `previous`, a `(directory, files)` pair describing a package already
+    in `target_fs`, files whose size and hash did not change are copied
+    within the storage instead of being uploaded again.
+
+    `progress` is called after each entry with the number of entries and
+    bytes done so far, and their totals.
+
+    The report lists the size and sha1 of every extracted file by path, and
+    the files added, changed, unchanged and removed compared to `previous`.
+    """
+
+    def __init__(self, target_fs, target_dir=u'/', concurrency=SCORM_PKG_UPLOAD_CONCURRENCY,
+                 chunk_size=SCORM_PKG_CHUNK_SIZE, progress=log_progress, previous=None):
+        self.target_fs = target_fs
+        self.target_dir = target_dir
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.previous_dir, self.previous_files = previous or (None, {})
+        self._lock = threading.Lock()
+
+    def extract(self, zf):
+        started = time.time()
+        infolist = zf.infolist()
+        self.total_entries = len(infolist)
+        self.total_size = sum(info.file_size for info in infolist)
+        self.entries = 0
+        self.size = 0
+        self.files = {}
+        self.diff = {'added': [], 'changed': [], 'unchanged': [], 'removed': []}
+
+        files = []
+        for info in infolist:
+            name = entry_path(info)
+            path = join(self.target_dir, name)
+            if info.filename.endswith('/'):
+                self.target_fs.makedirs(path, recreate=True)
+                self._done(0)
+            else:
+                self.target_fs.makedirs(dirname(path), recreate=True)
+                files.append((info, name, path))
+        names = set(name for _, name, _ in files)
+        self.diff['removed'] = sorted(name for name in self.previous_files if name not in names)
+
+        if self.concurrency > 1:
+            self._extract_parallel(zf, files)
+        else:
+            for info, name, path in files:
+                previous = self.previous_files.get(name)
+                if previous and previous[0] == info.file_size and previous[1] == hash_entry(zf, info):
+                    self._done(self._copy_previous(name, path))
+                    continue
+                digest = hashlib.sha1()
+                size = copy_entry(zf, info, self.target_fs, path, self.chunk_size, digest)
+                self._record(name, size, digest.hexdigest())
+                self._done(size)
+
+        report = ImportReport(self.total_entries, self.size, time.time() - started, self.files, self.diff)
+        logger.info('scorm package import: %d entries, %d bytes in %.1fs (%.0f bytes/s), '
+                    '%d added, %d changed, %d unchanged, %d removed',
+                    report.entries, report.size, report.seconds, report.throughput,
+                    len(self.diff['added']), len(self.diff['changed']),
+                    len(self.diff['unchanged']), len(self.diff['removed']))
+        return report
+
+    def _record(self, name, size, sha1):
+        previous = self.previous_files.get(name)
+        if previous is None:
+            change = 'added'
+        elif previous[:2] == [size, sha1]:
+            change = 'unchanged'
+        else:
+            change = 'changed'
+        with self._lock:
+            self.files[name] = [size, sha1]
+            self.diff[change].append(name)
+
+    def _copy_previous(self, name, path):
+        """Copy unchanged file `name` of the previous package, return its size."""
+        size, sha1 = self.previous_files[name][:2]
+        with_retries(lambda: self.target_fs.copy(join(self.previous_dir, name), path, overwrite=True))
+        self._record(name, size, sha1)
+        return size
+
+    def _done(self, size):
+        with self._lock:
+            self.entries += 1
+            self.size += size
+            if self.progress:
+                self.progress(self.entries, self.total_entries, self.size, self.total_size)
+
+    def _extract_parallel(self, zf, files):
+        pool = ThreadPool(self.concurrency)
+        spooled = threading.BoundedSemaphore(2 * self.concurrency)
+        results = []
+
+        def upload(spool, path):
+            try:
+                with spool:
+                    return upload_file(spool, self.target_fs, path, self.chunk_size)
+            finally:
+                spooled.release()
+
+        try:
+            for info, name, path in files:
+                spooled.acquire()
+                spool = SpooledTemporaryFile(max_size=self.chunk_size)
+                digest = hashlib.sha1()
+                try:
+                    with zf.open(info) as src:
+                        size = copy_stream(src, spool, self.chunk_size, info.file_size, digest)
+                except Exception:
+                    spool.close()
+                    spooled.release()
+                    raise
+                if self.previous_files.get(name, [])[:2] == [size, digest.hexdigest()]:
+                    spool.close()
+                    spooled.release()
+                    results.append(pool.apply_async(self._copy_previous, (name, path), callback=self._done))
+                    continue
+                self._record(name, size, digest.hexdigest())
+                results.append(pool.apply_async(upload, (spool, path), callback=self._done))
+            pool.close()
+            for result in results:
+                # raises the first upload error
+                result.get()
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+def is_compressible(name, size, min_size=SCORM_PKG_PRECOMPRESS_MIN_SIZE, max_size=SCORM_PKG_PRECOMPRESS_MAX_SIZE):
+    if not min_size or size < min_size or size > max_size:
+        return False
+    mimetype = mimetypes.guess_type(name)[0]
+    return bool(mimetype) and mimetype.startswith(SCORM_PKG_PRECOMPRESS_TYPES)
+
+
+def compress_data(data):
+    """Compressed variants of `data` by encoding, only those smaller than it."""
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9, mtime=0) as gz:
+        gz.write(data)
+    variants = {'gzip': buf.getvalue()}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data)
+    return {encoding: v for encoding, v in variants.iteritems() if len(v) < len(data)}
+
+
+class PrecompressReport(namedtuple('PrecompressReport', ['files', 'size', 'sizes', 'seconds', 'variants'])):
+
+    @property
+    def ratios(self):
+        """Size of the compressed files over their variants size, by encoding."""
+        return {encoding: self.size / size for encoding, size in self.sizes.iteritems() if size}
+
+
+class PackagePrecompressor(object):
+    """
+    Write pre-compressed siblings (`name.gz`, `name.br`) of the compressible
+    files of a package zip extracted to `target_dir` of `target_fs`.
+
+    Entries are read from the zip and compressed by a pool of `workers`
+    threads, at most `2 * workers` at once, the variants are written as
+    they come back. zlib and brotli release the GIL while compressing, and
+    threads do not fork the web worker the import may run in. With `previous`, a `(directory, variants)` pair of a
+    package already in `target_fs`, the variants of the `unchanged` files
+    are copied within the storage instead.
+
+    The report lists the size of the variants of every file by path.
+    """
+
+    def __init__(self, target_fs, target_dir=u'/', workers=SCORM_PKG_PRECOMPRESS_WORKERS,
+                 min_size=SCORM_PKG_PRECOMPRESS_MIN_SIZE, previous=None):
+        self.target_fs = target_fs
+        self.target_dir = target_dir
+        self.workers = workers
+        self.min_size = min_size
+        self.previous_dir, self.previous_variants = previous or (None, {})
+
+    def run(self, zf, unchanged=()):
+        started = time.time()
+        unchanged = set(unchanged)
+        self.files = 0
+        self.size = 0
+        self.sizes = {}
+        self.variants = {}
+
+        infolist = zf.infolist()
+        names = set(entry_path(info) for info in infolist)
+        pool = ThreadPool(self.workers) if self.workers > 1 else None
+        pending = deque()
+        try:
+            for info in infolist:
+                name = entry_path(info)
+                if info.filename.endswith('/') or not is_compressible(name, info.file_size, self.min_size):
+                    continue
+                if any(name + extension in names for _, extension in VARIANT_EXTENSIONS):
+                    # the package ships its own variants, not overwritten
+                    continue
+                if name in unchanged and name in self.previous_variants:
+                    self._copy_previous(name, info.file_size)
+                    continue
+                with zf.open(info) as src:
+                    data = src.read()
+                if pool is None:
+                    self._write(name, len(data), compress_data(data))
+                    continue
+                pending.append((name, len(data), pool.apply_async(compress_data, (data,))))
+                while len(pending) >= 2 * self.workers:
+                    name, size, result = pending.popleft()
+                    self._write(name, size, result.get())
+            while pending:
+                name, size, result = pending.popleft()
+                self._write(name, size, result.get())
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        report = PrecompressReport(self.files, self.size, self.sizes, time.time() - started, self.variants)
+        logger.info('scorm package import: pre-compressed %d files, %d bytes in %.1fs, ratios %s',
+                    report.files, report.size, report.seconds,
+                    ', '.join('{} {:.2f}'.format(k, v) for k, v in sorted(report.ratios.items())) or '-')
+        return report
+
+    def _record(self, name, size, variant_sizes):
+        if not variant_sizes:
+            return
+        self.files += 1
+        self.size += size
+        for encoding, variant_size in variant_sizes.iteritems():
+            self.sizes[encoding] = self.sizes.get(encoding, 0) + variant_size
+        self.variants[name] = variant_sizes
+
+    def _write(self, name, size, variants):
+        path = join(self.target_dir, name)
+        for encoding, extension in VARIANT_EXTENSIONS:
+            if encoding in variants:
+                upload_file(io.BytesIO(variants[encoding]), self.target_fs, path + extension)
+        self._record(name, size, {encoding: len(data) for encoding, data in variants.iteritems()})
+
+    def _copy_previous(self, name, size):
+        variant_sizes = self.previous_variants[name]
+        for encoding, extension in VARIANT_EXTENSIONS:
+            if encoding in variant_sizes:
+                with_retries(lambda: self.target_fs.copy(join(self.previous_dir, name + extension),
+                                                         join(self.target_dir, name + extension), overwrite=True))
+        self._record(name, size, variant_sizes)
+
+
+def extract_package(zf, target_fs, target_dir=u'/', **kwargs):
+    """
+    Extract all entries of `zf` to `target_dir` of `target_fs`, see
+    `PackageExtractor`.
+    """
+    return PackageExtractor(target_fs, target_dir, **kwargs).extract(zf)
+
+
+def files_manifest_path(pkg_id):
+    """Path of the list of files of package `pkg_id`, next to its directory."""
+    return u'{}.files.json'.format(pkg_id)
+
+
+def variants_manifest_path(pkg_id):
+    """Path of the list of pre-compressed files of package `pkg_id`."""
+    return u'{}.variants.json'.format(pkg_id)
+
+
+# variants of stored packages never change
+variants_cache = register(TTLCache('variants', maxsize=256, ttl=24 * 60 * 60))
+
+
+def read_variants_manifest(target_fs, pkg_id):
+    """
+    Sizes of the pre-compressed variants of the files of stored package
+    `pkg_id` by path and encoding, empty for packages imported without.
+    """
+    path = variants_manifest_path(pkg_id)
+    if not target_fs.exists(path):
+        return {}
+    with target_fs.open(path, 'rb') as f:
+        return json.load(f)['variants']
+
+
+def load_variants(target_fs, pkg_id, cache_key=None):
+    """Cached `read_variants_manifest`, see `load_manifest_index`."""
+    cache_key = cache_key or pkg_id
+    variants = variants_cache.get(cache_key)
+    if variants is None:
+        variants = read_variants_manifest(target_fs, pkg_id)
+        variants_cache.set(cache_key, variants)
+    return variants
+
+
+def hash_file(fileobj, chunk_size=SCORM_PKG_CHUNK_SIZE):
+    """sha1 of the content of seekable `fileobj`."""
+    digest = hashlib.sha1()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def get_shared_fs(namespace=SCORM_SHARED_STORAGE):
+    from djpyfs import djpyfs
+    return djpyfs.get_filesystem(namespace)
+
+
+def read_files_manifest(target_fs, pkg_id):
+    """Files of stored package `pkg_id` by path, None when unknown."""
+    path = files_manifest_path(pkg_id)
+    if not target_fs.exists(path):
+        return None
+    with target_fs.open(path, 'rb') as f:
+        return json.load(f)['files']
+
+
+def store_package(zf, fileobj, target_fs, content_addressed=False, progress=log_progress, previous_pkg_id=None):
+    """
+    Extract package `zf`, read from `fileobj`, to a new directory of
+    `target_fs`. Return its id, and how its files differ from the package
+    `previous_pkg_id` of `target_fs` (None when the package is reused).
+
+    With `content_addressed` the id is the hash of the zip, and a package
+    already stored is reused as is. The list of files, with their size and
+    hash, is written last, so its presence marks a complete package. An
+    import of a package being imported waits for the other one to finish.
+
+    Files already in `previous_pkg_id` are copied within the storage
+    instead of being uploaded again, so re-importing a slightly modified
+    package only transfers the modified files.
+    """
+    if not content_addressed:
+        return _store_package(zf, uuid.uuid4().hex, target_fs, progress, previous_pkg_id)
+
+    pkg_id = hash_file(fileobj)
+    if target_fs.exists(files_manifest_path(pkg_id)):
+        logger.info('scorm package import: reusing stored package %s', pkg_id)
+        return pkg_id, None
+    with cache_lock('package.{}'.format(pkg_id), SCORM_PKG_LOCK_TIMEOUT, SCORM_PKG_LOCK_WAIT,
+                    SCORM_PKG_LOCK_BACKEND, poll=1) as locked:
+        if not locked:
+            # the files are the same, both imports write them
+            logger.warning('scorm package import: %s still locked after %ds, importing it anyway',
+                           pkg_id, SCORM_PKG_LOCK_WAIT)
+        elif target_fs.exists(files_manifest_path(pkg_id)):
+            logger.info('scorm package import: reusing stored package %s', pkg_id)
+            return pkg_id, None
+        return _store_package(zf, pkg_id, target_fs, progress, previous_pkg_id)
+
+
+def _store_package(zf, pkg_id, target_fs, progress, previous_pkg_id):
+    previous = None
+    previous_variants = None
+    if previous_pkg_id:
+        previous_files = read_files_manifest(target_fs, previous_pkg_id)
+        if previous_files:
+            previous = (previous_pkg_id, previous_files)
+            previous_variants = (previous_pkg_id, read_variants_manifest(target_fs, previous_pkg_id))
+
+    report = extract_package(zf, target_fs, pkg_id, progress=progress, previous=previous)
+    compressed = PackagePrecompressor(target_fs, pkg_id, previous=previous_variants).run(
+        zf, report.diff['unchanged'])
+    with target_fs.open(variants_manifest_path(pkg_id), 'wb') as f:
+        f.write(json.dumps({
+            'variants': compressed.variants,
+            'size': compressed.size,
+            'sizes': compressed.sizes,
+            'seconds': compressed.seconds,
+        }))
+    with target_fs.open(files_manifest_path(pkg_id), 'wb') as f:
+        f.write(json.dumps({
+            'files': report.files,
+            'size': report.size,
+            'created': time.time(),
+        }))
+    return pkg_id, report.diff
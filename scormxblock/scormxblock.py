@@ -1,27 +1,22 @@
 import json
-import re
-import pkg_resources
-import zipfile
 import shutil
 
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
-try:
-    import xml.etree.cElementTree as ET
-except ImportError:
-    import xml.etree.ElementTree as ET
-
 from django.conf import settings
-from django.template import Context, Template
 from webob import Response
 from crum import get_current_request
 from xblock.core import XBlock
 from xblock.fields import Scope, String, Float, Boolean, Dict, DateTime
 from xblock.fragment import Fragment
+from fs.osfs import OSFS
 import os
 import logging
 from scorm_default import *
+from scorm_package import extract_package, open_package
+from manifest import parse_manifest
+from resources import render_template, resource_string
 # TODO After upgrade to new release, add more required function from
 # API doc: https://openedx.atlassian.net/wiki/spaces/AC/pages/161400730/Open+edX+Runtime+XBlock+API
 # TODO old data migrate how to
@@ -117,8 +112,7 @@ class ScormXBlock(XBlock):
 
     def resource_string(self, path):
         """Handy helper for getting resources from our kit."""
-        data = pkg_resources.resource_string(__name__, path)
-        return data.decode("utf8")
+        return resource_string(path)
 
     def get_fields_data(self, only_value=False, *fields):
 
@@ -173,11 +167,11 @@ class ScormXBlock(XBlock):
         self.icon_class = 'problem' if self.has_score == 'True' else 'video'
         if hasattr(request.params['file'], 'file'):
             file = request.params['file'].file
-            zip_file = zipfile.ZipFile(file, 'r')
+            zip_file = open_package(file, require_manifest=False)
             path_to_file = os.path.join(settings.PROFILE_IMAGE_BACKEND['options']['location'], self.location.block_id)
             if os.path.exists(path_to_file):
                 shutil.rmtree(path_to_file, ignore_errors=True)
-            zip_file.extractall(path_to_file)
+            extract_package(zip_file, OSFS(path_to_file, create=True))
             self.set_scorm(path_to_file)
         return Response(json.dumps({'result': 'success'}), content_type='application/json')
 
@@ -338,36 +332,18 @@ class ScormXBlock(XBlock):
 
 
     def render_template(self, template_path, context):
-        template_str = self.resource_string(template_path)
-        template = Template(template_str)
-        return template.render(Context(context))
+        return render_template(template_path, context)
 
     def set_scorm(self, path_to_file):
         path_index_page = 'index.html'
         try:
-            tree = ET.parse('{}/imsmanifest.xml'.format(path_to_file))
+            with open('{}/imsmanifest.xml'.format(path_to_file), 'rb') as manifest:
+                index = parse_manifest(manifest)
         except IOError:
             pass
         else:
-            namespace = ''
-            for node in [node for _, node in
-                         ET.iterparse('{}/imsmanifest.xml'.format(path_to_file), events=['start-ns'])]:
-                if node[0] == '':
-                    namespace = node[1]
-                    break
-            root = tree.getroot()
-
-            if namespace:
-                resource = root.find('{{{0}}}resources/{{{0}}}resource'.format(namespace))
-                schemaversion = root.find('{{{0}}}metadata/{{{0}}}schemaversion'.format(namespace))
-            else:
-                resource = root.find('resources/resource')
-                schemaversion = root.find('metadata/schemaversion')
-
-            if resource:
-                path_index_page = resource.get('href')
-
-            if (not schemaversion is None) and (re.match('^1.2$', schemaversion.text) is None):
+            path_index_page = index['index_page']
+            if index['scorm_version'] == SCORM_VERSION.V2004:
                 self.version_scorm = 'SCORM_2004'
             else:
                 self.version_scorm = 'SCORM_12'
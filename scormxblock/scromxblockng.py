@@ -1,40 +1,59 @@
 # -*- coding: utf-8 -*-
 from __future__ import division
 import os
-import pkg_resources
+import json
+import hashlib
+import mimetypes
+import time
 import uuid
 import logging
-import re
-from collections import namedtuple
-from lxml import etree
 from urlparse import urlparse, urlunparse
 import urllib
 import user_agents
 
 from crum import get_current_request
-from django.template import Context, Template
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.conf import settings
-from django.contrib.auth.models import User
 from xblock.core import XBlock
 from xblock.exceptions import XBlockSaveError, JsonHandlerError
 from xblock.scorable import Score
-from xblock.fields import String, Scope, Dict, Boolean, Float
+from xblock.fields import String, Scope, Dict, Boolean, Float, Integer, List
 from xblock.reference.plugins import Filesystem
 
 from web_fragments.fragment import Fragment
 from webob.response import Response
-from fs.copy import copy_dir
-from fs.zipfs import ZipFS
+from fs.errors import FSError, IllegalBackReference
+from fs.path import normpath, relpath
 from xblockutils.studio_editable import StudioEditableXBlockMixin
 from xblockutils.fields import File
 try:
     from xmodule.progress import Progress
 except ImportError:
     pass
+try:
+    from xmodule.modulestore import ModuleStoreEnum
+    from xmodule.modulestore.django import modulestore
+except ImportError:
+    modulestore = None
+from .aggregates import get_aggregates, get_contribution, get_runtime_total_time, scorm_status_changed
+from .cache import learner_cache, runtime_buffer, url_cache
+from .data_model import SCORM_VALIDATE_RUNTIME_DATA, count_list_entries, get_data_model
+from .interactions import LIST_ELEMENTS, get_interaction_store, split_list_key
+from .jobs import JOB_STATE_DONE, SCORM_IMPORT_ASYNC, get_job, runs_in_background, save_job, submit_import_job
+from .manifest import add_launch_parameters, load_manifest_index, parse_manifest, save_manifest_index
 from .scorm_default import *
+from .scorm_package import (
+    MANIFEST_NAME, SCORM_SHARED_STORAGE, VARIANT_EXTENSIONS, PackageError, copy_stream, get_shared_fs, iter_file,
+    load_variants, open_package, store_package
+)
 from .fields import DateTime
+from .metrics import grade_counters
+from .resources import render_template, resource_string
+from .runtime_data import (
+    SCORM_RUNTIME_DATA_COMPACT, SCORM_RUNTIME_DATA_COMPACT_MIN_KEYS, decode_runtime_data, encode_runtime_data,
+    format_duration, format_timespan, parse_duration
+)
 from .mixins import ScorableXBlockMixin
 logger = logging.getLogger(__name__)
 # Make '_' a no-op so we can scrape strings
@@ -48,11 +67,43 @@ def str2dt(dtstr):
     return parse_datetime(dtstr)
 
 
-SCORM_STATUS = namedtuple('ScormStatus', [
-    'SUCCEED', 'FAILED', 'IN_PROGRESS', 'UNATTENDED'])(
-    'SUCCEED', 'FAILED', 'IN PROGRESS', 'UNATTENDED')
+def get_count(runtime_data, name):
+    """Stored `_count` element `name` of `runtime_data`, 0 when not stored."""
+    try:
+        return int(runtime_data.get(name, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+# scores closer than this are considered unchanged and not published again
+SCORM_SCORE_EPSILON = getattr(settings, 'SCORM_SCORE_EPSILON', 1e-6)
+
+# commits of a player session arriving this many sequence numbers late are
+# dropped, later ones still apply their values no newer commit wrote
+SCORM_COMMIT_WINDOW = getattr(settings, 'SCORM_COMMIT_WINDOW', 32)
+
+# not runtime data, sent along with the commits by the player
+SCORM_COMMIT_META_KEYS = ('package_date', 'package_version', 'commit_session', 'commit_seq', 'sco')
+
+SCORM_SCORE_KEYS = (
+    'cmi.core.score.raw', 'cmi.core.score.max', 'cmi.core.score.min',
+    'cmi.score.raw', 'cmi.score.max', 'cmi.score.min', 'cmi.score.scaled',
+)
+
+# max size in bytes of the runtime snapshot embedded in `student_view`, the
+# biggest values (usually `cmi.suspend_data`) are left out above it and fetched
+# on demand by the player. `None` disables the cap.
+SCORM_SNAPSHOT_MAX_SIZE = getattr(settings, 'SCORM_SNAPSHOT_MAX_SIZE', 64 * 1024)
+
+# serve the package files through the `scorm_content` handler instead of the
+# urls of the storage. Package directories are never modified once stored,
+# so its responses are cached for `SCORM_CONTENT_MAX_AGE` seconds.
+SCORM_SERVE_CONTENT = getattr(settings, 'SCORM_SERVE_CONTENT', False)
+SCORM_CONTENT_MAX_AGE = getattr(settings, 'SCORM_CONTENT_MAX_AGE', 365 * 24 * 60 * 60)
 
-SCORM_VERSION = namedtuple('ScormVersion', ['V12', 'V2004'])('SCORM12', 'SCORM2004')
+# seconds a background import done may wait for the Studio request
+# submitting it to save the block, it fails when polled afterwards
+SCORM_IMPORT_APPLY_WAIT = getattr(settings, 'SCORM_IMPORT_APPLY_WAIT', 60)
 
 
 def is_compatible(request):
@@ -170,6 +221,23 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
         enforce_type=True
     )
 
+    # runtime data of the SCOs of multi-SCO packages by identifier, the
+    # default SCO keeps using `_scorm_runtime_data`. Each one is stored as a
+    # json string, decoded only when its SCO is active.
+    scorm_sco_runtime_data = Dict(
+        default={},
+        scope=Scope.user_state,
+        enforce_type=True
+    )
+
+    # last `score` (a fraction) and `status` of each SCO ('' for the default
+    # one) of multi-SCO packages, the block score and status roll them up,
+    # see `rollup_score`
+    scorm_sco_scores = Dict(
+        default={},
+        scope=Scope.user_state
+    )
+
     scorm_runtime_modified = DateTime(
         scope=Scope.user_state,
         enforce_type=True,
@@ -222,7 +290,74 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
         scope=Scope.settings
     )
 
-    editable_fields = ('scorm_pkg', 'ratio', 'open_new_tab', 'display_name', 'due', 'has_score', 'icon_class', 'weight', 'scorm_allow_rescore')
+    scorm_commit_session = String(
+        default="",
+        scope=Scope.user_state
+    )
+
+    scorm_commit_seq = Integer(
+        default=0,
+        scope=Scope.user_state
+    )
+
+    # sequence number of the last commit that wrote each runtime value, for
+    # the commits of the last `SCORM_COMMIT_WINDOW` sequence numbers
+    scorm_commit_writes = Dict(
+        default={},
+        scope=Scope.user_state
+    )
+
+    # seconds spent in the block over all the sessions, the sum of the SCO
+    # times
+    scorm_total_time = Integer(
+        default=0,
+        scope=Scope.user_state
+    )
+
+    # `total` seconds spent in each SCO ('' for the default one) over all the
+    # sessions, accumulated from the session time the package reports, and
+    # seconds of the current player `session` already accumulated
+    scorm_sco_times = Dict(
+        default={},
+        scope=Scope.user_state
+    )
+
+    scorm_publish_on_improvement = Boolean(
+        default=False,
+        scope=Scope.settings,
+        enforce_type=True,
+        display_name=_("Keep best score"),
+        help=_("Only update the grade when the new score is higher than the current one")
+    )
+
+    scorm_pkg_storage = String(
+        default="",
+        scope=Scope.settings
+    )
+
+    scorm_import_job = String(
+        default="",
+        scope=Scope.settings
+    )
+
+    # what the learner counts for in the aggregated results of the block
+    scorm_aggregated = Dict(
+        default={},
+        scope=Scope.user_state
+    )
+
+    # SCOs ('' for the default one) whose runtime data stored before the list
+    # counts were maintained on commit has been counted, see
+    # `backfill_list_counts`
+    scorm_counted_scos = List(
+        default=[],
+        scope=Scope.user_state
+    )
+
+    # SCO the handlers work on, '' for the default one
+    active_sco = ''
+
+    editable_fields = ('scorm_pkg', 'ratio', 'open_new_tab', 'display_name', 'due', 'has_score', 'icon_class', 'weight', 'scorm_allow_rescore', 'scorm_publish_on_improvement')
     has_author_view = True
 
     # region Studio handler
@@ -231,53 +366,194 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
         pkg = request.POST.get('scorm_pkg', None)
         if not pkg:
             return Response(status=400)
-        zipfs = ZipFS(pkg.file)
-        with zipfs.open(u'imsmanifest.xml') as mf:
-            self.scorm_pkg_version, scorm_index, scorm_launch = self._get_scorm_info(mf)
+        try:
+            zf = open_package(pkg.file)
+        except PackageError as e:
+            return Response(status=400, json_body={'error': unicode(e)})
+        # learner state is kept when the author marks the new package as
+        # compatible with the previous one
+        content_compatible = bool(request.POST.get('content_compatible'))
+        if SCORM_IMPORT_ASYNC or request.POST.get('async'):
+            job_id = self._submit_scorm_import(pkg.file, content_compatible)
+            job = get_job(job_id)
+            if self._apply_scorm_import_job(job_id, job):
+                # imported within the request by the sync executor
+                return Response(status=200, json_body={'diff': job['result']['diff']})
+            return Response(status=202, json_body={'job_id': job_id})
+        with zf.open(MANIFEST_NAME) as mf:
+            index = parse_manifest(mf, zf)
             #logger.info('uploadfile: ' +str(self.scorm_pkg_version) + str(scorm_index) + str(scorm_launch))
-        pkg_id = self._upload_scorm_pkg(zipfs)
-        self.scorm_pkg = os.path.join(pkg_id, scorm_index)
-        self.scorm_pkg_modified = timezone.now()
-        if scorm_launch is not None:
-            self.scorm_launch_data = str(scorm_launch)
-        return Response(status=200)
+        pkg_id, diff = self._upload_scorm_pkg(zf, pkg.file, index)
+        self._apply_scorm_import({
+            'scorm_pkg': os.path.join(pkg_id, index['index_page']),
+            'scorm_pkg_version': index['scorm_version'],
+            'scorm_launch_data': index['launch_data'],
+            'scorm_pkg_storage': SCORM_SHARED_STORAGE,
+            'content_compatible': content_compatible,
+        })
+        return Response(status=200, json_body={'diff': diff})
+
+    @XBlock.json_handler
+    def studio_upload_status(self, data, suffix=''):
+        """
+        State of a background package import. The job switches the package
+        of the block once it is done, unless the block is polled first.
+        """
+        job_id = data.get('job_id', '')
+        job = get_job(job_id)
+        if job is None:
+            raise JsonHandlerError(404, self.ugettext('unknown import job'))
+        job['applied'] = self._apply_scorm_import_job(job_id, job) or job.get('applied', False)
+        if (not job['applied'] and job['state'] == JOB_STATE_DONE and
+                time.time() - job.get('done_at', 0) > SCORM_IMPORT_APPLY_WAIT):
+            # the Studio request submitting the job never saved the block
+            # with it, or another import was submitted since
+            job = save_job(job_id, state=JOB_STATE_FAILED,
+                           error=self.ugettext('the imported package could not be applied to the block'))
+        return job
+
+    def _submit_scorm_import(self, fileobj, content_compatible=False):
+        """
+        Store the uploaded zip next to the packages and import it in the
+        background, return the job id.
+        """
+        _ = self.runtime.service(self, 'i18n').ugettext
+
+        target_fs = self.get_pkg_fs(SCORM_SHARED_STORAGE)
+        upload_path = u'uploads/{}.zip'.format(uuid.uuid4().hex)
+        try:
+            target_fs.makedirs(u'uploads', recreate=True)
+            fileobj.seek(0)
+            with target_fs.open(upload_path, 'wb') as dst:
+                copy_stream(fileobj, dst)
+        except (IOError, FSError):
+            logger.exception('Error in uploading scorm package')
+            raise XBlockSaveError([], ['scorm_pkg'], _('Error in uploading scorm package'))
+        on_done, on_done_args = None, ()
+        if runs_in_background():
+            on_done = 'scormxblock.scromxblockng.apply_import_job'
+            on_done_args = (unicode(self.scope_ids.usage_id), self.runtime.user_id)
+        self.scorm_import_job = submit_import_job(
+            target_fs, SCORM_SHARED_STORAGE, upload_path, self.previous_pkg_id, content_compatible,
+            on_done, on_done_args)
+        return self.scorm_import_job
+
+    def _apply_scorm_import_job(self, job_id, job):
+        """Switch the block to the package of `job` when it is the last submitted import and is done."""
+        if job is None or job['state'] != JOB_STATE_DONE or job_id != self.scorm_import_job:
+            return False
+        self._apply_scorm_import(job['result'])
+        self.scorm_import_job = ''
+        return True
+
+    def _apply_scorm_import(self, result):
+        """Switch the block to an imported package, all fields at once."""
+        self.invalidate_pkg_urls()
+        self.scorm_pkg_version = result['scorm_pkg_version']
+        self.scorm_pkg = result['scorm_pkg']
+        self.scorm_pkg_storage = result['scorm_pkg_storage']
+        if not (result.get('content_compatible') and self.scorm_pkg_modified):
+            # expires the runtime data of the learners
+            self.scorm_pkg_modified = timezone.now()
+        if result['scorm_launch_data'] is not None:
+            self.scorm_launch_data = str(result['scorm_launch_data'])
+
+    def get_pkg_fs(self, storage):
+        """
+        Filesystem of the packages, the shared storage or the block one,
+        opened once per block instance.
+        """
+        opened = self.__dict__.setdefault('_pkg_fs', {})
+        if storage not in opened:
+            opened[storage] = get_shared_fs(storage) if storage else self.fs
+        return opened[storage]
 
-    def _upload_scorm_pkg(self, fs):
+    @property
+    def pkg_fs(self):
+        return self.get_pkg_fs(self.scorm_pkg_storage)
+
+    @property
+    def pkg_id(self):
+        """Id of the current package, its directory in the package storage."""
+        return self.scorm_pkg.split('/', 1)[0]
+
+    @property
+    def pkg_cache_key(self):
+        """Key of the current package in the caches of package data, across storages."""
+        # block storages are private to the block
+        return u'{}:{}'.format(self.scorm_pkg_storage or unicode(self.scope_ids.usage_id), self.pkg_id)
+
+    @property
+    def previous_pkg_id(self):
+        """Id of the current package when a new one would be stored next to it."""
+        if self.scorm_pkg and self.scorm_pkg_storage == SCORM_SHARED_STORAGE:
+            return self.pkg_id
+        return None
+
+    def _upload_scorm_pkg(self, zf, fileobj, index):
         _ = self.runtime.service(self, 'i18n').ugettext
 
-        pkg_id = uuid.uuid4().hex
+        pkg_fs = self.get_pkg_fs(SCORM_SHARED_STORAGE)
         try:
-            copy_dir(fs, u'/', self.fs, pkg_id)
-        except IOError:
+            pkg_id, diff = store_package(zf, fileobj, pkg_fs, bool(SCORM_SHARED_STORAGE),
+                                         previous_pkg_id=self.previous_pkg_id)
+            if diff is not None:
+                save_manifest_index(pkg_fs, pkg_id, index)
+            return pkg_id, diff
+        except (IOError, FSError, PackageError):
+            logger.exception('Error in uploading scorm package')
             raise XBlockSaveError([], ['scorm_pkg'], _('Error in uploading scorm package'))
-        return pkg_id
 
     @staticmethod
     def _get_scorm_info(manifest):
-        index_page = 'index.html'
-        launch_data = None
-        datafromlms = 'organizations/organization/item/adlcp:datafromlms'
-        root = etree.parse(manifest).getroot()
-        id_ref = root.find('organizations/organization/item', root.nsmap).get('identifierref')
-        resources = root.find('resources', root.nsmap)
-        resource = resources.findall('resource', root.nsmap)
-        schemaversion = root.find('metadata/schemaversion', root.nsmap)
-        scorm_version = SCORM_VERSION.V12
-        if resource:
-            if len(resource) > 1:
-                for i in resource:
-                    if i.get('identifier') == id_ref:
-                        index_page = i.get('href')
-            else:
-                index_page = resource[0].get('href')
-
-        if (schemaversion is not None) and (re.match('^1.2$', schemaversion.text) is None):
-            scorm_version = SCORM_VERSION.V2004
-            datafromlms = 'organizations/organization/item/adlcp:dataFromLMS'
-        launch_data = root.find(datafromlms, root.nsmap)
-        if launch_data is not None:
-            launch_data = launch_data.text
-        return scorm_version, index_page, launch_data
+        index = parse_manifest(manifest)
+        return index['scorm_version'], index['index_page'], index['launch_data']
+
+    @property
+    def manifest_index(self):
+        """
+        Index of the manifest of the package, None for packages imported
+        before indexes were stored.
+        """
+        if not self.scorm_pkg:
+            return None
+        return load_manifest_index(self.pkg_fs, self.pkg_id, self.pkg_cache_key)
+
+    def get_navigation(self):
+        """
+        Navigation of multi-SCO packages for the player: the item tree and
+        the launch url of every SCO. None for single SCO packages.
+        """
+        index = self.manifest_index
+        if index is None or len(index.get('scos', {})) < 2:
+            return None
+        urls = {}
+        for identifier, sco in index['scos'].iteritems():
+            url = self.get_launch_url(os.path.join(self.pkg_id, sco['href']))
+            urls[identifier] = add_launch_parameters(url, sco['parameters'])
+        return {
+            'default_sco': index['default_sco'],
+            'tree': index['navigation'],
+            'urls': urls,
+        }
+
+    def activate_sco(self, sco):
+        """
+        Select the SCO whose runtime data the handler works on, only its own
+        data is read or written whatever the number of SCOs of the package.
+        """
+        if not sco:
+            self.active_sco = ''
+            return
+        index = self.manifest_index
+        if index is None or sco not in index.get('scos', {}):
+            self.raise_handler_error('unknown sco')
+        self.active_sco = '' if sco == index['default_sco'] else sco
+
+    def get_launch_data(self):
+        if self.active_sco:
+            return self.manifest_index['scos'][self.active_sco]['launch_data'] or ''
+        return self.scorm_launch_data
     # endregion
 
     # region Runtime functions
@@ -300,34 +576,165 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
         return self.scorm_status != SCORM_STATUS.UNATTENDED
 
     def get_progress(self):
+        if self.flush_runtime_buffer():
+            self.save()
         pg = 0
         if self.scorm_pkg_version == SCORM_VERSION.V2004:
-            try:
-                pg = float(self.scorm_runtime_data.get('cmi.progress_measure', 0))
-            except ValueError:
-                pg = 0
+            # the mean of the SCOs of the package, those never launched at 0
+            scos = self.get_sco_ids()
+            pg = sum(self.get_sco_progress(sco) for sco in scos) / len(scos)
         return Progress(pg, 1)
 
+    def get_sco_ids(self):
+        """SCOs of the package, '' for the default one first."""
+        index = self.manifest_index
+        if not index:
+            return ['']
+        return [''] + sorted(sco for sco in index.get('scos', {}) if sco != index['default_sco'])
+
+    def get_sco_progress(self, sco):
+        active_sco = self.active_sco
+        self.active_sco = sco
+        try:
+            return min(max(float(self.scorm_runtime_data.get('cmi.progress_measure', 0)), 0), 1)
+        except ValueError:
+            return 0
+        finally:
+            self.active_sco = active_sco
+
     # endregion
 
     @property
     def scorm_runtime_data(self):
-        return self._scorm_runtime_data
+        """
+        Runtime data of the active SCO, decoded from the compact format when
+        stored in it. Changes have to be assigned back to be stored.
+        """
+        decoded = self.__dict__.setdefault('_decoded_runtime_data', {})
+        if self.active_sco not in decoded:
+            if self.active_sco:
+                stored = self.scorm_sco_runtime_data.get(self.active_sco) or {}
+            else:
+                stored = self._scorm_runtime_data
+            decoded[self.active_sco] = decode_runtime_data(stored)
+        return decoded[self.active_sco]
 
     @scorm_runtime_data.setter
     def scorm_runtime_data(self, value):
-        # TODO: add validation ss
-        self._scorm_runtime_data = value
+        stored = value
+        if SCORM_RUNTIME_DATA_COMPACT and len(value) >= SCORM_RUNTIME_DATA_COMPACT_MIN_KEYS:
+            stored = encode_runtime_data(value)
+        if self.active_sco:
+            self.scorm_sco_runtime_data[self.active_sco] = json.dumps(stored, separators=(',', ':'))
+        else:
+            self._scorm_runtime_data = stored
+        self.__dict__.setdefault('_decoded_runtime_data', {})[self.active_sco] = value
+
+    def clear_runtime_data(self):
+        """Drop the runtime data of all the SCOs."""
+        self._scorm_runtime_data = {}
+        self.scorm_sco_runtime_data = {}
+        self.scorm_sco_scores = {}
+        self.scorm_counted_scos = []
+        self.__dict__.pop('_decoded_runtime_data', None)
+        store = get_interaction_store()
+        if store is not None:
+            store.clear(self.runtime.user_id, unicode(self.scope_ids.usage_id))
+
+    def save_list_entries(self, data, runtime_data):
+        """
+        Move the interactions and objectives of commit `data` to the
+        interaction store, when there is one, dropping the values stored
+        for them in `runtime_data` before it was. Return the rest of `data`.
+        """
+        store = get_interaction_store()
+        if store is None:
+            return data
+        entries = {}
+        scalars = {}
+        for name, value in data.iteritems():
+            list_key = split_list_key(name)
+            if list_key is None:
+                scalars[name] = value
+            else:
+                element, index, field = list_key
+                entries.setdefault((element, index), {})[field] = value
+                runtime_data.pop(name, None)
+        if entries:
+            store.save(self.runtime.user_id, unicode(self.scope_ids.usage_id), self.active_sco, entries)
+        return scalars
+
+    def get_list_counts(self):
+        """`_count` of the interactions and objectives kept in the interaction store."""
+        store = get_interaction_store()
+        if store is None:
+            return {}
+        counts = store.counts(self.runtime.user_id, unicode(self.scope_ids.usage_id), self.active_sco)
+        return {'{}._count'.format(element): counts.get(element, 0) for element in LIST_ELEMENTS}
+
+    def get_list_value(self, name):
+        """
+        Value of list element `name` in the interaction store, None when it
+        is not stored there.
+        """
+        store = get_interaction_store()
+        if store is None:
+            return None
+        list_key = split_list_key(name)
+        if list_key is None:
+            return None
+        element, index, field = list_key
+        entry = store.get(self.runtime.user_id, unicode(self.scope_ids.usage_id), self.active_sco, element, index)
+        return entry.get(field) if entry else None
+
+    def get_stored_list_counts(self, runtime_data):
+        """
+        `_count` elements of runtime data stored before the counts were
+        maintained on commit, from the interaction store and the entries.
+        """
+        counts = self.get_list_counts()
+        for name, count in count_list_entries(runtime_data).iteritems():
+            counts[name] = max(counts.get(name, 0), count)
+        return counts
+
+    @property
+    def are_list_counts_stored(self):
+        """Whether the runtime data of the active SCO holds all its `_count` elements."""
+        return self.active_sco in self.scorm_counted_scos
+
+    def backfill_list_counts(self, runtime_data):
+        """
+        Store in `runtime_data` the `_count` elements of the runtime data
+        stored before the counts were maintained on commit, counted from its
+        entries and the interaction store. The interactions and objectives
+        counts are stored, written to or not. Return False when the counts
+        are already stored, the runtime data is then not read.
+        """
+        if self.are_list_counts_stored:
+            return False
+        counts = self.get_stored_list_counts(runtime_data)
+        for element in LIST_ELEMENTS:
+            counts.setdefault('{}._count'.format(element), 0)
+        for name, count in counts.iteritems():
+            runtime_data[name] = max(get_count(runtime_data, name), count)
+        return True
+
+    def update_list_counts(self, runtime_data, data):
+        """
+        Maintain the `_count` elements of the lists `data` writes to in
+        `runtime_data`, so reading them is a lookup whatever the size of
+        the lists. Once the counts are stored, a list without a count has
+        no entries, its count follows from the highest index written.
+        """
+        for name, count in count_list_entries(data).iteritems():
+            runtime_data[name] = max(get_count(runtime_data, name), count)
 
     def resource_string(self, path):
         """Handy helper for getting resources from our kit."""
-        data = pkg_resources.resource_string(__name__, path)
-        return data.decode("utf8")
+        return resource_string(path)
 
     def render_template(self, template_path, context):
-        template_str = self.resource_string(template_path)
-        template = Template(template_str)
-        return template.render(Context(context))
+        return render_template(template_path, context)
 
     def get_fields_data(self, only_value=False, *fields):
 
@@ -341,16 +748,11 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
         #logger.info("Original: " + str(data))
 
         if 'scorm_pkg' in data and self.scorm_pkg:
-            pkg_url = self.fs.get_url(self.scorm_pkg)
+            pkg_url = self.get_launch_url(self.scorm_pkg)
         if 'scorm_pkg' in data and self.scorm_pkg == '' and self.scorm_file != 'old':
-            scorm_file_string = self.scorm_file[:22] + 'scorm/' + self.scorm_file[22:]
-            pkg_url = self.fs.get_url(scorm_file_string)
+            pkg_url = self.get_pkg_url(self.legacy_scorm_path, '')
         if pkg_url:
             #logger.info("Original URL: " + str(pkg_url))
-            if settings.DJFS['type'] == 's3fs':
-                parse = urlparse(pkg_url)
-                pkg_url = parse.path
-                pkg_url = urllib.unquote(pkg_url)
             data['scorm_pkg_value'] = pkg_url
             #logger.info("Return URL: " + str(pkg_url))
 
@@ -374,6 +776,120 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
 
         return data
 
+    @property
+    def legacy_scorm_path(self):
+        """Path in the block storage of packages uploaded by the old block."""
+        return self.scorm_file[:22] + 'scorm/' + self.scorm_file[22:]
+
+    def get_url_cache_key(self, path, storage):
+        # block storages are private to the block
+        namespace = storage or unicode(self.scope_ids.usage_id)
+        return hashlib.sha1(u'{}:{}'.format(namespace, path).encode('utf-8')).hexdigest()
+
+    def get_pkg_url(self, path, storage=None):
+        """
+        Url of file `path` of the packages of `storage`, the package storage
+        of the block by default. Resolved urls are kept in `url_cache`.
+        """
+        if storage is None:
+            storage = self.scorm_pkg_storage
+        key = self.get_url_cache_key(path, storage)
+        pkg_url = url_cache.get(key)
+        if pkg_url is None:
+            pkg_url = self.get_pkg_fs(storage).get_url(path)
+            if settings.DJFS['type'] == 's3fs':
+                parse = urlparse(pkg_url)
+                pkg_url = parse.path
+                pkg_url = urllib.unquote(pkg_url)
+            url_cache.set(key, pkg_url)
+        return pkg_url
+
+    def get_launch_url(self, path):
+        """Url the player loads file `path` of the current package from."""
+        if SCORM_SERVE_CONTENT:
+            return self.runtime.handler_url(self, 'scorm_content', path)
+        return self.get_pkg_url(path)
+
+    def get_content_variant(self, path, accept_encoding):
+        """
+        Pre-compressed sibling of file `path` acceptable to the client, as an
+        `(encoding, path)` pair, `(None, path)` when there is none.
+        """
+        accepted = set(e.split(';', 1)[0].strip().lower() for e in accept_encoding.split(','))
+        variants = load_variants(self.pkg_fs, self.pkg_id, self.pkg_cache_key).get(path.split('/', 1)[1], {})
+        for encoding, extension in VARIANT_EXTENSIONS:
+            if encoding in accepted and encoding in variants:
+                return encoding, path + extension
+        return None, path
+
+    @XBlock.handler
+    def scorm_content(self, request, suffix=''):
+        """
+        Serve file `suffix` of the current package, with conditional and
+        range requests support. Pre-compressed variants are served to the
+        clients accepting them, except for range requests.
+        """
+        try:
+            path = relpath(normpath(suffix))
+        except IllegalBackReference:
+            return Response(status=404)
+        if not self.scorm_pkg or not path.startswith(self.pkg_id + '/') or not self.pkg_fs.isfile(path):
+            return Response(status=404)
+
+        response = Response(content_type=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        # package directories are versioned by id, the files never change.
+        # Each encoding of a file is a different body, with its own tag.
+        etag = hashlib.sha1(u'{}:{}'.format(path, self.scorm_pkg_modified).encode('utf-8')).hexdigest()
+        response.etag = etag
+        last_modified = self.scorm_pkg_modified.replace(microsecond=0) if self.scorm_pkg_modified else None
+        response.last_modified = last_modified
+
+        # a range of another version of the file (If-Range) gets the whole file
+        ranged = bool(request.range) and response in request.if_range
+        encoding, content_path = None, path
+        if not ranged:
+            encoding, content_path = self.get_content_variant(path, request.headers.get('Accept-Encoding', ''))
+        if encoding:
+            response.etag = '{}-{}'.format(etag, encoding)
+        response.cache_control = 'private, max-age={}, immutable'.format(SCORM_CONTENT_MAX_AGE)
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.vary = ('Accept-Encoding',)
+
+        if request.if_none_match:
+            not_modified = response.etag in request.if_none_match
+        else:
+            not_modified = bool(last_modified and request.if_modified_since and
+                                last_modified <= request.if_modified_since)
+        if not_modified:
+            response.status = 304
+            return response
+
+        response.content_encoding = encoding
+        size = self.pkg_fs.getsize(content_path)
+        start, stop = 0, size
+        if ranged:
+            content_range = request.range.content_range(size)
+            if content_range is None:
+                response.status = 416
+                response.headers['Content-Range'] = 'bytes */{}'.format(size)
+                return response
+            start, stop = content_range.start, content_range.stop
+            response.status = 206
+            response.content_range = content_range
+
+        if request.method != 'HEAD':
+            response.app_iter = iter_file(self.pkg_fs, content_path, start, stop)
+        # after the body, setting it resets the length
+        response.content_length = stop - start
+        return response
+
+    def invalidate_pkg_urls(self):
+        """Forget the cached launch urls of the current package."""
+        if self.scorm_pkg:
+            url_cache.delete(self.get_url_cache_key(self.scorm_pkg, self.scorm_pkg_storage))
+        elif self.scorm_file != 'old':
+            url_cache.delete(self.get_url_cache_key(self.legacy_scorm_path, ''))
+
     def get_student_data(self):
         fields_data = self.get_fields_data(False, 'scorm_score', 'weight', 'ratio',
                                            'has_score', 'scorm_status', 'scorm_pkg', 'scorm_file', 'lesson_score', 'success_status', 'open_new_tab')
@@ -387,11 +903,54 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
         return fields_data
 
     def student_view(self, context=None):
+        if self.flush_runtime_buffer():
+            self.save()
         template = self.render_template('static/html/scormxblock.html', self.get_student_data())
         frag = Fragment(template)
         frag.add_css(self.resource_string("static/css/scormxblock.css"))
         frag.add_javascript(self.resource_string("static/js/src/scormxblock.js"))
-        frag.initialize_js('ScormXBlock', json_args=self.get_fields_data(True, 'scorm_pkg_version', 'scorm_pkg_modified', 'ratio', 'version_scorm', 'scorm_modified', 'open_new_tab'))
+        json_args = self.get_fields_data(True, 'scorm_pkg_version', 'scorm_pkg_modified', 'ratio', 'version_scorm', 'scorm_modified', 'open_new_tab')
+        json_args['scorm_runtime_snapshot'] = self.get_capped_runtime_snapshot(
+            json_args['scorm_pkg_version_value'], SCORM_SNAPSHOT_MAX_SIZE)
+        # the snapshot is the default SCO one, the player fetches the runtime
+        # data of the other SCOs when they are launched
+        json_args['scorm_navigation'] = self.get_navigation()
+        frag.initialize_js('ScormXBlock', json_args=json_args)
+        return frag
+
+    def get_capped_runtime_snapshot(self, package_version, max_size=None):
+        """
+        Resolved runtime snapshot to embed in the page, so the player needs no
+        handler call at launch. When it exceeds `max_size` bytes once encoded,
+        the biggest values are dropped until it fits.
+        """
+        snapshot = self.get_runtime_snapshot(package_version)
+        if max_size is None:
+            return snapshot
+
+        sizes = {k: len(json.dumps(v)) + len(k) for k, v in snapshot.iteritems()}
+        total = sum(sizes.itervalues())
+        for k in sorted(sizes, key=sizes.get, reverse=True):
+            if total <= max_size:
+                break
+            total -= sizes[k]
+            del snapshot[k]
+        return snapshot
+
+    def studio_view(self, context=None):
+        """Editor of the fields, with the options of the package uploads."""
+        _ = self.runtime.service(self, 'i18n').ugettext
+        frag = super(ScormXBlock, self).studio_view(context)
+        frag.add_content(self.render_template('static/html/studio_upload.html', {
+            'status_url': self.runtime.handler_url(self, 'studio_upload_status'),
+            'content_compatible_label': _('Keep learner progress'),
+            'content_compatible_help': _('The new package is compatible with the current one, the runtime data '
+                                         'of the learners is kept.'),
+            'async_label': _('Import in the background'),
+            'async_help': _('Import the package after the upload, for big packages.'),
+            'async_value': SCORM_IMPORT_ASYNC,
+        }))
+        frag.add_javascript(self.resource_string('static/js/src/studio_upload.js'))
         return frag
 
     def author_view(self, context):
@@ -403,49 +962,169 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
         _ = self.ugettext
         raise JsonHandlerError(400, _(msg))
 
-    @XBlock.json_handler
-    def scorm_get_value(self, data, suffix=''):
-        _ = self.ugettext
-        try:
-            name = data['name']
-            package_version = data['package_version']
-            package_date = data['package_date']
-        except KeyError:
-            self.raise_handler_error("missing parameters.")
+    @property
+    def runtime_buffer_key(self):
+        key = '{}.{}'.format(self.scope_ids.usage_id, self.runtime.user_id)
+        if self.active_sco:
+            key = '{}.{}'.format(key, self.active_sco)
+        return key
 
+    def get_current_runtime_data(self):
+        """
+        Stored runtime data with the commits still held in the write buffer.
+        """
+        buffered = runtime_buffer.peek(self.runtime_buffer_key)
+        if not buffered:
+            return self.scorm_runtime_data
+        runtime_data = dict(self.scorm_runtime_data)
+        buffered = {k: v for k, v in buffered.iteritems() if k not in SCORM_COMMIT_META_KEYS}
+        self.backfill_list_counts(runtime_data)
+        self.update_list_counts(runtime_data, buffered)
+        runtime_data.update(buffered)
+        return runtime_data
+
+    def get_runtime_defaults(self, package_version, runtime_data=None):
+        """
+        Return the runtime defaults of `package_version` with the learner and
+        launch specific values resolved.
+        """
+        if runtime_data is None:
+            runtime_data = self.get_current_runtime_data()
+        data_model = get_data_model(package_version)
+        if data_model is None:
+            self.raise_handler_error('error scorm package version')
+        defaults = dict(data_model.defaults)
+        if package_version == SCORM_VERSION.V12:
+            defaults['cmi.core.student_id'] = str(self.runtime.user_id)
+            defaults['cmi.core.student_name'] = self.get_learner_name()
+            if runtime_data.get('cmi.core.exit') == 'suspend':
+                defaults['cmi.core.entry'] = 'resume'
+        else:
+            defaults['cmi.learner_id'] = str(self.runtime.user_id)
+            defaults['cmi.learner_name'] = self.get_learner_name()
+            if runtime_data.get('cmi.exit') == 'suspend':
+                defaults['cmi.entry'] = 'resume'
+        defaults['cmi.launch_data'] = self.get_launch_data()
+        return defaults
+
+    def get_learner_name(self):
+        user_id = self.runtime.user_id
+        if user_id is None:
+            # anonymous learners
+            return ''
+        name = learner_cache.get(user_id)
+        if name is None:
+            user = self.runtime.service(self, 'user').get_current_user()
+            name = user.opt_attrs.get('edx-platform.username')
+            if name is None or user.opt_attrs.get('edx-platform.user_id') != user_id:
+                # imported here, the package is imported while the app registry loads
+                from django.contrib.auth.models import User
+                try:
+                    name = User.objects.get(id=user_id).username
+                except (User.DoesNotExist, ValueError):
+                    # anonymous user id of the previews
+                    return ''
+            learner_cache.set(user_id, name)
+        return name
+
+    def get_runtime_value(self, name, package_version, runtime_data=None):
+        if runtime_data is None:
+            runtime_data = self.get_current_runtime_data()
+        data_model = get_data_model(package_version)
+        if data_model is None:
+            self.raise_handler_error('error scorm package version')
+        if not data_model.is_readable(name):
+            return ''
+        default = data_model.get_default(name)
         if package_version == SCORM_VERSION.V12:
-            default = SCORM_12_RUNTIME_DEFAULT.get(name, '')
             if name == 'cmi.core.student_id':
                 default = str(self.runtime.user_id)
             elif name == 'cmi.core.student_name':
-                user = User.objects.get(id=self.runtime.user_id)
-                default = user.username
+                default = self.get_learner_name()
             elif name == 'cmi.core.entry':
-                if self.scorm_runtime_data.get('cmi.core.exit', None):
-                    if self.scorm_runtime_data.get('cmi.core.exit') == 'suspend':
-                        default = 'resume'
-        elif package_version == SCORM_VERSION.V2004:
-            default = SCORM_2004_RUNTIME_DEFAULT.get(name, '')
+                if runtime_data.get('cmi.core.exit') == 'suspend':
+                    default = 'resume'
+        else:
             if name == 'cmi.learner_id':
                 default = str(self.runtime.user_id)
             elif name == 'cmi.learner_name':
-                user = User.objects.get(id=self.runtime.user_id)
-                default = user.username
+                default = self.get_learner_name()
             elif name == 'cmi.entry':
-                if self.scorm_runtime_data.get('cmi.exit', None):
-                    if self.scorm_runtime_data.get('cmi.exit') == 'suspend':
-                        default = 'resume'
-        else:
-            self.raise_handler_error('error scorm package version')
+                if runtime_data.get('cmi.exit') == 'suspend':
+                    default = 'resume'
 
         if name == 'cmi.launch_data':
-            default = self.scorm_launch_data
+            default = self.get_launch_data()
+        if name in runtime_data:
+            return runtime_data[name]
+        if name.endswith('._count'):
+            if self.are_list_counts_stored:
+                # a list never written to
+                return 0
+            return self.get_stored_list_counts(runtime_data).get(name, 0)
+        value = self.get_list_value(name)
+        return value if value is not None else default
+
+    def get_runtime_snapshot(self, package_version):
+        """
+        Fully resolved runtime data: stored values merged over the defaults,
+        write only elements read as empty.
+        """
+        runtime_data = self.get_current_runtime_data()
+        snapshot = self.get_runtime_defaults(package_version, runtime_data)
+        if not self.are_list_counts_stored:
+            # stored before the counts were maintained on commit. The list
+            # entries in the interaction store are read on demand.
+            snapshot.update(self.get_stored_list_counts(runtime_data))
+        snapshot.update(runtime_data)
+        data_model = get_data_model(package_version)
+        for name in snapshot:
+            if not data_model.is_readable(name):
+                snapshot[name] = ''
+        return snapshot
+
+    @XBlock.json_handler
+    def scorm_get_value(self, data, suffix=''):
+        _ = self.ugettext
+        try:
+            name = data['name']
+            package_version = data['package_version']
+            package_date = data['package_date']
+        except KeyError:
+            self.raise_handler_error("missing parameters.")
+        self.activate_sco(data.get('sco'))
+
+        value = self.get_runtime_value(name, package_version)
+
+        if self.is_pkg_expired(package_date):
+            return {'error': _('scorm package expired, refresh page to get new content.')}
+
+        return {"value": value}
+
+    @XBlock.json_handler
+    def scorm_get_values(self, data, suffix=''):
+        """
+        Batched `scorm_get_value`, resolve all `names` in one request.
+
+        Without `names` the whole resolved runtime snapshot is returned, which
+        lets the player prefetch everything at `Initialize`.
+        """
+        _ = self.ugettext
+        try:
+            package_version = data['package_version']
+            package_date = data['package_date']
+        except KeyError:
+            self.raise_handler_error("missing parameters.")
+        self.activate_sco(data.get('sco'))
+        names = data.get('names')
 
         if self.is_pkg_expired(package_date):
             return {'error': _('scorm package expired, refresh page to get new content.')}
-        #logger.info('get_value: ' + str(self.scorm_runtime_data.get(name, default)))
 
-        return {"value": self.scorm_runtime_data.get(name, default)}
+        if names is None:
+            return {"values": self.get_runtime_snapshot(package_version)}
+        runtime_data = self.get_current_runtime_data()
+        return {"values": {name: self.get_runtime_value(name, package_version, runtime_data) for name in names}}
 
     def is_pkg_expired(self, package_date):
         return self.scorm_pkg_modified and package_date and str2dt(package_date) < self.scorm_pkg_modified
@@ -465,58 +1144,301 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
                 need_update = True
         return expired, need_update
 
-    @XBlock.json_handler
-    def scorm_commit(self, data, suffix=''):
+    @staticmethod
+    def get_commit_order(data):
+        session = data.get('commit_session', '')
+        try:
+            seq = int(data['commit_seq'])
+        except (KeyError, TypeError, ValueError):
+            seq = None
+        return session, seq
 
-        package_date = data.pop('package_date', '')
-        package_version = data.pop('package_version', '')
-        expired, need_update = self.is_runtime_data_expired(package_date)
-        if expired:
-            self.scorm_runtime_data = {}
-        if need_update:
-            self.scorm_runtime_data.update(data)
+    def is_commit_stale(self, session, seq):
+        """
+        Commits of a player session carry an increasing sequence number. A
+        commit more than `SCORM_COMMIT_WINDOW` numbers behind the last
+        applied one is ignored, values of later ones are checked one by one
+        by `get_superseded`.
+        """
+        if not session or seq is None:
+            # player without sequence numbers
+            return False
+        return session == self.scorm_commit_session and seq <= self.scorm_commit_seq - SCORM_COMMIT_WINDOW
 
-        self.scorm_runtime_modified = timezone.now()
+    def get_commit_write_key(self, name):
+        return u'{}:{}'.format(self.active_sco, name) if self.active_sco else name
 
-        self.update_scorm_status(data, package_version)
-        return self.get_fields_data(True, 'scorm_status', 'scorm_score')
+    def get_superseded(self, data, session, seq):
+        """
+        Names of commit `data` that a commit of the same player session with
+        a number not below `seq` already wrote: duplicated commits (beacon or
+        keepalive resends) write nothing and late ones only what is not newer.
+        """
+        if not session or seq is None or session != self.scorm_commit_session:
+            return []
+        writes = self.scorm_commit_writes
+        return [name for name in data
+                if name not in SCORM_COMMIT_META_KEYS and writes.get(self.get_commit_write_key(name), 0) >= seq]
+
+    def record_commit_writes(self, data, session, seq):
+        """Record the values commit `data` wrote, see `get_superseded`."""
+        if session != self.scorm_commit_session:
+            self.scorm_commit_session = session
+            self.scorm_commit_seq = 0
+            self.scorm_commit_writes = {}
+            # the session time reported by the packages starts over
+            sco_times = self.scorm_sco_times
+            for times in sco_times.itervalues():
+                times['session'] = 0
+            self.scorm_sco_times = sco_times
+        writes = self.scorm_commit_writes
+        for name in data:
+            writes[self.get_commit_write_key(name)] = seq
+        if seq > self.scorm_commit_seq:
+            self.scorm_commit_seq = seq
+            oldest = seq - SCORM_COMMIT_WINDOW
+            writes = {name: write_seq for name, write_seq in writes.iteritems() if write_seq > oldest}
+        self.scorm_commit_writes = writes
+
+    def is_score_changed(self, data):
+        """
+        Whether applying commit `data` would change the stored score or status.
+        """
+        if not any(k in data for k in SCORM_SCORE_KEYS):
+            return False
+        if self.has_submitted_answer() and not self.allows_rescore():
+            return False
+        status_data = dict(self.scorm_runtime_data)
+        status_data.update(data)
+        package_version = data.get('package_version')
+        if package_version == SCORM_VERSION.V12:
+            info = self.extract_runtime_info_12(status_data)
+        elif package_version == SCORM_VERSION.V2004:
+            info = self.extract_runtime_info_2004(status_data)
+        else:
+            return True
+        score = self.get_info_score(info)
+        if score is None:
+            return False
+        if self.scorm_publish_on_improvement and self.is_grade_lowered(score):
+            return False
+        return self.is_grade_changed(score) or info['status'] != self.scorm_status
+
+    def get_score_value(self, score):
+        if not score.raw_possible:
+            return None
+        return self.max_score() * score.raw_earned / score.raw_possible
+
+    def is_grade_changed(self, score):
+        """
+        Whether `score` differs from the stored score by more than
+        `SCORM_SCORE_EPSILON`. A first score always counts as a change.
+        """
+        value = self.get_score_value(score)
+        if value is None or not self.has_submitted_answer():
+            return True
+        return abs(value - self.scorm_score) > SCORM_SCORE_EPSILON
+
+    def is_grade_lowered(self, score):
+        value = self.get_score_value(score)
+        if value is None or not self.has_submitted_answer():
+            return False
+        return value < self.scorm_score - SCORM_SCORE_EPSILON
+
+    def buffer_runtime_data(self, data, flush):
+        """
+        Merge commit `data` into the write buffer of the learner.
 
-    @XBlock.json_handler
-    def scorm_enforce_commit(self, data, suffix=''):
+        Return the merged commit when it has to be written now: on `flush`,
+        when the buffer is due, or when the score changes. Otherwise it stays
+        buffered and None is returned.
+        """
+        key = self.runtime_buffer_key
+        with runtime_buffer.locked(key) as locked:
+            if not locked:
+                # another commit of the learner holds the buffer, the commit
+                # order keeps its values from overwriting newer ones
+                return data
+            entry = runtime_buffer.get(key)
+            if entry is None:
+                if flush:
+                    return data
+                entry = runtime_buffer.create()
+
+            session, seq = self.get_commit_order(data)
+            if not self.is_commit_stale(session, seq):
+                superseded = set(self.get_superseded(data, session, seq))
+                entry_session, entry_seq = self.get_commit_order(entry['data'])
+                if session and seq is not None and session == entry_session and seq <= entry_seq:
+                    # a late commit, the buffered values are newer
+                    superseded.update(entry['data'])
+                entry['data'].update((k, v) for k, v in data.iteritems() if k not in superseded)
+
+            if flush or runtime_buffer.is_due(entry) or self.is_score_changed(entry['data']):
+                runtime_buffer.delete(key)
+                return entry['data']
+            runtime_buffer.set(key, entry)
+            return None
+
+    def flush_runtime_buffer(self):
+        """
+        Write the commits held in the write buffer for all the SCOs of the
+        learner, so they are not lost when no later commit flushes them.
+        Return whether any was written, the fields have to be saved then.
+        """
+        if not runtime_buffer.enabled:
+            return False
+        active_sco = self.active_sco
+        written = False
+        for sco in self.get_sco_ids():
+            self.active_sco = sco
+            key = self.runtime_buffer_key
+            if runtime_buffer.get(key) is None:
+                continue
+            with runtime_buffer.locked(key) as locked:
+                entry = runtime_buffer.pop(key) if locked else None
+            if entry and entry['data']:
+                self.commit_runtime_data(dict(entry['data'], sco=sco))
+                written = True
+        self.active_sco = active_sco
+        return written
+
+    def commit_runtime_data(self, data, flush=True):
+        """
+        Apply a commit, `data` holds the changed runtime values only, along
+        with the package and sequence information of the player.
 
+        Without `flush` the commit may be held in the write buffer and
+        written later along with the next ones.
+        """
+        self.activate_sco(data.pop('sco', ''))
+        if runtime_buffer.enabled:
+            data = self.buffer_runtime_data(data, flush)
+            if data is None:
+                return self.get_fields_data(True, 'scorm_status', 'scorm_score')
+
+        session, seq = self.get_commit_order(data)
         package_date = data.pop('package_date', '')
         package_version = data.pop('package_version', '')
+        data.pop('commit_session', None)
+        data.pop('commit_seq', None)
+
+        superseded = []
+        if self.is_commit_stale(session, seq):
+            superseded = data.keys()
+            data.clear()
+        elif session and seq is not None:
+            superseded = self.get_superseded(data, session, seq)
+            for name in superseded:
+                del data[name]
+        if superseded and not data:
+            response_data = self.get_fields_data(True, 'scorm_status', 'scorm_score')
+            response_data['stale'] = True
+            return response_data
+        rejected = self.validate_runtime_data(data, package_version) if SCORM_VALIDATE_RUNTIME_DATA else {}
+        if session and seq is not None:
+            self.record_commit_writes(data, session, seq)
+
         expired, need_update = self.is_runtime_data_expired(package_date)
         if expired:
-            self.scorm_runtime_data = {}
+            self.clear_runtime_data()
         if need_update:
-            self.scorm_runtime_data.update(data)
+            runtime_data = self.scorm_runtime_data
+            if self.backfill_list_counts(runtime_data):
+                self.scorm_counted_scos = self.scorm_counted_scos + [self.active_sco]
+            self.update_list_counts(runtime_data, data)
+            self.update_total_time(runtime_data, data, package_version)
+            runtime_data.update(self.save_list_entries(data, runtime_data))
+            self.scorm_runtime_data = runtime_data
 
         self.scorm_runtime_modified = timezone.now()
 
-        self.update_scorm_status(data, package_version)
-        return self.get_fields_data(True, 'scorm_status', 'scorm_score')
+        if any(k in data for k in SCORM_SCORE_KEYS):
+            # deltas may not repeat unchanged score bounds
+            status_data = dict(self.scorm_runtime_data)
+            status_data.update(data)
+            self.update_scorm_status(status_data, package_version)
+        response_data = self.get_fields_data(True, 'scorm_status', 'scorm_score')
+        if rejected:
+            response_data['rejected'] = rejected
+        if superseded:
+            response_data['superseded'] = superseded
+        return response_data
+
+    def update_total_time(self, runtime_data, data, package_version):
+        """
+        Accumulate the session time of commit `data` into the time of the
+        active SCO, and its total time element in `runtime_data`, and update
+        `scorm_total_time`. The package reports the time of the whole
+        session on every commit, up to the final one at terminate, so only
+        the part not accumulated yet is added.
+        """
+        if package_version == SCORM_VERSION.V12:
+            session_name, total_name, format_time = 'cmi.core.session_time', 'cmi.core.total_time', format_timespan
+        elif package_version == SCORM_VERSION.V2004:
+            session_name, total_name, format_time = 'cmi.session_time', 'cmi.total_time', format_duration
+        else:
+            return
+        seconds = parse_duration(data.get(session_name))
+        if seconds is None:
+            return
+        seconds = int(round(seconds))
+        previous = self.get_aggregated()
+        sco_times = self.scorm_sco_times
+        times = sco_times.get(self.active_sco)
+        if times is None:
+            # total time stored before it was accumulated
+            times = sco_times[self.active_sco] = {
+                'total': int(round(parse_duration(runtime_data.get(total_name)) or 0)),
+                'session': 0,
+            }
+        if seconds < times['session']:
+            # a new attempt of the SCO in the same player session
+            times['session'] = 0
+        times['total'] += seconds - times['session']
+        times['session'] = seconds
+        self.scorm_sco_times = sco_times
+        self.scorm_total_time = sum(sco['total'] for sco in sco_times.itervalues())
+        runtime_data[total_name] = format_time(times['total'])
+        self.update_aggregated(previous)
+
+    def validate_runtime_data(self, data, package_version):
+        """
+        Drop the values of commit `data` the data model of `package_version`
+        refuses, and return them as `{name: reason}`.
+        """
+        data_model = get_data_model(package_version)
+        if data_model is None:
+            # commits sent on unload do not carry the package version
+            return {}
+        rejected = {}
+        for name, value in data.items():
+            reason = data_model.validate(name, value)
+            if reason is not None:
+                rejected[name] = reason
+                del data[name]
+        if rejected:
+            logger.info('user %s, block %s: rejected runtime data %s',
+                        self.runtime.user_id, self.scope_ids.usage_id, rejected)
+        return rejected
+
+    @XBlock.json_handler
+    def scorm_commit(self, data, suffix=''):
+        return self.commit_runtime_data(data)
+
+    @XBlock.json_handler
+    def scorm_enforce_commit(self, data, suffix=''):
+        return self.commit_runtime_data(data, flush=False)
 
     @XBlock.handler
     def scorm_ios_commit(self, request, suffix=''):
 
         post_data = request.POST.copy()
         post_data.pop('csrfmiddlewaretoken', '')
-        package_date = post_data.pop('package_date', '')
-        package_version = post_data.pop('package_version', '')
-        expired, need_update = self.is_runtime_data_expired(package_date)
         update_data = {}
         for x,y in post_data.iteritems():
             update_data[x] = y
-        if expired:
-            self.scorm_runtime_data = {}
-        if need_update:
-            self.scorm_runtime_data.update(update_data)
-
-        self.scorm_runtime_modified = timezone.now()
-
-        self.update_scorm_status(update_data, package_version)
-        response_data = self.get_fields_data(True, 'scorm_status', 'scorm_score')
+        response_data = self.commit_runtime_data(update_data)
         return Response(json_body=response_data, content_type='application/json')
 
     @XBlock.handler
@@ -530,10 +1452,13 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
     @staticmethod
     def extract_runtime_info_12(data):
         info = {'status': SCORM_STATUS.IN_PROGRESS}
-        if 'cmi.core.score.raw' in data:
+        # SCORM 1.2 scores may be blank
+        if data.get('cmi.core.score.raw', '') != '':
             info["raw"] = float(data['cmi.core.score.raw'])
-            info["maxi"] = float(data.get('cmi.core.score.max', 1.0))
-            info["mini"] = float(data.get('cmi.core.score.min', 0.0))
+            score_max = data.get('cmi.core.score.max', '')
+            score_min = data.get('cmi.core.score.min', '')
+            info["maxi"] = float(score_max) if score_max != '' else 1.0
+            info["mini"] = float(score_min) if score_min != '' else 0.0
 
         lesson_status = data.get('cmi.core.lesson_status', SCORM_STATUS.IN_PROGRESS)
 
@@ -564,6 +1489,18 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
 
         return info
 
+    @staticmethod
+    def get_info_score(info):
+        """
+        Score of the runtime `info` of a commit. None when it carries no
+        score, or an empty score range (max equal to min) that no score
+        can be computed from.
+        """
+        if 'raw' not in info or info['maxi'] == info['mini']:
+            return None
+        return Score(raw_earned=(info["raw"] - info["mini"]),
+                     raw_possible=(info["maxi"] - info["mini"]))
+
     def update_scorm_status(self, data, version):
         if version == SCORM_VERSION.V12:
             info = self.extract_runtime_info_12(data)
@@ -572,16 +1509,93 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
         else:
             self.raise_handler_error('error scorm pkg version')
 
-        score = None
-        if 'raw' in info:
-            score = Score(raw_earned=(info["raw"] - info["mini"]),
-                          raw_possible=(info["maxi"] - info["mini"]))
-
+        score = self.get_info_score(info)
         if score and (not self.has_submitted_answer() or self.allows_rescore()):
-            self.set_score(score)
-            self._publish_grade(self.get_score())
+            previous = self.get_aggregated()
+            score, status, sco_scores = self.rollup_score(score, info['status'])
+            if self.scorm_publish_on_improvement and self.is_grade_lowered(score):
+                # keep the best attempt, score and status alike
+                grade_counters.incr('suppressed')
+                return
+            if sco_scores:
+                self.scorm_sco_scores = sco_scores
+
+            if self.is_grade_changed(score):
+                self.set_score(score)
+                self._publish_grade(self.get_score())
+                grade_counters.incr('published')
+            else:
+                grade_counters.incr('suppressed')
+
+            self.scorm_status = status
+            self.update_aggregated(previous)
 
-            self.scorm_status = info['status']
+    def rollup_score(self, score, status):
+        """
+        Score and status of the block once `score` and `status` of the active
+        SCO are rolled up with the last ones of the other SCOs: the mean of
+        the SCO scores, failed when a SCO failed, passed when all of them
+        passed, in progress otherwise. SCOs that never reported a score do
+        not count. Return them with the SCO results to store, empty while
+        only the default SCO reported, the block score and status are its own.
+        """
+        sco_scores = dict(self.scorm_sco_scores)
+        if not sco_scores:
+            if not self.active_sco:
+                return score, status, sco_scores
+            if self.has_submitted_answer():
+                # the block score and status are those of the default SCO
+                sco_scores[''] = {'score': self.scorm_score / self.max_score(), 'status': self.scorm_status}
+        sco_scores[self.active_sco] = {'score': score.raw_earned / score.raw_possible, 'status': status}
+        results = sco_scores.values()
+        statuses = set(result['status'] for result in results)
+        if SCORM_STATUS.FAILED in statuses:
+            status = SCORM_STATUS.FAILED
+        elif statuses == {SCORM_STATUS.SUCCEED}:
+            status = SCORM_STATUS.SUCCEED
+        else:
+            status = SCORM_STATUS.IN_PROGRESS
+        earned = sum(result['score'] for result in results) / len(results)
+        return Score(raw_earned=earned, raw_possible=1.0), status, sco_scores
+
+    def get_aggregated(self):
+        """
+        What the learner counts for in the aggregated results of the block,
+        see `aggregates`. Learners counted by `scorm_rebuild_aggregates`
+        before it was stored have it derived from their state the same way.
+        """
+        if self.scorm_aggregated:
+            return self.scorm_aggregated
+        if self.scorm_status == SCORM_STATUS.UNATTENDED:
+            return None
+        return get_contribution(self.scorm_status, self.scorm_score, self.get_learner_time())
+
+    def get_learner_time(self):
+        if self.scorm_total_time:
+            return self.scorm_total_time
+        return get_runtime_total_time(decode_runtime_data(self._scorm_runtime_data))
+
+    def update_aggregated(self, previous):
+        """
+        Signal the change of what the learner counts for in the aggregated
+        results of the block from `previous`, see `aggregates`.
+        """
+        current = get_contribution(self.scorm_status, self.scorm_score, self.get_learner_time())
+        if current == previous:
+            return
+        self.scorm_aggregated = current or {}
+        scorm_status_changed.send(sender=self.__class__, block_key=unicode(self.scope_ids.usage_id),
+                                  previous=previous, current=current)
+
+    @XBlock.json_handler
+    def scorm_aggregates(self, data, suffix=''):
+        """
+        Learners of the block by status, score histogram and mean time, for
+        the course staff.
+        """
+        if not getattr(self.runtime, 'user_is_staff', False):
+            raise JsonHandlerError(403, self.ugettext('only course staff can read the results'))
+        return get_aggregates(unicode(self.scope_ids.usage_id))
 
     @XBlock.handler
     def ping(self, request, suffix=''):
@@ -597,3 +1611,25 @@ class ScormXBlock(StudioEditableXBlockMixin, ScorableXBlockMixin, XBlock):
                 </vertical_demo>
              """),
         ]
+
+
+def apply_import_job(job_id, result, usage_key, user_id):
+    """
+    Switch block `usage_key` to the package imported by job `job_id` and
+    save it, when the Studio request submitting the job saved the block
+    with it. Otherwise the job is applied by `studio_upload_status`, once
+    that request is done, without blocking the executor in between.
+    """
+    if modulestore is None:
+        return
+    from opaque_keys.edx.keys import UsageKey
+    usage_key = UsageKey.from_string(usage_key)
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, usage_key.course_key):
+        block = store.get_item(usage_key)
+        if block.scorm_import_job != job_id:
+            return
+        block._apply_scorm_import(result)
+        block.scorm_import_job = ''
+        store.update_item(block, user_id)
+    save_job(job_id, applied=True)
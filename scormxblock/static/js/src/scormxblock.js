@@ -6,6 +6,7 @@ function ScormXBlock(runtime, element, settings) {
     const ios_commitUrl = runtime.handlerUrl(element, 'scorm_ios_commit');
     const enforce_commitUrl = runtime.handlerUrl(element, 'scorm_enforce_commit');
     const getValueUrl = runtime.handlerUrl(element, 'scorm_get_value');
+    const getValuesUrl = runtime.handlerUrl(element, 'scorm_get_values');
     const syncScoreUrl = runtime.handlerUrl(element, 'sync_score_value')
     const package_version = settings['scorm_pkg_version_value'];
     const package_date = settings['scorm_pkg_modified_value'];
@@ -13,6 +14,22 @@ function ScormXBlock(runtime, element, settings) {
     const open_new_tab = settings['open_new_tab_value'];
     var timerId;
     let pendingValues = null;
+    // values already sent in this session, setting them again is not committed
+    const committedValues = {};
+    // commits carry an increasing sequence number per player session so the
+    // server can drop duplicated or late ones
+    const commitSession = Math.random().toString(36).slice(2) + Date.now().toString(36);
+    let commitSeq = 0;
+    // resolved runtime values embedded by student_view (or prefetched at
+    // Initialize), GetValue reads from here. Values too big to be embedded
+    // are fetched on demand.
+    let runtimeValues = settings['scorm_runtime_snapshot'] || null;
+    // multi-SCO packages: item tree and launch url of every SCO. The active
+    // SCO is sent along with every request, '' stands for the default one.
+    const navigation = settings['scorm_navigation'] || null;
+    let currentSco = '';
+    // identifier of the SCO to launch once the current one is unloaded
+    let scoSwitch = null;
 
     function scormInit() {
         var $scormFrame = $('#scorm-object-frame')
@@ -38,6 +55,10 @@ function ScormXBlock(runtime, element, settings) {
             })
         }
 
+        if (navigation !== null) {
+            renderNavigation();
+        }
+
         // Get runtime score value due to unexpected terminal action
         timerId = setInterval(Enforce_Commit, 2000);
         setTimeout(function(){ syncScoreValue()},2000);
@@ -45,7 +66,81 @@ function ScormXBlock(runtime, element, settings) {
         setTimeout(function(){ syncScoreValue()},10000);
     }
 
+    function renderNavigation() {
+        const $nav = $('<ul class="scorm-navigation"></ul>');
+        const addItems = function ($list, items) {
+            items.forEach(function (item) {
+                const $item = $('<li class="scorm-navigation-item"></li>');
+                if (item.sco) {
+                    $('<a href="#"></a>').text(item.title || item.identifier)
+                        .attr('data-sco', item.identifier)
+                        .appendTo($item);
+                } else {
+                    $('<span></span>').text(item.title || item.identifier).appendTo($item);
+                }
+                if (item.items.length) {
+                    addItems($('<ul></ul>').appendTo($item), item.items);
+                }
+                $list.append($item);
+            });
+        };
+        addItems($nav, navigation['tree']);
+        $nav.find('a[data-sco="' + navigation['default_sco'] + '"]').addClass('active');
+        $nav.on('click', 'a[data-sco]', function (event) {
+            event.preventDefault();
+            $nav.find('a.active').removeClass('active');
+            $(this).addClass('active');
+            launchSco($(this).attr('data-sco'));
+        });
+        $('.scorm-navigation-container', element).append($nav);
+    }
+
+    function launchSco(identifier) {
+        const sco = identifier === navigation['default_sco'] ? '' : identifier;
+        if (sco === currentSco && scoSwitch === null) {
+            return;
+        }
+        const $frame = $('#scorm-object-frame', element);
+        if (!$frame.length) {
+            switchSco(sco);
+            $('.launch-button a', element).attr('href', navigation['urls'][identifier]);
+            return;
+        }
+        const switching = scoSwitch !== null;
+        scoSwitch = identifier;
+        if (switching) {
+            return;
+        }
+        // the SCO being left is unloaded first: its last SetValue and its
+        // Terminate, sent on unload, are committed to it and not to the next one
+        $frame.one('load', function () {
+            const target = scoSwitch;
+            scoSwitch = null;
+            switchSco(target === navigation['default_sco'] ? '' : target);
+            $frame.attr('src', navigation['urls'][target]);
+        });
+        $frame.attr('src', 'about:blank');
+    }
+
+    function switchSco(sco) {
+        Commit('');
+        clearInterval(timerId);
+        currentSco = sco;
+        runtimeValues = null;
+        for (var name in committedValues) {
+            delete committedValues[name];
+        }
+        initPendingValues();
+        timerId = setInterval(Enforce_Commit, 2000);
+    }
+
     function Initialize(value) {
+        if (runtimeValues === null) {
+            runtimeValues = fetchRuntimeValues();
+        }
+        if (runtimeValues !== null) {
+            return "true";
+        }
         return pingServer() ? "true": "false";
     }
 
@@ -56,6 +151,9 @@ function ScormXBlock(runtime, element, settings) {
     }
 
     function GetValue(name) {
+        if (runtimeValues !== null && runtimeValues.hasOwnProperty(name)) {
+            return runtimeValues[name];
+        }
         const data = getPackageData();
         data['name'] = name;
         const resp = $.ajax({
@@ -72,10 +170,34 @@ function ScormXBlock(runtime, element, settings) {
     }
 
     function SetValue(name, value) {
+        if (!pendingValues.hasOwnProperty(name) && committedValues[name] === String(value)) {
+            return 'true';
+        }
         pendingValues[name] = value;
+        if (runtimeValues !== null) {
+            runtimeValues[name] = value;
+            updateListCounts(name);
+        }
         return 'true';
     }
 
+    // `_count` of the lists `name` is an entry of, as the server maintains
+    // them on commit: cmi.interactions.3.id makes 4 interactions
+    function updateListCounts(name) {
+        if (name.indexOf('cmi.') !== 0) {
+            return;
+        }
+        const indexes = /\.(\d+)(?=\.)/g;
+        let match;
+        while ((match = indexes.exec(name)) !== null) {
+            const countName = name.slice(0, match.index) + '._count';
+            const count = parseInt(match[1], 10) + 1;
+            if (!(Number(runtimeValues[countName]) >= count)) {
+                runtimeValues[countName] = count;
+            }
+        }
+    }
+
     function CheckChrome() {
         var isChromium = window.chrome;
         var winNav = window.navigator;
@@ -159,13 +281,14 @@ function ScormXBlock(runtime, element, settings) {
     function Extra_Commit() {
         if (CheckChrome() || CheckSafari() && !CheckSafariMobile()) {
             const csrftoken = GetCookie('csrftoken');
+            const values = pendingValues;
             fetch(commitUrl, {
                 method: 'POST',
                 headers: {
                   'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8',
                   'X-CSRFToken': csrftoken
                 },
-                body: JSON.stringify(pendingValues),
+                body: JSON.stringify(values),
                 credentials: 'same-origin',
                 keepalive: true
             })
@@ -186,10 +309,14 @@ function ScormXBlock(runtime, element, settings) {
                 }
               })
               .then(function(data) {
+                if (!data) {
+                  return;
+                }
                 if (typeof data['scorm_score_value'] !== "undefined") {
                   $(".lesson_score", element).html(data['scorm_score_value']);
                 }
                 $(".success_status", element).html(data['scorm_status_value']);
+                applyCommitResponse(values, data);
               }); 
             initPendingValues();
             return 'true';
@@ -204,16 +331,18 @@ function ScormXBlock(runtime, element, settings) {
             initPendingValues();
             return 'true';
         } else {
+            const values = pendingValues;
             $.ajax({
                 type: "POST",
                 url: commitUrl,
-                data: JSON.stringify(pendingValues),
+                data: JSON.stringify(values),
                 async: false,
                 success: function (response) {
                     if (typeof response['scorm_score_value'] !== "undefined") {
                         $(".lesson_score", element).html(response['scorm_score_value']);
                     }
                     $(".success_status", element).html(response['scorm_status_value']);
+                    applyCommitResponse(values, response);
                 }
             });
             initPendingValues();
@@ -222,17 +351,19 @@ function ScormXBlock(runtime, element, settings) {
     }
 
     function Enforce_Commit() {
-        if (('cmi.score.raw' in pendingValues && 'cmi.score.max' in pendingValues && 'cmi.score.min' in pendingValues) || ('cmi.core.score.raw' in pendingValues && 'cmi.core.score.max' in pendingValues && 'cmi.core.score.min' in pendingValues) || ('cmi.score.scaled' in pendingValues)) {
+        if (('cmi.score.raw' in pendingValues) || ('cmi.core.score.raw' in pendingValues) || ('cmi.score.scaled' in pendingValues)) {
+            const values = pendingValues;
             $.ajax({
                 type: "POST",
                 url: enforce_commitUrl,
-                data: JSON.stringify(pendingValues),
+                data: JSON.stringify(values),
                 async: false,
                 success: function (response) {
                     if (typeof response['scorm_score_value'] !== "undefined") {
                         $(".lesson_score", element).html(response['scorm_score_value']);
                     }
                     $(".success_status", element).html(response['scorm_status_value']);
+                    applyCommitResponse(values, response);
                 }
             });
             initPendingValues();  
@@ -241,16 +372,18 @@ function ScormXBlock(runtime, element, settings) {
     }
 
     function Commit(value) {
+        const values = pendingValues;
         $.ajax({
             type: "POST",
             url: commitUrl,
-            data: JSON.stringify(pendingValues),
+            data: JSON.stringify(values),
             async: false,
             success: function (response) {
                 if (typeof response['scorm_score_value'] !== "undefined") {
                     $(".lesson_score", element).html(response['scorm_score_value']);
                 }
                 $(".success_status", element).html(response['scorm_status_value']);
+                applyCommitResponse(values, response);
             }
         });
         initPendingValues();
@@ -308,8 +441,32 @@ function ScormXBlock(runtime, element, settings) {
         // }
     }    
 
+    // values of a commit the server applied are not sent again when set to
+    // the same value, the ones it refused are not kept and GetValue reads the
+    // stored ones again
+    function applyCommitResponse(values, response) {
+        if (response['stale']) {
+            return;
+        }
+        const rejected = response['rejected'] || {};
+        const superseded = response['superseded'] || [];
+        for (var name in values) {
+            if (!rejected.hasOwnProperty(name) && superseded.indexOf(name) === -1) {
+                committedValues[name] = String(values[name]);
+            }
+        }
+        if (runtimeValues !== null) {
+            for (name in rejected) {
+                delete runtimeValues[name];
+            }
+        }
+    }
+
     function initPendingValues(){
+        commitSeq += 1;
         pendingValues = getPackageData();
+        pendingValues['commit_session'] = commitSession;
+        pendingValues['commit_seq'] = commitSeq;
     }
 
 
@@ -354,11 +511,30 @@ function ScormXBlock(runtime, element, settings) {
     function getPackageData() {
         return {
             'package_date': package_date,
-            'package_version': package_version
+            'package_version': package_version,
+            'sco': currentSco
         }
     }
 
 
+    function fetchRuntimeValues() {
+        const resp = $.ajax({
+            type: "POST",
+            url: getValuesUrl,
+            data: JSON.stringify(getPackageData()),
+            async: false
+        });
+        if (resp.status !== 200) {
+            return null;
+        }
+        const content = JSON.parse(resp.responseText);
+        if(content.error) {
+            alert(content.error)
+            return null;
+        }
+        return content.values;
+    }
+
     function pingServer() {
         const resp = $.ajax({
             type: "GET",
@@ -0,0 +1,63 @@
+/* Options of the package uploads of the SCORM editor, sent along with the
+ * package the editor posts to the `studio_upload_files` handler. A package
+ * imported in the background (202 response) is followed through the
+ * `studio_upload_status` handler, which switches the block to it once done.
+ */
+(function($) {
+    "use strict";
+    if (window.ScormStudioUploadOptions) {
+        return;
+    }
+    window.ScormStudioUploadOptions = true;
+
+    var pollInterval = 2000;
+
+    function showStatus($options, text) {
+        $options.find('.scorm-upload-status').text(text);
+    }
+
+    function pollImport($options, jobId) {
+        $.ajax({
+            url: $options.data('status-url'),
+            type: 'POST',
+            contentType: 'application/json',
+            dataType: 'json',
+            data: JSON.stringify({job_id: jobId})
+        }).done(function(job) {
+            if (job.state === 'failed') {
+                showStatus($options, gettext('Import failed: ') + job.error);
+            } else if (job.state === 'done' && job.applied) {
+                showStatus($options, gettext('Package imported.'));
+            } else {
+                if (job.total_entries) {
+                    showStatus($options, interpolate(gettext('Importing the package: %(entries)s of %(total)s files'),
+                                                     {entries: job.entries, total: job.total_entries}, true));
+                } else {
+                    showStatus($options, gettext('Importing the package...'));
+                }
+                setTimeout(function() { pollImport($options, jobId); }, pollInterval);
+            }
+        }).fail(function() {
+            showStatus($options, gettext('Could not read the state of the package import.'));
+        });
+    }
+
+    $.ajaxPrefilter(function(options, originalOptions, jqXHR) {
+        if (!options.url || options.url.indexOf('studio_upload_files') === -1 || !(options.data instanceof FormData)) {
+            return;
+        }
+        var $options = $('.scorm-upload-options').last();
+        if ($options.find('input[name=content_compatible]').prop('checked')) {
+            options.data.append('content_compatible', '1');
+        }
+        if ($options.find('input[name=async]').prop('checked')) {
+            options.data.append('async', '1');
+        }
+        jqXHR.done(function(response, textStatus, xhr) {
+            if (xhr.status === 202) {
+                var job = typeof response === 'string' ? JSON.parse(response) : response;
+                pollImport($options, job.job_id);
+            }
+        });
+    });
+})(jQuery);
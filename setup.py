@@ -25,6 +25,9 @@ setup(
     description='scormxblock XBlock',   # TODO: write a better description.
     packages=[
         'scormxblock',
+        'scormxblock.management',
+        'scormxblock.management.commands',
+        'scormxblock.migrations',
     ],
     install_requires=[
         'XBlock==1.2.9',
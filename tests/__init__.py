@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests of `scormxblock`.
+
+Run from the repository root with `python -m unittest discover -s tests -t .`
+so that this package is imported, and django set up with the tables of the
+models created, before the tests.
+"""
+import django
+from django.conf import settings
+from django.core.management import call_command
+
+if not settings.configured:
+    settings.configure(
+        INSTALLED_APPS=['django.contrib.auth', 'django.contrib.contenttypes', 'scormxblock'],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates'}],
+    )
+django.setup()
+call_command('migrate', verbosity=0)
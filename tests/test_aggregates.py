@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from django.core.cache import caches
+
+from scormxblock.aggregates import (
+    SCORM_AGGREGATES_CACHE, CacheAggregateStore, ModelAggregateStore, get_contribution, get_counters,
+    status_counter
+)
+from scormxblock.scorm_default import SCORM_STATUS
+
+BLOCK_KEY = u'block-v1:edX+Demo+2020+type@scormxblock+block@aggregates'
+FAILED = status_counter(SCORM_STATUS.FAILED)
+
+
+class StoreTestMixin(object):
+
+    def setUp(self):
+        self.store.set(BLOCK_KEY, {})
+
+    def update(self, previous, current):
+        deltas = get_counters(current)
+        deltas.subtract(get_counters(previous))
+        self.store.update(BLOCK_KEY, {name: delta for name, delta in deltas.items() if delta})
+
+    def test_update(self):
+        passed = get_contribution(SCORM_STATUS.SUCCEED, 0.9, 60)
+        self.update(None, get_contribution(SCORM_STATUS.IN_PROGRESS, 0.2, 30))
+        self.update(None, get_contribution(SCORM_STATUS.IN_PROGRESS, 0.3))
+        self.update(get_contribution(SCORM_STATUS.IN_PROGRESS, 0.2, 30), passed)
+        counters, complete = self.store.get(BLOCK_KEY)
+        self.assertTrue(complete)
+        self.assertEqual(counters['learners'], 2)
+        self.assertEqual(counters[status_counter(SCORM_STATUS.SUCCEED)], 1)
+        self.assertEqual(counters[status_counter(SCORM_STATUS.IN_PROGRESS)], 1)
+        self.assertEqual(counters['histogram.9'], 1)
+        self.assertEqual(counters['histogram.2'], 0)
+        self.assertEqual((counters['time.total'], counters['time.count']), (60, 1))
+
+    def test_set(self):
+        self.update(None, get_contribution(SCORM_STATUS.FAILED, 0.1))
+        self.store.set(BLOCK_KEY, {'learners': 3, FAILED: 3})
+        counters, complete = self.store.get(BLOCK_KEY)
+        self.assertEqual((counters['learners'], counters[FAILED], counters['histogram.1']), (3, 3, 0))
+        self.assertTrue(complete)
+
+
+class CacheAggregateStoreTest(StoreTestMixin, unittest.TestCase):
+
+    store = CacheAggregateStore()
+
+    def test_evicted(self):
+        self.update(None, get_contribution(SCORM_STATUS.FAILED, 0.1))
+        caches[SCORM_AGGREGATES_CACHE].delete(self.store._cache_key(BLOCK_KEY, 'learners'))
+        self.update(get_contribution(SCORM_STATUS.FAILED, 0.1), None)
+        counters, complete = self.store.get(BLOCK_KEY)
+        self.assertFalse(complete)
+        self.store.set(BLOCK_KEY, {})
+        self.assertTrue(self.store.get(BLOCK_KEY)[1])
+
+
+class ModelAggregateStoreTest(StoreTestMixin, unittest.TestCase):
+
+    store = ModelAggregateStore()
+
+    def test_created(self):
+        self.store._model().objects.filter(block_key=BLOCK_KEY).delete()
+        self.update(None, get_contribution(SCORM_STATUS.FAILED, 0.1))
+        self.update(None, get_contribution(SCORM_STATUS.FAILED, 0.15))
+        counters, _ = self.store.get(BLOCK_KEY)
+        self.assertEqual((counters['learners'], counters[FAILED], counters['histogram.1']), (2, 2, 2))
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from django.apps import apps
+from django.core.management import get_commands
+
+
+class AppTest(unittest.TestCase):
+    # the tests package runs django.setup() with scormxblock installed
+
+    def test_installed(self):
+        self.assertTrue(apps.is_installed('scormxblock'))
+        self.assertEqual(apps.get_model('scormxblock', 'ScormListEntry')._meta.app_label, 'scormxblock')
+
+    def test_management_commands(self):
+        commands = get_commands()
+        for name in ('scorm_export_progress', 'scorm_gc_packages', 'scorm_rebuild_aggregates', 'scorm_rescore'):
+            self.assertEqual(commands.get(name), 'scormxblock', name)
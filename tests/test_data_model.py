@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from scormxblock.data_model import (
+    SCORM_12_DATA_MODEL, SCORM_2004_DATA_MODEL, DataModel, count_list_entries, get_data_model
+)
+from scormxblock.scorm_default import SCORM_VERSION
+
+
+class DataModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = DataModel(
+            {
+                'cmi.location': '',
+                'cmi.exit': '',
+                'cmi.total_time': 'PT0S',
+                'cmi.interactions._count': 0,
+                'cmi.interactions.n.id': '',
+                'cmi.interactions.n.objectives.n.id': 'objective',
+            },
+            read_only=('cmi.total_time',),
+            write_only=('cmi.exit',),
+            checks={'cmi.exit': lambda value: value in ('suspend', '')},
+        )
+
+    def test_lookup(self):
+        self.assertIsNotNone(self.model.lookup('cmi.location'))
+        self.assertIsNotNone(self.model.lookup('cmi.interactions.12.id'))
+        self.assertIs(self.model.lookup('cmi.interactions.3.id'), self.model.lookup('cmi.interactions.n.id'))
+        self.assertIsNone(self.model.lookup('cmi.interactions.x.id'))
+        self.assertIsNone(self.model.lookup('cmi.interactions.3'))
+        self.assertIsNone(self.model.lookup('cmi.unknown'))
+
+    def test_get_default(self):
+        self.assertEqual(self.model.get_default('cmi.total_time'), 'PT0S')
+        self.assertEqual(self.model.get_default('cmi.interactions.1.objectives.4.id'), 'objective')
+        self.assertEqual(self.model.get_default('cmi.unknown'), '')
+        self.assertIsNone(self.model.get_default('cmi.unknown', None))
+
+    def test_validate(self):
+        self.assertIsNone(self.model.validate('cmi.location', 'page 3'))
+        self.assertIsNone(self.model.validate('cmi.exit', 'suspend'))
+        self.assertEqual(self.model.validate('cmi.exit', 'away'), 'invalid value')
+        self.assertEqual(self.model.validate('cmi.total_time', 'PT1S'), 'read only')
+        self.assertEqual(self.model.validate('cmi.interactions._count', 3), 'read only')
+        self.assertIsNone(self.model.validate('cmi.unknown', 'value'))
+
+    def test_is_readable(self):
+        self.assertTrue(self.model.is_readable('cmi.location'))
+        self.assertTrue(self.model.is_readable('cmi.total_time'))
+        self.assertFalse(self.model.is_readable('cmi.exit'))
+        self.assertTrue(self.model.is_readable('cmi.unknown'))
+
+
+class ScormDataModelsTest(unittest.TestCase):
+
+    def test_get_data_model(self):
+        self.assertIs(get_data_model(SCORM_VERSION.V12), SCORM_12_DATA_MODEL)
+        self.assertIs(get_data_model(SCORM_VERSION.V2004), SCORM_2004_DATA_MODEL)
+        self.assertIsNone(get_data_model('SCORM3'))
+
+    def test_scorm_12(self):
+        model = SCORM_12_DATA_MODEL
+        self.assertEqual(model.get_default('cmi.core.total_time'), '0000:00:00.00')
+        self.assertEqual(model.validate('cmi.core.lesson_status', 'passed'), None)
+        self.assertEqual(model.validate('cmi.core.lesson_status', 'unknown'), 'invalid value')
+        self.assertEqual(model.validate('cmi.core.score.raw', ''), None)
+        self.assertEqual(model.validate('cmi.core.score.raw', 'ten'), 'invalid value')
+        self.assertEqual(model.validate('cmi.core.session_time', '0000:10:00'), None)
+        self.assertEqual(model.validate('cmi.core.session_time', '10 minutes'), 'invalid value')
+        self.assertEqual(model.validate('cmi.core.student_id', '42'), 'read only')
+        self.assertEqual(model.validate('cmi.interactions.0.result', 'wrong'), None)
+        self.assertEqual(model.validate('cmi.interactions.0.result', '0.5'), None)
+        self.assertFalse(model.is_readable('cmi.interactions.0.student_response'))
+
+    def test_scorm_2004(self):
+        model = SCORM_2004_DATA_MODEL
+        self.assertEqual(model.validate('cmi.score.scaled', '0.5'), None)
+        self.assertEqual(model.validate('cmi.score.scaled', '2'), 'invalid value')
+        self.assertEqual(model.validate('cmi.score.scaled', 'nan'), 'invalid value')
+        self.assertEqual(model.validate('cmi.session_time', 'PT1H30M'), None)
+        self.assertEqual(model.validate('cmi.total_time', 'PT1H'), 'read only')
+        self.assertEqual(model.validate('cmi.comments_from_lms.0.comment', 'hi'), 'read only')
+        self.assertFalse(model.is_readable('cmi.exit'))
+
+
+class CountListEntriesTest(unittest.TestCase):
+
+    def test_count_list_entries(self):
+        self.assertEqual(count_list_entries([
+            'cmi.interactions.0.id',
+            'cmi.interactions.3.id',
+            'cmi.interactions.1.objectives.2.id',
+            'cmi.objectives.0.id',
+            'cmi.core.lesson_status',
+            'adl.nav.request',
+        ]), {
+            'cmi.interactions._count': 4,
+            'cmi.interactions.1.objectives._count': 3,
+            'cmi.objectives._count': 1,
+        })
+
+    def test_no_lists(self):
+        self.assertEqual(count_list_entries(['cmi.suspend_data', 'cmi.interactions._count']), {})
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+import unittest
+
+import pytz
+from webob import Request
+
+from scormxblock.cache import runtime_buffer
+from scormxblock.scorm_default import SCORM_STATUS, SCORM_VERSION
+
+from .test_manifest import SCORM_12_MANIFEST, SCORM_2004_MANIFEST
+from .tools import BLOCK_KEY, BlockRuntime
+
+REQUEST = {'package_version': SCORM_VERSION.V12, 'package_date': ''}
+
+
+class GetValuesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime = BlockRuntime(username=u'ada')
+        self.runtime.commit({
+            'cmi.core.lesson_location': 'page-3',
+            'cmi.core.exit': 'suspend',
+            'cmi.objectives.0.id': 'intro',
+        })
+
+    def get_value(self, name):
+        return self.runtime.call('scorm_get_value', dict(REQUEST, name=name))['value']
+
+    def test_get_value(self):
+        self.assertEqual(self.get_value('cmi.core.lesson_location'), 'page-3')
+        self.assertEqual(self.get_value('cmi.core.student_name'), 'ada')
+        self.assertEqual(self.get_value('cmi.core.entry'), 'resume')
+        self.assertEqual(self.get_value('cmi.core.total_time'), '0000:00:00.00')
+        self.assertEqual(self.get_value('cmi.objectives._count'), 1)
+        self.assertEqual(self.get_value('cmi.interactions._count'), 0)
+        # write only
+        self.assertEqual(self.get_value('cmi.core.exit'), '')
+
+    def test_get_values(self):
+        names = ['cmi.core.lesson_location', 'cmi.core.student_name', 'cmi.core.entry', 'cmi.objectives._count']
+        values = self.runtime.call('scorm_get_values', dict(REQUEST, names=names))['values']
+        self.assertEqual(values, {name: self.get_value(name) for name in names})
+
+    def test_snapshot(self):
+        values = self.runtime.call('scorm_get_values', REQUEST)['values']
+        self.assertEqual(values['cmi.core.lesson_location'], 'page-3')
+        self.assertEqual(values['cmi.objectives.0.id'], 'intro')
+        self.assertEqual(values['cmi.interactions._count'], 0)
+        self.assertEqual(values['cmi.core.exit'], '')
+        self.assertEqual(self.runtime.block().get_runtime_snapshot(SCORM_VERSION.V12), values)
+
+
+class ListCountsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime = BlockRuntime()
+        # stored before the list counts were maintained on commit
+        block = self.runtime.block()
+        block.scorm_runtime_data = {
+            'cmi.interactions.0.id': 'q0',
+            'cmi.interactions.1.id': 'q1',
+            'cmi.interactions.1.objectives.0.id': 'o0',
+        }
+        block.save()
+
+    def get_value(self, name):
+        return self.runtime.call('scorm_get_value', dict(REQUEST, name=name))['value']
+
+    def test_legacy_counts(self):
+        self.assertEqual(self.get_value('cmi.interactions._count'), 2)
+        self.assertEqual(self.get_value('cmi.interactions.1.objectives._count'), 1)
+        self.assertEqual(self.get_value('cmi.objectives._count'), 0)
+        self.assertFalse(self.runtime.block().are_list_counts_stored)
+
+    def test_backfill_on_commit(self):
+        self.runtime.commit({'cmi.interactions.2.id': 'q2'})
+        block = self.runtime.block()
+        self.assertTrue(block.are_list_counts_stored)
+        self.assertEqual(block.scorm_runtime_data['cmi.interactions._count'], 3)
+        self.assertEqual(block.scorm_runtime_data['cmi.interactions.1.objectives._count'], 1)
+        self.assertEqual(block.scorm_runtime_data['cmi.objectives._count'], 0)
+
+    def test_nested_count_from_index(self):
+        self.runtime.commit({'cmi.core.lesson_location': 'page-1'})
+        self.runtime.commit({'cmi.interactions.0.objectives.1.id': 'o1'})
+        self.assertEqual(self.get_value('cmi.interactions.0.objectives._count'), 2)
+        self.assertEqual(self.get_value('cmi.interactions.1.objectives._count'), 1)
+
+    def test_unstored_count(self):
+        self.runtime.commit({'cmi.core.lesson_location': 'page-1'})
+        block = self.runtime.block()
+        # an entry without count is not counted once the counts are stored
+        block.scorm_runtime_data = dict(block.scorm_runtime_data, **{'cmi.interactions.0.objectives.4.id': 'o4'})
+        block.save()
+        self.assertEqual(self.get_value('cmi.interactions.0.objectives._count'), 0)
+        self.assertEqual(self.get_value('cmi.interactions.5.objectives._count'), 0)
+
+    def test_clear(self):
+        self.runtime.commit({'cmi.core.lesson_location': 'page-1'})
+        block = self.runtime.block()
+        block.clear_runtime_data()
+        self.assertFalse(block.are_list_counts_stored)
+
+
+class CommitOrderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime = BlockRuntime()
+
+    def stored(self, name):
+        return self.runtime.block().scorm_runtime_data.get(name)
+
+    def test_applied(self):
+        response = self.runtime.commit({'cmi.core.lesson_location': 'page-1'}, 'a', 1)
+        self.assertNotIn('stale', response)
+        self.assertEqual(self.stored('cmi.core.lesson_location'), 'page-1')
+
+    def test_duplicate(self):
+        self.runtime.commit({'cmi.core.lesson_location': 'page-1'}, 'a', 1)
+        self.runtime.commit({'cmi.core.lesson_location': 'page-2'}, 'a', 2)
+        # beacon resend of the first commit
+        response = self.runtime.commit({'cmi.core.lesson_location': 'page-1'}, 'a', 1)
+        self.assertTrue(response['stale'])
+        self.assertEqual(self.stored('cmi.core.lesson_location'), 'page-2')
+        response = self.runtime.commit({'cmi.core.lesson_location': 'page-2'}, 'a', 2)
+        self.assertTrue(response['stale'])
+
+    def test_out_of_order(self):
+        self.runtime.commit({'cmi.core.lesson_location': 'page-2'}, 'a', 2)
+        response = self.runtime.commit({'cmi.core.lesson_location': 'page-1', 'cmi.suspend_data': 'x'}, 'a', 1)
+        # only the values no later commit wrote apply
+        self.assertNotIn('stale', response)
+        self.assertEqual(response['superseded'], ['cmi.core.lesson_location'])
+        self.assertEqual(self.stored('cmi.core.lesson_location'), 'page-2')
+        self.assertEqual(self.stored('cmi.suspend_data'), 'x')
+
+    def test_stale(self):
+        self.runtime.commit({'cmi.core.lesson_location': 'page-1'}, 'a', 1)
+        self.runtime.commit({'cmi.core.lesson_location': 'page-40'}, 'a', 40)
+        # behind the window, not even its new values apply
+        response = self.runtime.commit({'cmi.suspend_data': 'x'}, 'a', 2)
+        self.assertTrue(response['stale'])
+        self.assertIsNone(self.stored('cmi.suspend_data'))
+
+    def test_new_session(self):
+        self.runtime.commit({'cmi.core.lesson_location': 'page-9'}, 'a', 9)
+        response = self.runtime.commit({'cmi.core.lesson_location': 'page-1'}, 'b', 1)
+        self.assertNotIn('stale', response)
+        self.assertEqual(self.stored('cmi.core.lesson_location'), 'page-1')
+        block = self.runtime.block()
+        self.assertEqual((block.scorm_commit_session, block.scorm_commit_seq), ('b', 1))
+
+    def test_without_sequence(self):
+        self.runtime.commit({'cmi.core.lesson_location': 'page-2'}, 'a', 2)
+        for location in ('page-1', 'page-1', 'page-3'):
+            response = self.runtime.commit({'cmi.core.lesson_location': location})
+            self.assertNotIn('stale', response)
+            self.assertEqual(self.stored('cmi.core.lesson_location'), location)
+
+
+class WriteBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        runtime_buffer.interval = 60
+        self.addCleanup(setattr, runtime_buffer, 'interval', 0)
+        self.runtime = BlockRuntime()
+        self.key = '{}.{}'.format(BLOCK_KEY, self.runtime.user_id)
+        self.addCleanup(runtime_buffer.pop, self.key)
+
+    def poll(self, location, seq):
+        return self.runtime.commit({'cmi.core.lesson_location': location}, 'a', seq,
+                                   handler_name='scorm_enforce_commit')
+
+    def stored(self, name):
+        return self.runtime.block().scorm_runtime_data.get(name)
+
+    def test_buffered(self):
+        self.poll('page-1', 1)
+        self.poll('page-2', 2)
+        self.assertIsNone(self.stored('cmi.core.lesson_location'))
+        self.assertEqual(runtime_buffer.peek(self.key)['cmi.core.lesson_location'], 'page-2')
+        self.runtime.commit({'cmi.core.exit': 'suspend'}, 'a', 3)
+        self.assertEqual(self.stored('cmi.core.lesson_location'), 'page-2')
+        self.assertEqual(runtime_buffer.peek(self.key), {})
+
+    def test_locked(self):
+        self.poll('page-1', 1)
+        with runtime_buffer.locked(self.key) as locked:
+            self.assertTrue(locked)
+            runtime_buffer.lock_wait, lock_wait = 0, runtime_buffer.lock_wait
+            try:
+                self.poll('page-2', 2)
+            finally:
+                runtime_buffer.lock_wait = lock_wait
+        # written through, the buffer is left to its holder
+        self.assertEqual(self.stored('cmi.core.lesson_location'), 'page-2')
+        self.assertEqual(runtime_buffer.peek(self.key)['cmi.core.lesson_location'], 'page-1')
+        # its older values are superseded when flushed
+        self.runtime.block().student_view()
+        self.assertEqual(self.stored('cmi.core.lesson_location'), 'page-2')
+
+    def test_flushed_on_view(self):
+        self.poll('page-1', 1)
+        self.runtime.block().student_view()
+        self.assertEqual(self.stored('cmi.core.lesson_location'), 'page-1')
+        self.assertEqual(runtime_buffer.peek(self.key), {})
+
+    def test_flush_scos(self):
+        self.runtime.install_package(SCORM_2004_MANIFEST)
+        version = SCORM_VERSION.V2004
+        self.runtime.commit({'cmi.location': 'page-1'}, 'a', 1, handler_name='scorm_enforce_commit',
+                            version=version, sco='sco2')
+        block = self.runtime.block()
+        self.assertTrue(block.flush_runtime_buffer())
+        self.assertEqual(block.active_sco, '')
+        block.save()
+        block = self.runtime.block()
+        block.activate_sco('sco2')
+        self.assertEqual(block.scorm_runtime_data['cmi.location'], 'page-1')
+        self.assertFalse(block.flush_runtime_buffer())
+
+
+class TotalTimeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime = BlockRuntime()
+
+    def commit_time(self, session_time, session='a', seq=None, version=SCORM_VERSION.V12, **data):
+        name = 'cmi.core.session_time' if version == SCORM_VERSION.V12 else 'cmi.session_time'
+        self.seq = seq or getattr(self, 'seq', 0) + 1
+        self.runtime.commit({name: session_time}, session, self.seq, version=version, **data)
+        return self.runtime.block()
+
+    def test_session_time(self):
+        self.commit_time('0000:10:00')
+        # the package reports the whole session on every commit
+        block = self.commit_time('0000:15:00')
+        self.assertEqual(block.scorm_total_time, 900)
+        self.assertEqual(block.scorm_runtime_data['cmi.core.total_time'], '0000:15:00.00')
+
+    def test_new_session(self):
+        self.commit_time('0000:15:00')
+        block = self.commit_time('0000:05:00', session='b', seq=1)
+        self.assertEqual(block.scorm_total_time, 1200)
+
+    def test_session_time_going_backwards(self):
+        self.commit_time('0000:15:00')
+        # a new attempt of the SCO in the same player session
+        block = self.commit_time('0000:03:00')
+        self.assertEqual(block.scorm_total_time, 1080)
+        block = self.commit_time('0000:04:00')
+        self.assertEqual(block.scorm_total_time, 1140)
+
+    def test_stored_total_time(self):
+        # total time stored before it was accumulated
+        block = self.runtime.block()
+        block.scorm_runtime_data = {'cmi.total_time': 'PT1H'}
+        block.save()
+        block = self.commit_time('PT10M', version=SCORM_VERSION.V2004)
+        self.assertEqual(block.scorm_total_time, 4200)
+        self.assertEqual(block.scorm_runtime_data['cmi.total_time'], 'PT1H10M0.0S')
+
+    def test_sco_times(self):
+        self.runtime.install_package(SCORM_2004_MANIFEST)
+        version = SCORM_VERSION.V2004
+        self.commit_time('PT10M', version=version, sco='sco1')
+        self.commit_time('PT5M', version=version, sco='sco2')
+        # switching back to the first SCO continues its session
+        block = self.commit_time('PT12M', version=version, sco='sco1')
+        self.assertEqual(block.scorm_sco_times, {
+            '': {'total': 720, 'session': 720},
+            'sco2': {'total': 300, 'session': 300},
+        })
+        self.assertEqual(block.scorm_total_time, 1020)
+        self.assertEqual(block.scorm_runtime_data['cmi.total_time'], 'PT0H12M0.0S')
+        block.activate_sco('sco2')
+        self.assertEqual(block.scorm_runtime_data['cmi.total_time'], 'PT0H5M0.0S')
+
+
+class ScoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime = BlockRuntime()
+
+    def grades(self):
+        return [event['value'] for event_type, event in self.runtime.published if event_type == 'grade']
+
+    def test_published(self):
+        score = {'cmi.core.score.raw': '40', 'cmi.core.score.max': '50', 'cmi.core.score.min': '0',
+                 'cmi.core.lesson_status': 'passed'}
+        response = self.runtime.commit(score)
+        self.assertEqual(response['scorm_score_value'], 0.8)
+        self.assertEqual(response['scorm_status_value'], SCORM_STATUS.SUCCEED)
+        # an unchanged score is not published again
+        self.runtime.commit(score)
+        self.runtime.commit({'cmi.core.score.raw': '45'})
+        self.assertEqual(self.grades(), [0.8, 0.9])
+
+    def test_blank_score(self):
+        response = self.runtime.commit({'cmi.core.score.raw': '', 'cmi.core.lesson_status': 'passed'})
+        self.assertEqual(response['scorm_status_value'], SCORM_STATUS.UNATTENDED)
+        self.assertEqual(self.grades(), [])
+
+    def test_empty_score_range(self):
+        # no score can be computed when max equals min
+        score = {'cmi.core.score.raw': '5', 'cmi.core.score.max': '5', 'cmi.core.score.min': '5'}
+        response = self.runtime.commit(score)
+        self.assertEqual(response['scorm_status_value'], SCORM_STATUS.UNATTENDED)
+        self.assertEqual(response['scorm_score_value'], 0)
+        self.assertEqual(self.grades(), [])
+        self.assertFalse(self.runtime.block().is_score_changed(dict(score, package_version=SCORM_VERSION.V12)))
+
+
+class MultiScoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime = BlockRuntime()
+        self.runtime.install_package(SCORM_2004_MANIFEST)
+
+    def commit(self, sco, score, status):
+        self.runtime.commit({'cmi.score.scaled': score, 'cmi.success_status': status},
+                            version=SCORM_VERSION.V2004, sco=sco)
+        return self.runtime.block()
+
+    def test_rollup(self):
+        block = self.commit('sco1', '1', 'passed')
+        self.assertEqual((block.scorm_score, block.scorm_status), (1.0, SCORM_STATUS.SUCCEED))
+        self.assertEqual(block.scorm_sco_scores, {})
+        block = self.commit('sco2', '0.5', 'failed')
+        self.assertEqual((block.scorm_score, block.scorm_status), (0.75, SCORM_STATUS.FAILED))
+        block = self.commit('sco2', '0.9', 'passed')
+        self.assertAlmostEqual(block.scorm_score, 0.95)
+        self.assertEqual(block.scorm_status, SCORM_STATUS.SUCCEED)
+        block = self.commit('sco1', '0.7', 'unknown')
+        self.assertAlmostEqual(block.scorm_score, 0.8)
+        self.assertEqual(block.scorm_status, SCORM_STATUS.IN_PROGRESS)
+
+    def test_sco_progress(self):
+        self.runtime.commit({'cmi.progress_measure': '0.5'}, version=SCORM_VERSION.V2004, sco='sco2')
+        block = self.runtime.block()
+        self.assertEqual([block.get_sco_progress(sco) for sco in block.get_sco_ids()], [0, 0.5])
+
+    def test_per_call_cost(self):
+        # the runtime data of the other SCOs is not decoded, whatever their number
+        block = self.runtime.block()
+        for i in range(50):
+            block.scorm_sco_runtime_data['sco-{}'.format(i)] = json.dumps({'cmi.location': 'page-{}'.format(i)})
+        block.save()
+        self.runtime.commit({'cmi.location': 'page-2'}, version=SCORM_VERSION.V2004, sco='sco2')
+        block = self.runtime.block()
+        self.assertIsInstance(block.scorm_sco_runtime_data['sco2'], basestring)
+        block.activate_sco('sco2')
+        self.assertEqual(block.get_runtime_value('cmi.location', SCORM_VERSION.V2004), 'page-2')
+        self.assertEqual(list(block._decoded_runtime_data), ['sco2'])
+
+
+class ContentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime = BlockRuntime()
+        self.runtime.install_package(SCORM_12_MANIFEST)
+        block = self.runtime.block()
+        block.scorm_pkg_modified = datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=pytz.UTC)
+        block.save()
+        self.path = u'{}/index.html'.format(block.pkg_id)
+        block.fs.makedir(block.pkg_id, recreate=True)
+        block.fs.writebytes(self.path, b'0123456789')
+
+    def get(self, **headers):
+        request = Request.blank('/', headers=headers)
+        return self.runtime.handle(self.runtime.block(), 'scorm_content', request, self.path)
+
+    def test_range(self):
+        response = self.get(Range='bytes=2-4')
+        self.assertEqual(response.status_int, 206)
+        self.assertEqual(response.body, b'234')
+
+    def test_if_range(self):
+        etag = self.get().etag
+        response = self.get(Range='bytes=2-4', **{'If-Range': '"{}"'.format(etag)})
+        self.assertEqual((response.status_int, response.body), (206, b'234'))
+        response = self.get(Range='bytes=2-4', **{'If-Range': 'Thu, 02 Jan 2020 03:04:05 GMT'})
+        self.assertEqual((response.status_int, response.body), (206, b'234'))
+
+        # a range of another version of the file gets the whole file
+        response = self.get(Range='bytes=2-4', **{'If-Range': '"stale"'})
+        self.assertEqual((response.status_int, response.body), (200, b'0123456789'))
+        response = self.get(Range='bytes=2-4', **{'If-Range': 'Wed, 01 Jan 2020 00:00:00 GMT'})
+        self.assertEqual((response.status_int, response.body), (200, b'0123456789'))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from django.contrib.auth.models import User
+
+from scormxblock import interactions
+from scormxblock.interactions import ModelInteractionStore, split_list_key
+from scormxblock.scorm_default import SCORM_VERSION
+
+from .tools import BLOCK_KEY, BlockRuntime
+
+
+class StaleReadStore(ModelInteractionStore):
+    """Reads no entries on its next save, as when a concurrent commit created them since."""
+
+    stale = False
+
+    def _entries(self, user_id, block_key, sco):
+        entries = super(StaleReadStore, self)._entries(user_id, block_key, sco)
+        if self.stale:
+            self.stale = False
+            return entries.none()
+        return entries
+
+
+class ModelInteractionStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.user, _ = User.objects.get_or_create(username='store')
+        self.store = StaleReadStore()
+        self.addCleanup(self.store.clear, self.user.id, BLOCK_KEY)
+
+    def test_split_list_key(self):
+        self.assertEqual(split_list_key('cmi.interactions.3.result'), ('cmi.interactions', 3, 'result'))
+        self.assertEqual(split_list_key('cmi.objectives.0.score.raw'), ('cmi.objectives', 0, 'score.raw'))
+        self.assertIsNone(split_list_key('cmi.interactions._count'))
+
+    def test_save(self):
+        self.store.save(self.user.id, BLOCK_KEY, '', {
+            ('cmi.interactions', 0): {'id': 'q0', 'result': 'wrong'},
+            ('cmi.interactions', 2): {'id': 'q2'},
+            ('cmi.objectives', 0): {'id': 'o0'},
+        })
+        self.store.save(self.user.id, BLOCK_KEY, '', {('cmi.interactions', 0): {'result': 'correct'}})
+        self.assertEqual(self.store.get(self.user.id, BLOCK_KEY, '', 'cmi.interactions', 0),
+                         {'id': 'q0', 'result': 'correct'})
+        self.assertIsNone(self.store.get(self.user.id, BLOCK_KEY, '', 'cmi.interactions', 1))
+        self.assertEqual(self.store.counts(self.user.id, BLOCK_KEY, ''), {'cmi.interactions': 3, 'cmi.objectives': 1})
+        self.assertEqual(self.store.counts(self.user.id, BLOCK_KEY, 'sco2'), {})
+
+    def test_save_concurrent(self):
+        self.store.save(self.user.id, BLOCK_KEY, '', {('cmi.interactions', 0): {'id': 'q0'}})
+        # the entry is not read, its insert fails and the save is retried
+        self.store.stale = True
+        self.store.save(self.user.id, BLOCK_KEY, '', {
+            ('cmi.interactions', 0): {'result': 'correct'},
+            ('cmi.interactions', 1): {'id': 'q1'},
+        })
+        self.assertFalse(self.store.stale)
+        self.assertEqual(self.store.get(self.user.id, BLOCK_KEY, '', 'cmi.interactions', 0),
+                         {'id': 'q0', 'result': 'correct'})
+        self.assertEqual(self.store.get(self.user.id, BLOCK_KEY, '', 'cmi.interactions', 1), {'id': 'q1'})
+
+    def test_clear(self):
+        self.store.save(self.user.id, BLOCK_KEY, 'sco2', {('cmi.objectives', 0): {'id': 'o0'}})
+        self.store.clear(self.user.id, BLOCK_KEY)
+        self.assertEqual(self.store.counts(self.user.id, BLOCK_KEY, 'sco2'), {})
+
+
+class StoredListsTest(unittest.TestCase):
+
+    def setUp(self):
+        user, _ = User.objects.get_or_create(username='lists')
+        interactions._store = ModelInteractionStore()
+        self.addCleanup(setattr, interactions, '_store', None)
+        self.runtime = BlockRuntime(user_id=user.id)
+        self.addCleanup(interactions._store.clear, user.id, BLOCK_KEY)
+
+    def get_value(self, name):
+        return self.runtime.block().get_runtime_value(name, SCORM_VERSION.V2004)
+
+    def test_commit(self):
+        self.runtime.commit({'cmi.location': 'page-1', 'cmi.interactions.0.id': 'q0', 'cmi.interactions.1.id': 'q1'},
+                            version=SCORM_VERSION.V2004)
+        block = self.runtime.block()
+        self.assertEqual(block.scorm_runtime_data['cmi.location'], 'page-1')
+        self.assertNotIn('cmi.interactions.0.id', block.scorm_runtime_data)
+        self.assertEqual(self.get_value('cmi.interactions._count'), 2)
+        self.assertEqual(self.get_value('cmi.interactions.1.id'), 'q1')
+
+    def test_legacy_values(self):
+        # stored in the user state before the store was configured
+        block = self.runtime.block()
+        block.scorm_runtime_data = {'cmi.interactions.0.result': 'incorrect', 'cmi.interactions.1.result': 'incorrect'}
+        block.save()
+        self.runtime.commit({'cmi.interactions.0.result': 'correct'}, version=SCORM_VERSION.V2004)
+        block = self.runtime.block()
+        # the legacy value is dropped, it would shadow the stored one
+        self.assertNotIn('cmi.interactions.0.result', block.scorm_runtime_data)
+        self.assertEqual(block.scorm_runtime_data['cmi.interactions.1.result'], 'incorrect')
+        self.assertEqual(self.get_value('cmi.interactions.0.result'), 'correct')
+        self.assertEqual(self.get_value('cmi.interactions.1.result'), 'incorrect')
+        self.assertEqual(self.get_value('cmi.interactions._count'), 2)
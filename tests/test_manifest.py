@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import io
+import unittest
+import uuid
+import zipfile
+
+from fs.memoryfs import MemoryFS
+
+from scormxblock import manifest
+from scormxblock.manifest import (
+    add_launch_parameters, build_navigation, get_organization, load_manifest_index, parse_manifest,
+    save_manifest_index
+)
+from scormxblock.scorm_default import SCORM_VERSION
+
+SCORM_12_MANIFEST = b'''<?xml version="1.0" encoding="UTF-8"?>
+<manifest identifier="course" version="1.0"
+          xmlns="http://www.imsproject.org/xsd/imscp_rootv1p1p2"
+          xmlns:adlcp="http://www.adlnet.org/xsd/adlcp_rootv1p2">
+  <metadata>
+    <schema>ADL SCORM</schema>
+    <schemaversion>1.2</schemaversion>
+  </metadata>
+  <organizations default="org">
+    <organization identifier="org">
+      <title>Course</title>
+      <item identifier="item" identifierref="resource">
+        <title>Lesson</title>
+        <adlcp:datafromlms>launch data</adlcp:datafromlms>
+        <adlcp:masteryscore>80</adlcp:masteryscore>
+      </item>
+    </organization>
+  </organizations>
+  <resources>
+    <resource identifier="resource" type="webcontent" adlcp:scormtype="sco" href="lesson/index.html">
+      <file href="lesson/index.html"/>
+      <dependency identifierref="common"/>
+    </resource>
+    <resource identifier="common" type="webcontent" adlcp:scormtype="asset">
+      <file href="common/api.js"/>
+    </resource>
+  </resources>
+</manifest>
+'''
+
+SCORM_2004_MANIFEST = b'''<?xml version="1.0" encoding="UTF-8"?>
+<manifest identifier="course" version="1.0"
+          xmlns="http://www.imsglobal.org/xsd/imscp_v1p1"
+          xmlns:adlcp="http://www.adlnet.org/xsd/adlcp_v1p3"
+          xmlns:imsss="http://www.imsglobal.org/xsd/imsss">
+  <metadata>
+    <schema>ADL SCORM</schema>
+    <schemaversion>2004 4th Edition</schemaversion>
+  </metadata>
+  <organizations default="second">
+    <organization identifier="first">
+      <title>First</title>
+    </organization>
+    <organization identifier="second">
+      <title>Second</title>
+      <item identifier="module">
+        <title>Module</title>
+        <item identifier="sco1" identifierref="r1" parameters="?page=1">
+          <title>Part 1</title>
+          <imsss:sequencing>
+            <imsss:limitConditions attemptAbsoluteDurationLimit="PT1H"/>
+            <imsss:objectives>
+              <imsss:primaryObjective>
+                <imsss:minNormalizedMeasure>0.7</imsss:minNormalizedMeasure>
+              </imsss:primaryObjective>
+            </imsss:objectives>
+          </imsss:sequencing>
+        </item>
+        <item identifier="sco2" identifierref="r2">
+          <title>Part 2</title>
+        </item>
+      </item>
+    </organization>
+  </organizations>
+  <resources>
+    <resource identifier="r1" type="webcontent" adlcp:scormType="sco" href="part1.html"/>
+    <resource identifier="r2" type="webcontent" adlcp:scormType="sco" href="part2.html"/>
+  </resources>
+</manifest>
+'''
+
+
+def make_zip(files):
+    fileobj = io.BytesIO()
+    with zipfile.ZipFile(fileobj, 'w') as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    fileobj.seek(0)
+    return zipfile.ZipFile(fileobj)
+
+
+class ParseManifestTest(unittest.TestCase):
+
+    def test_scorm_12(self):
+        index = parse_manifest(io.BytesIO(SCORM_12_MANIFEST))
+        self.assertEqual(index['scorm_version'], SCORM_VERSION.V12)
+        self.assertEqual(index['schemaversion'], '1.2')
+        self.assertEqual(index['index_page'], 'lesson/index.html')
+        self.assertEqual(index['launch_data'], 'launch data')
+        self.assertEqual(index['default_sco'], 'item')
+        self.assertEqual(index['files'], {})
+
+        item = index['organizations'][0]['items'][0]
+        self.assertEqual(item['title'], 'Lesson')
+        self.assertEqual(item['mastery_score'], '80')
+        resource = index['resources']['resource']
+        self.assertEqual(resource['scorm_type'], 'sco')
+        self.assertEqual(resource['files'], ['lesson/index.html'])
+        self.assertEqual(resource['dependencies'], ['common'])
+
+    def test_scorm_2004_multi_sco(self):
+        index = parse_manifest(io.BytesIO(SCORM_2004_MANIFEST))
+        self.assertEqual(index['scorm_version'], SCORM_VERSION.V2004)
+        self.assertEqual(index['default_organization'], 'second')
+        self.assertEqual(get_organization(index)['identifier'], 'second')
+        # launched from the first item with a resource
+        self.assertEqual(index['index_page'], 'part1.html')
+        self.assertEqual(index['default_sco'], 'sco1')
+        self.assertEqual(sorted(index['scos']), ['sco1', 'sco2'])
+        self.assertEqual(index['scos']['sco1']['parameters'], '?page=1')
+
+        module = index['navigation'][0]
+        self.assertFalse(module['sco'])
+        self.assertEqual([node['identifier'] for node in module['items']], ['sco1', 'sco2'])
+        self.assertTrue(all(node['sco'] for node in module['items']))
+
+        sco1 = get_organization(index)['items'][0]['items'][0]
+        self.assertEqual(sco1['max_time_allowed'], 'PT1H')
+        self.assertEqual(sco1['mastery_score'], '0.7')
+
+    def test_files(self):
+        zf = make_zip({'imsmanifest.xml': SCORM_12_MANIFEST, 'lesson/index.html': b'<html></html>'})
+        with zf.open('imsmanifest.xml') as manifest:
+            index = parse_manifest(manifest, zf)
+        self.assertEqual(index['files'], {'imsmanifest.xml': len(SCORM_12_MANIFEST), 'lesson/index.html': 13})
+
+    def test_single_resource_without_organization(self):
+        index = parse_manifest(io.BytesIO(
+            b'<manifest><organizations/><resources><resource identifier="r" href="start.html"/></resources>'
+            b'</manifest>'))
+        self.assertEqual(index['scorm_version'], SCORM_VERSION.V12)
+        self.assertEqual(index['index_page'], 'start.html')
+        self.assertIsNone(index['default_sco'])
+        self.assertEqual(index['navigation'], [])
+
+    def test_build_navigation_without_organization(self):
+        self.assertEqual(build_navigation(None), ([], {}))
+
+
+class LaunchParametersTest(unittest.TestCase):
+
+    def test_add_launch_parameters(self):
+        self.assertEqual(add_launch_parameters('a/index.html', None), 'a/index.html')
+        self.assertEqual(add_launch_parameters('a/index.html', '?page=2'), 'a/index.html?page=2')
+        self.assertEqual(add_launch_parameters('a/index.html?x=1', '&page=2'), 'a/index.html?x=1&page=2')
+        self.assertEqual(add_launch_parameters('a/index.html', '#intro'), 'a/index.html#intro')
+
+
+class LoadManifestIndexTest(unittest.TestCase):
+
+    def test_storage_namespaces(self):
+        # package ids of block storages are only unique within a block
+        pkg_id = uuid.uuid4().hex
+        first_fs, second_fs = MemoryFS(), MemoryFS()
+        save_manifest_index(first_fs, pkg_id, {'index_page': 'first.html'})
+        save_manifest_index(second_fs, pkg_id, {'index_page': 'second.html'})
+        self.assertEqual(load_manifest_index(first_fs, pkg_id, u'block-1:' + pkg_id)['index_page'], 'first.html')
+        self.assertEqual(load_manifest_index(second_fs, pkg_id, u'block-2:' + pkg_id)['index_page'], 'second.html')
+
+    def test_missing_index_expires(self):
+        pkg_fs = MemoryFS()
+        pkg_id = uuid.uuid4().hex
+        ttl = manifest.MANIFEST_MISSING_TTL
+        self.addCleanup(setattr, manifest, 'MANIFEST_MISSING_TTL', ttl)
+        manifest.MANIFEST_MISSING_TTL = 0
+        self.assertIsNone(load_manifest_index(pkg_fs, pkg_id))
+        save_manifest_index(pkg_fs, pkg_id, {'index_page': 'index.html'})
+        self.assertEqual(load_manifest_index(pkg_fs, pkg_id), {'index_page': 'index.html'})
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import logging
+import unittest
+
+from scormxblock import metrics
+from scormxblock.cache import TTLCache
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        sources = metrics._sources.copy()
+        self.addCleanup(setattr, metrics, '_sources', sources)
+
+    def test_stats(self):
+        cache = metrics.register(TTLCache('test-metrics', maxsize=2))
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('b')
+        stats = metrics.get_stats()
+        self.assertEqual(stats['test-metrics'], {'size': 1, 'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+        self.assertIn('grade', stats)
+        self.assertIn('learner', stats)
+        self.assertIn('test-metrics hit_rate=0.500 hits=1 misses=1 size=1', metrics.format_stats(stats))
+
+    def test_log_stats(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        metrics.logger.addHandler(handler)
+        self.addCleanup(metrics.logger.removeHandler, handler)
+        self.addCleanup(metrics.logger.setLevel, metrics.logger.level)
+        metrics.logger.setLevel(logging.INFO)
+        logged_at = metrics._logged_at[0]
+        self.addCleanup(metrics._logged_at.__setitem__, 0, logged_at)
+
+        metrics._logged_at[0] = 0
+        self.assertTrue(metrics.log_stats(60))
+        self.assertFalse(metrics.log_stats(60))
+        self.assertFalse(metrics.log_stats(0))
+        self.assertEqual(len(records), 1)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from scormxblock.runtime_data import (
+    decode_runtime_data, encode_runtime_data, format_duration, format_timespan, is_encoded, join_key,
+    parse_duration, split_key
+)
+
+
+class KeysTest(unittest.TestCase):
+
+    def test_split_key(self):
+        self.assertEqual(split_key('cmi.core.lesson_status'), ('cmi.core.lesson_status', []))
+        self.assertEqual(split_key('cmi.interactions.3.id'), ('cmi.interactions.#.id', [3]))
+        self.assertEqual(split_key('cmi.interactions.12.correct_responses.0.pattern'),
+                         ('cmi.interactions.#.correct_responses.#.pattern', [12, 0]))
+
+    def test_split_key_kept_as_is(self):
+        # leading zeros would not survive the round trip
+        self.assertEqual(split_key('cmi.interactions.03.id'), ('cmi.interactions.03.id', []))
+        self.assertEqual(split_key('cmi.#.id'), ('cmi.#.id', []))
+
+    def test_join_key(self):
+        self.assertEqual(join_key('cmi.interactions.#.objectives.#.id', [2, 5]), 'cmi.interactions.2.objectives.5.id')
+        self.assertEqual(join_key('cmi.suspend_data', []), 'cmi.suspend_data')
+        self.assertEqual(join_key('adl.data.#.id%s', [1]), 'adl.data.1.id%s')
+
+    def test_memoized(self):
+        key = 'cmi.objectives.7.score.raw'
+        self.assertIs(split_key(key), split_key(key))
+        self.assertEqual(join_key(*split_key(key)), key)
+
+
+class EncodingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = {
+            'cmi.core.lesson_status': 'incomplete',
+            'cmi.suspend_data': 'x' * 100,
+            'cmi.interactions._count': 20,
+        }
+        for i in range(20):
+            self.data['cmi.interactions.{}.id'.format(i)] = 'question-{}'.format(i)
+            self.data['cmi.interactions.{}.result'.format(i)] = 'correct'
+
+    def test_round_trip(self):
+        encoded = encode_runtime_data(self.data, compress_min_size=None)
+        self.assertTrue(is_encoded(encoded))
+        self.assertNotIn('zlib', encoded)
+        self.assertEqual(len(encoded['patterns']), 5)
+        self.assertEqual(decode_runtime_data(encoded), self.data)
+
+    def test_compressed_round_trip(self):
+        encoded = encode_runtime_data(self.data, compress_min_size=1)
+        self.assertIn('zlib', encoded)
+        self.assertEqual(decode_runtime_data(encoded), self.data)
+
+    def test_small_data_is_not_compressed(self):
+        encoded = encode_runtime_data({'cmi.core.exit': 'suspend'}, compress_min_size=1024)
+        self.assertNotIn('zlib', encoded)
+
+    def test_plain_data(self):
+        self.assertFalse(is_encoded(self.data))
+        self.assertIs(decode_runtime_data(self.data), self.data)
+        self.assertEqual(decode_runtime_data(encode_runtime_data({})), {})
+
+
+class DurationTest(unittest.TestCase):
+
+    def test_timespan(self):
+        self.assertEqual(parse_duration('0000:00:00'), 0)
+        self.assertEqual(parse_duration('01:02:03'), 3723)
+        self.assertAlmostEqual(parse_duration('0001:00:30.5'), 3630.5)
+        self.assertIsNone(parse_duration('1:00:00'))
+        self.assertIsNone(parse_duration('00:60'))
+
+    def test_iso_duration(self):
+        self.assertEqual(parse_duration('PT0S'), 0)
+        self.assertEqual(parse_duration('PT1H30M'), 5400)
+        self.assertAlmostEqual(parse_duration('PT12.34S'), 12.34)
+        self.assertEqual(parse_duration('P1DT1S'), 86401)
+        self.assertEqual(parse_duration(' PT5M '), 300)
+
+    def test_invalid(self):
+        for value in (None, '', 'P', 'PT', 'P1DT', 'PT1X', 'ten minutes', '5'):
+            self.assertIsNone(parse_duration(value), value)
+
+    def test_format_timespan(self):
+        self.assertEqual(format_timespan(0), '0000:00:00.00')
+        self.assertEqual(format_timespan(3723.5), '0001:02:03.50')
+        self.assertEqual(format_timespan(-5), '0000:00:00.00')
+        self.assertEqual(format_timespan(10000 * 3600), '9999:59:59.99')
+        self.assertAlmostEqual(parse_duration(format_timespan(4000.25)), 4000.25)
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(0), 'PT0H0M0.0S')
+        self.assertEqual(parse_duration(format_duration(5400)), 5400)
+        self.assertAlmostEqual(parse_duration(format_duration(3723.25)), 3723.25)
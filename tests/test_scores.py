@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from scormxblock import scores
+from scormxblock.runtime_data import encode_runtime_data
+from scormxblock.scorm_default import SCORM_STATUS
+from scormxblock.scromxblockng import ScormXBlock
+
+NAN = float('nan')
+
+
+class ExtractRuntimeInfoTest(unittest.TestCase):
+
+    def test_scorm_12(self):
+        info = ScormXBlock.extract_runtime_info_12({
+            'cmi.core.score.raw': '40', 'cmi.core.score.max': '50', 'cmi.core.score.min': '',
+            'cmi.core.lesson_status': 'passed',
+        })
+        self.assertEqual(info, {'raw': 40.0, 'maxi': 50.0, 'mini': 0.0, 'status': SCORM_STATUS.SUCCEED})
+
+    def test_scorm_12_blank_score(self):
+        # SCORM 1.2 allows a blank raw score, the learner is then not scored
+        info = ScormXBlock.extract_runtime_info_12({'cmi.core.score.raw': '', 'cmi.core.lesson_status': 'failed'})
+        self.assertEqual(info, {'status': SCORM_STATUS.FAILED})
+        self.assertNotIn('raw', ScormXBlock.extract_runtime_info_12({}))
+
+    def test_scorm_2004(self):
+        info = ScormXBlock.extract_runtime_info_2004({'cmi.score.scaled': '0.5', 'cmi.success_status': 'passed'})
+        self.assertEqual(info, {'raw': 0.5, 'maxi': 1.0, 'mini': 0.0, 'status': SCORM_STATUS.SUCCEED})
+
+
+class ComputeScoresTest(unittest.TestCase):
+
+    def setUp(self):
+        numpy = scores.np
+        self.addCleanup(setattr, scores, 'np', numpy)
+
+    def check_scores(self):
+        new, scored, changed = scores.compute_scores(
+            [40.0, NAN, 5.0, 2.0], [50.0, 100.0, 5.0, 2.0], [0.0, 0.0, 0.0, 2.0], [0.5, 0.3, 1.0, 0.1])
+        self.assertEqual(new, [0.8, 0.3, 1.0, 0.1])
+        self.assertEqual(scored, [True, False, True, False])
+        self.assertEqual(changed, [True, False, False, False])
+
+        new, _, changed = scores.compute_scores([10.0], [50.0], [0.0], [0.5], only_if_higher=True)
+        self.assertEqual((new, changed), ([0.5], [False]))
+
+    def test_python(self):
+        scores.np = None
+        self.check_scores()
+
+    @unittest.skipIf(scores.np is None, 'numpy is not installed')
+    def test_numpy(self):
+        self.check_scores()
+
+
+class ScoreStatesTest(unittest.TestCase):
+
+    def test_scorm_12_blank_score(self):
+        # a blank raw score keeps the stored score, the learner is not scored
+        states = [
+            {'_scorm_runtime_data': encode_runtime_data({'cmi.core.score.raw': '', 'cmi.core.lesson_status': 'failed'}),
+             'scorm_score': 0.4},
+            {'_scorm_runtime_data': {'cmi.core.score.raw': '30', 'cmi.core.score.max': '60'}, 'scorm_score': 0.4},
+            {'_scorm_runtime_data': {'cmi.core.score.raw': 'n/a'}, 'scorm_score': 0.2},
+            {},
+        ]
+        old, (new, scored, changed) = scores.score_states(states, ScormXBlock.extract_runtime_info_12)
+        self.assertEqual(old, [0.4, 0.4, 0.2, 0.0])
+        self.assertEqual(new, [0.4, 0.5, 0.2, 0.0])
+        self.assertEqual(scored, [False, True, False, False])
+        self.assertEqual(changed, [False, True, False, False])
+
+    def test_score_bounds(self):
+        states = [{'_scorm_runtime_data': {'cmi.core.score.raw': '30', 'cmi.core.score.max': '60'}}]
+        _, (new, _, _) = scores.score_states(states, ScormXBlock.extract_runtime_info_12, score_min=0, score_max=40)
+        self.assertEqual(new, [0.75])
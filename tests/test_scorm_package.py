@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+import json
+import threading
+import time
+import unittest
+import zipfile
+
+from fs.memoryfs import MemoryFS
+
+from scormxblock.cache import cache_lock
+from scormxblock.scorm_package import (
+    MANIFEST_NAME, PackageError, PackageExtractor, copy_stream, entry_path, files_manifest_path, iter_file,
+    _store_package, open_package, store_package
+)
+
+
+def make_zip(files):
+    fileobj = io.BytesIO()
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files:
+            zf.writestr(name, content)
+    fileobj.seek(0)
+    return fileobj
+
+
+def sha1(content):
+    return hashlib.sha1(content).hexdigest()
+
+
+FILES = [
+    (MANIFEST_NAME, b'<manifest/>'),
+    ('assets/', b''),
+    ('index.html', b'<html>' + b'x' * 5000 + b'</html>'),
+    ('assets/app.js', b'var api = null;'),
+]
+
+
+class OpenPackageTest(unittest.TestCase):
+
+    def test_open(self):
+        zf = open_package(make_zip(FILES))
+        self.assertEqual(len(zf.infolist()), 4)
+
+    def test_not_a_zip(self):
+        with self.assertRaises(PackageError):
+            open_package(io.BytesIO(b'not a zip'))
+
+    def test_missing_manifest(self):
+        with self.assertRaises(PackageError):
+            open_package(make_zip(FILES[1:]))
+        self.assertIsNotNone(open_package(make_zip(FILES[1:]), require_manifest=False))
+
+    def test_limits(self):
+        with self.assertRaises(PackageError):
+            open_package(make_zip(FILES), max_entries=3)
+        with self.assertRaises(PackageError):
+            open_package(make_zip(FILES), max_size=1000)
+
+    def test_entry_path(self):
+        zf = zipfile.ZipFile(make_zip([('a\\b/../c.html', b''), ('../evil.html', b'')]))
+        infos = zf.infolist()
+        self.assertEqual(entry_path(infos[0]), u'a/c.html')
+        with self.assertRaises(PackageError):
+            entry_path(infos[1])
+
+
+class StreamsTest(unittest.TestCase):
+
+    def test_copy_stream(self):
+        dst = io.BytesIO()
+        digest = hashlib.sha1()
+        self.assertEqual(copy_stream(io.BytesIO(b'abcdefgh'), dst, chunk_size=3, digest=digest), 8)
+        self.assertEqual(dst.getvalue(), b'abcdefgh')
+        self.assertEqual(digest.hexdigest(), sha1(b'abcdefgh'))
+
+    def test_copy_stream_max_size(self):
+        with self.assertRaises(PackageError):
+            copy_stream(io.BytesIO(b'abcdefgh'), io.BytesIO(), chunk_size=3, max_size=5)
+
+    def test_iter_file(self):
+        target_fs = MemoryFS()
+        target_fs.writebytes(u'file.txt', b'0123456789')
+        self.assertEqual(b''.join(iter_file(target_fs, u'file.txt', chunk_size=4)), b'0123456789')
+        self.assertEqual(list(iter_file(target_fs, u'file.txt', 2, 7, chunk_size=3)), [b'234', b'56'])
+
+
+class PackageExtractorTest(unittest.TestCase):
+
+    def extract(self, files, concurrency=1, previous=None, target_fs=None, target_dir=u'pkg'):
+        target_fs = target_fs or MemoryFS()
+        progress = []
+        extractor = PackageExtractor(target_fs, target_dir, concurrency=concurrency, chunk_size=1024,
+                                     progress=lambda *args: progress.append(args), previous=previous)
+        report = extractor.extract(zipfile.ZipFile(make_zip(files)))
+        return target_fs, report, progress
+
+    def check_extracted(self, concurrency):
+        target_fs, report, progress = self.extract(FILES, concurrency)
+        self.assertEqual(target_fs.readbytes(u'pkg/index.html'), FILES[2][1])
+        self.assertEqual(target_fs.readbytes(u'pkg/assets/app.js'), FILES[3][1])
+        self.assertTrue(target_fs.isdir(u'pkg/assets'))
+
+        size = sum(len(content) for _, content in FILES)
+        self.assertEqual((report.entries, report.size), (4, size))
+        self.assertEqual(report.files, {name: [len(content), sha1(content)] for name, content in FILES if content})
+        self.assertEqual(sorted(report.diff['added']), sorted(report.files))
+        self.assertEqual(progress[-1], (4, 4, size, size))
+
+    def test_extract(self):
+        self.check_extracted(concurrency=1)
+
+    def test_extract_parallel(self):
+        self.check_extracted(concurrency=4)
+
+    def test_diff(self):
+        target_fs, previous, _ = self.extract(FILES, target_dir=u'old')
+        files = [
+            (MANIFEST_NAME, b'<manifest version="2"/>'),
+            ('index.html', FILES[2][1]),
+            ('new.html', b'<html></html>'),
+        ]
+        for concurrency in (1, 4):
+            target_dir = u'new{}'.format(concurrency)
+            _, report, _ = self.extract(files, concurrency, previous=(u'old', previous.files),
+                                        target_fs=target_fs, target_dir=target_dir)
+            self.assertEqual(report.diff, {
+                'added': ['new.html'],
+                'changed': [MANIFEST_NAME],
+                'unchanged': ['index.html'],
+                'removed': ['assets/app.js'],
+            })
+            # unchanged files are copied from the previous package
+            self.assertEqual(target_fs.readbytes(u'{}/index.html'.format(target_dir)), FILES[2][1])
+
+
+class StorePackageTest(unittest.TestCase):
+
+    def test_content_addressed(self):
+        target_fs = MemoryFS()
+        fileobj = make_zip(FILES)
+        pkg_id, diff = store_package(zipfile.ZipFile(fileobj), fileobj, target_fs, content_addressed=True,
+                                     progress=None)
+        self.assertEqual(pkg_id, sha1(fileobj.getvalue()))
+        files = json.loads(target_fs.gettext(files_manifest_path(pkg_id)))['files']
+        self.assertEqual(sorted(files), sorted(name for name, content in FILES if content))
+        self.assertEqual(sorted(diff['added']), sorted(files))
+
+        # a package already stored is not extracted again
+        target_fs.remove(u'{}/index.html'.format(pkg_id))
+        self.assertEqual(store_package(zipfile.ZipFile(fileobj), fileobj, target_fs, content_addressed=True),
+                         (pkg_id, None))
+        self.assertFalse(target_fs.exists(u'{}/index.html'.format(pkg_id)))
+
+    def test_concurrent_import(self):
+        # the import of a package being imported waits for it and reuses it
+        target_fs = MemoryFS()
+        fileobj = make_zip(FILES)
+        pkg_id = sha1(fileobj.getvalue())
+        locked = threading.Event()
+        stored = []
+
+        def first_import():
+            with cache_lock('package.{}'.format(pkg_id), 60, 0):
+                locked.set()
+                time.sleep(0.2)
+                first = io.BytesIO(fileobj.getvalue())
+                stored.append(_store_package(zipfile.ZipFile(first), pkg_id, target_fs, None, None))
+
+        thread = threading.Thread(target=first_import)
+        thread.start()
+        locked.wait()
+        second = store_package(zipfile.ZipFile(fileobj), fileobj, target_fs, content_addressed=True, progress=None)
+        thread.join()
+        self.assertEqual(second, (pkg_id, None))
+        self.assertEqual(stored[0][0], pkg_id)
+
+    def test_new_directory(self):
+        target_fs = MemoryFS()
+        fileobj = make_zip(FILES)
+        first, _ = store_package(zipfile.ZipFile(fileobj), fileobj, target_fs, progress=None)
+        second, diff = store_package(zipfile.ZipFile(fileobj), fileobj, target_fs, progress=None,
+                                     previous_pkg_id=first)
+        self.assertNotEqual(first, second)
+        self.assertEqual(target_fs.readbytes(u'{}/index.html'.format(second)), FILES[2][1])
+        self.assertEqual(diff['added'], [])
+        self.assertEqual(len(diff['unchanged']), 3)
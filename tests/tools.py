@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory runtime to run the block handlers in tests and benchmarks.
+"""
+import io
+import json
+import uuid
+
+from fs.memoryfs import MemoryFS
+from webob import Request
+from xblock.core import XBlockMixin
+from xblock.field_data import DictFieldData
+from xblock.fields import Boolean, Scope, ScopeIds
+from xblock.reference.user_service import UserService, XBlockUser
+from xblock.runtime import NullI18nService
+from xblock.test.tools import TestRuntime
+
+from scormxblock.manifest import parse_manifest, save_manifest_index
+from scormxblock.scorm_default import SCORM_VERSION
+from scormxblock.scromxblockng import ScormXBlock
+
+BLOCK_KEY = u'block-v1:edX+Demo+2020+type@scormxblock+block@scorm'
+
+
+class LmsFieldsMixin(XBlockMixin):
+    # inherited setting the LMS mixes in
+    graded = Boolean(default=False, scope=Scope.settings)
+
+
+class FsService(object):
+
+    def __init__(self):
+        self.filesystems = {}
+
+    def load(self, field, block):
+        return self.filesystems.setdefault(block.scope_ids.usage_id, MemoryFS())
+
+
+class LearnerService(UserService):
+
+    def __init__(self, user_id, username):
+        super(LearnerService, self).__init__()
+        self.user = XBlockUser(is_current_user=True)
+        self.user.opt_attrs = {'edx-platform.user_id': user_id, 'edx-platform.username': username}
+
+    def get_current_user(self):
+        return self.user
+
+
+class BlockRuntime(TestRuntime):
+    """
+    Runtime of the block of a learner. The field values are kept in a dict,
+    `block()` returns a new instance on every call, as each LMS request
+    loads the block again.
+    """
+
+    def __init__(self, user_id=7, username=u'learner', **fields):
+        super(BlockRuntime, self).__init__(mixins=(LmsFieldsMixin,), services={
+            'fs': FsService(),
+            'i18n': NullI18nService(),
+            'user': LearnerService(user_id, username),
+        })
+        self.user_id = user_id
+        self.field_data = DictFieldData(fields)
+        self.published = []
+
+    def block(self):
+        block_class = self.mixologist.mix(ScormXBlock)
+        return block_class(self, self.field_data, ScopeIds(self.user_id, 'scormxblock', BLOCK_KEY, BLOCK_KEY))
+
+    def install_package(self, manifest):
+        """
+        Make a package of `manifest` the current one, only its index is
+        stored. Return the index.
+        """
+        index = parse_manifest(io.BytesIO(manifest))
+        # a new id per package, the indexes are cached by id
+        pkg_id = uuid.uuid4().hex
+        block = self.block()
+        save_manifest_index(block.fs, pkg_id, index)
+        block.scorm_pkg = u'{}/{}'.format(pkg_id, index['index_page'])
+        block.scorm_pkg_version = index['scorm_version']
+        block.save()
+        return index
+
+    def publish(self, block, event_type, event_data):
+        self.published.append((event_type, event_data))
+
+    def handler_url(self, block, handler_name, suffix='', query='', thirdparty=False):
+        return u'/handler/{}/{}'.format(handler_name, suffix)
+
+    def call(self, handler_name, data):
+        """Call json handler `handler_name` with `data` and return its json response."""
+        request = Request.blank('/', method='POST', body=json.dumps(data))
+        response = self.handle(self.block(), handler_name, request)
+        return json.loads(response.body)
+
+    def commit(self, values, session=None, seq=None, handler_name='scorm_commit', version=SCORM_VERSION.V12, **data):
+        """Commit runtime `values` as the player does."""
+        data.update(values)
+        data['package_version'] = version
+        data.setdefault('package_date', '')
+        if session is not None:
+            data.update(commit_session=session, commit_seq=seq)
+        return self.call(handler_name, data)